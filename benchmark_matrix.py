@@ -1,8 +1,8 @@
-
 import sys
 import os
 import time
 import numpy as np
+import cv2
 from PIL import Image
 
 # Ensure we can import from the current directory
@@ -13,6 +13,9 @@ try:
 except ImportError:
     pass
 
+# Minimum speedup of the rain engine over the legacy per-frame filter
+MIN_GAIN = {(640, 480): 2.0, (1920, 1080): 2.0}
+
 class MockClip:
     def __init__(self, w, h):
         self.w = w
@@ -22,40 +25,98 @@ class MockClip:
     def transform(self, filter_func):
         return filter_func
 
-def main():
-    w, h = 640, 480
-    clip = MockClip(w, h)
-    matrix_fx = Matrix(speed=150, density=0.2, font_size=16, seed=42)
+def legacy_filter(matrix_fx, w, h):
+    """
+    The filter as it was before the rain engine: brightness computed three
+    times, glyphs multiplied into a fresh uint16 tensor and the rain layer
+    colored three ways on every frame. Kept as the benchmark baseline.
+    """
+    if matrix_fx._atlas is None:
+        matrix_fx._init_atlas()
+    char_h, char_w = matrix_fx.char_h, matrix_fx.char_w
+    rows, cols = h // char_h + 1, w // char_w + 1
+    rng = np.random.default_rng(matrix_fx.seed)
+    col_offsets = rng.random(cols) * h * 2
+    col_speeds = matrix_fx.speed * (0.8 + 0.4 * rng.random(cols))
+    col_active = (rng.random(cols) < matrix_fx.density).astype(np.int16)
+    base_char_grid = rng.integers(0, len(matrix_fx.chars), size=(rows, cols))
+
+    def filter(get_frame, t):
+        frame = get_frame(t)
+        trail_len = max(1, h // 2)
+        lead_y = (col_speeds * t + col_offsets) % (h + trail_len)
+        lead_y_int = lead_y.astype(np.int32)
+        row_y = (np.arange(rows) * char_h).astype(np.int32)
+        dist = lead_y_int[None, :] - row_y[:, None]
+
+        for _ in range(2):
+            # The two brightness grids that were computed and then overwritten
+            b = np.zeros((rows, cols), dtype=np.int16)
+            body = (dist >= 0) & (dist < trail_len)
+            b[body] = (256 - (dist[body] * 256 // trail_len)).astype(np.int16)
+            b[(dist >= 0) & (dist < char_h)] = 358
+            b *= col_active[None, :]
+
+        brightness_val = 256 - ((dist << 8) // trail_len)
+        brightness_int = np.where((dist >= 0) & (dist < trail_len), brightness_val, 0)
+        brightness_int = np.where((dist >= 0) & (dist < char_h), 358, brightness_int)
+        brightness_int = (brightness_int * col_active.astype(np.int32)[None, :]).astype(np.uint16)
+
+        char_indices = (base_char_grid + int(t * 12)) % len(matrix_fx.chars)
+        char_slices = matrix_fx._atlas[char_indices]
+        rain_mask = (char_slices.astype(np.uint16) * brightness_int[:, :, None, None]) >> 8
+        rain_layer = rain_mask.transpose(0, 2, 1, 3).reshape(rows * char_h, cols * char_w)[:h, :w]
+
+        rain_rgb = matrix_fx.color_lut[rain_layer]
+        rain_rgb = (rain_layer.astype(np.uint8)[:, :, None] * matrix_fx.rgb).astype(np.uint8)
+        product = rain_layer[:, :, None].astype(np.uint32) * matrix_fx.rgb
+        rain_rgb = np.minimum(product >> 8, 255).astype(np.uint8)
+
+        dimmed_bg = cv2.convertScaleAbs(frame, alpha=0.8)
+        return cv2.add(dimmed_bg, rain_rgb)
+
+    return filter
+
+def measure(filter_func, get_frame, num_frames):
+    # Warmup
+    filter_func(get_frame, 0.0)
 
-    # Initialize the effect
-    filter_func = matrix_fx.apply(clip)
+    start_time = time.time()
+    last_out = None
+    for i in range(num_frames):
+        last_out = filter_func(get_frame, i * 0.1)
+    duration = time.time() - start_time
+    return num_frames / duration, last_out
 
-    # Create a dummy frame (black)
+def benchmark(w, h, num_frames=50):
+    clip = MockClip(w, h)
     frame = np.zeros((h, w, 3), dtype=np.uint8)
 
     # Mock get_frame
     def get_frame(t):
         return frame
 
-    # Measure performance
-    # Warmup
-    filter_func(get_frame, 0.0)
+    new_fps, out = measure(Matrix(speed=150, density=0.2, font_size=16, seed=42).apply(clip), get_frame, num_frames)
+    old_fps, expected = measure(legacy_filter(Matrix(speed=150, density=0.2, font_size=16, seed=42), w, h), get_frame, num_frames)
 
-    start_time = time.time()
-    num_frames = 50
-    last_out = None
+    assert np.array_equal(out, expected), f"Rain engine output differs from the legacy filter at {w}x{h}"
+    gain = new_fps / old_fps
+    print(f"{w}x{h}: {new_fps:.2f} fps (legacy {old_fps:.2f} fps, {gain:.2f}x)")
 
-    for i in range(num_frames):
-        t = i * 0.1
-        out = filter_func(get_frame, t)
-        last_out = out
+    # Prebaked atlas at full precision must match as well
+    baked = Matrix(speed=150, density=0.2, font_size=16, seed=42, brightness_levels=Matrix.MAX_BRIGHTNESS + 1)
+    baked_fps, baked_out = measure(baked.apply(clip), get_frame, num_frames)
+    assert np.array_equal(baked_out, expected), f"Prebaked atlas output differs from the legacy filter at {w}x{h}"
+    print(f"{w}x{h} prebaked: {baked_fps:.2f} fps, atlas {baked.atlas_nbytes / 2**20:.1f} MB")
+    return gain, out
 
-    end_time = time.time()
-    duration = end_time - start_time
-    fps = num_frames / duration
-
-    print(f"Time for {num_frames} frames: {duration:.4f}s")
-    print(f"FPS: {fps:.2f}")
+def main():
+    last_out = None
+    failures = []
+    for (w, h), min_gain in MIN_GAIN.items():
+        gain, last_out = benchmark(w, h)
+        if gain < min_gain:
+            failures.append(f"{w}x{h}: {gain:.2f}x < {min_gain}x")
 
     # Save last frame
     if len(sys.argv) > 1:
@@ -63,5 +124,7 @@ def main():
         Image.fromarray(last_out).save(filename)
         print(f"Saved last frame to {filename}")
 
+    assert not failures, "Matrix fps gain below target: " + "; ".join(failures)
+
 if __name__ == "__main__":
     main()
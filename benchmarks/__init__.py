@@ -0,0 +1,13 @@
+"""
+Benchmarks for the custom_fx effects.
+
+Run ``python -m benchmarks`` to measure every effect at 480p, 1080p and 4K,
+write the results as JSON and optionally fail on regressions against a
+previous run (``--baseline``). See ``python -m benchmarks --help``.
+
+``python -m benchmarks.pipeline`` benchmarks whole tool sequences end to
+end on media generated with ffmpeg, split into decode, effect, composite,
+encode and MCP overhead.
+"""
+from .cases import CASES, RESOLUTIONS
+from .run import run_case, run_all, compare
@@ -0,0 +1,57 @@
+"""Effects under benchmark and the synthetic footage they run on."""
+import numpy as np
+from moviepy import VideoClip
+
+from custom_fx import (
+    AutoFraming, ChromaKey, CloneGrid, Kaleidoscope, KaleidoscopeCube,
+    Matrix, QuadMirror, RGBSync, RotatingCube
+)
+
+RESOLUTIONS = {
+    "480p": (854, 480),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+# Effect factories; one fresh instance per run so no per-size caches are shared
+CASES = {
+    "quad_mirror": lambda: QuadMirror(),
+    "chroma_key": lambda: ChromaKey(color=(0, 255, 0), threshold=60, softness=30),
+    "rgb_sync": lambda: RGBSync(r_offset=(8, 0), b_offset=(-8, 0)),
+    "rgb_sync_temporal": lambda: RGBSync(r_offset=(8, 0), g_time_offset=0.1, b_time_offset=-0.1),
+    "kaleidoscope": lambda: Kaleidoscope(n_slices=6),
+    "kaleidoscope_bilinear": lambda: Kaleidoscope(n_slices=6, bilinear=True),
+    "matrix": lambda: Matrix(),
+    "auto_framing": lambda: AutoFraming(target_aspect_ratio=9 / 16, detect_every=5, detect_scale=0.5),
+    "clone_grid": lambda: CloneGrid(n_clones=16),
+    "rotating_cube": lambda: RotatingCube(),
+    "kaleidoscope_cube": lambda: KaleidoscopeCube(),
+}
+
+# Distinct frames cycled through by the synthetic clip
+SOURCE_FRAMES = 8
+
+def synthetic_clip(w, h, duration, fps=24, seed=0):
+    """
+    A clip cycling through a few precomputed frames: a moving color gradient
+    with noise and a green block, so keying and motion-dependent effects
+    have something to work on. Producing a frame costs no more than a lookup.
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:h, 0:w]
+    frames = []
+    for i in range(SOURCE_FRAMES):
+        shift = i * w // (4 * SOURCE_FRAMES)
+        frame = np.empty((h, w, 3), dtype=np.uint8)
+        frame[..., 0] = ((x + shift) * 255 // w)
+        frame[..., 1] = (y * 255 // h)
+        frame[..., 2] = 128
+        frame ^= rng.integers(0, 32, (h, w, 3), dtype=np.uint8)
+        x0 = w // 4 + shift
+        frame[h // 3: 2 * h // 3, x0: x0 + w // 4] = (0, 255, 0)
+        frames.append(frame)
+
+    def frame_function(t):
+        return frames[int(t * fps + 0.00001) % SOURCE_FRAMES]
+
+    return VideoClip(frame_function, duration=duration).with_fps(fps)
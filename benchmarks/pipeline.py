@@ -0,0 +1,242 @@
+"""
+End-to-end pipeline benchmark.
+
+Generates synthetic media with ffmpeg, replays sequences of MCP tool calls
+against the server module and renders the result, splitting the render time
+into decode, effect, composite and encode time plus the MCP round-trip
+overhead of the tool calls.
+
+Usage: python -m benchmarks.pipeline [--scenarios NAME_OR_JSON ...] [--output FILE]
+
+A scenario is a list of {"tool": name, "args": {...}} steps. String
+arguments "$N" are replaced by the result of step N (a clip ID), and
+"$video" / "$output" by the generated media and a temporary output path.
+write_videofile steps are rendered through the effect profiler instead of
+the tool, so the frames can be attributed; every other step calls the tool.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from .cases import RESOLUTIONS
+
+DEFAULT_DURATION = 4.0
+DEFAULT_FPS = 24
+# Tool calls timed to estimate the MCP round-trip overhead of one call
+MCP_PROBE_CALLS = 20
+
+# Operations whose own work is compositing other clips
+COMPOSITE_OPS = {"composite_video_clips", "tools_clips_array", "concatenate_video_clips"}
+# write_videofile arguments passed on to MoviePy's writer
+WRITE_OPTIONS = ("fps", "codec", "audio_codec", "bitrate", "preset", "threads", "ffmpeg_params")
+
+SCENARIOS = {
+    "effects_chain": [
+        {"tool": "video_file_clip", "args": {"filename": "$video"}},
+        {"tool": "subclip", "args": {"clip_id": "$0", "start_time": 0.5}},
+        {"tool": "vfx_kaleidoscope", "args": {"clip_id": "$1"}},
+        {"tool": "vfx_rgb_sync", "args": {"clip_id": "$2", "r_offset": [6, 0], "g_time_offset": 0.08}},
+        {"tool": "vfx_fade_in", "args": {"clip_id": "$3", "duration": 0.5}},
+        {"tool": "write_videofile", "args": {"clip_id": "$4", "filename": "$output"}},
+    ],
+    "picture_in_picture": [
+        {"tool": "video_file_clip", "args": {"filename": "$video"}},
+        {"tool": "video_file_clip", "args": {"filename": "$video", "audio": False}},
+        {"tool": "vfx_resize", "args": {"clip_id": "$1", "scale": 0.33}},
+        {"tool": "vfx_quad_mirror", "args": {"clip_id": "$2"}},
+        {"tool": "set_position", "args": {"clip_id": "$3", "pos_str": "center"}},
+        {"tool": "composite_video_clips", "args": {"clip_ids": ["$0", "$4"]}},
+        {"tool": "write_videofile", "args": {"clip_id": "$5", "filename": "$output"}},
+    ],
+    "montage": [
+        {"tool": "video_file_clip", "args": {"filename": "$video"}},
+        {"tool": "subclip", "args": {"clip_id": "$0", "start_time": 0, "end_time": 2}},
+        {"tool": "subclip", "args": {"clip_id": "$0", "start_time": 2}},
+        {"tool": "vfx_black_white", "args": {"clip_id": "$2"}},
+        {"tool": "concatenate_video_clips", "args": {"clip_ids": ["$1", "$3"]}},
+        {"tool": "vfx_matrix", "args": {"clip_id": "$4"}},
+        {"tool": "write_videofile", "args": {"clip_id": "$5", "filename": "$output"}},
+    ],
+}
+
+
+def generate_media(directory, resolution, duration=DEFAULT_DURATION, fps=DEFAULT_FPS):
+    """Encodes an H.264/AAC test pattern with a sine tone and returns its path."""
+    from moviepy.config import FFMPEG_BINARY
+
+    w, h = RESOLUTIONS[resolution]
+    path = os.path.join(directory, f"source_{resolution}.mp4")
+    subprocess.run([
+        FFMPEG_BINARY, "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={w}x{h}:rate={fps}:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path,
+    ], check=True)
+    return path
+
+
+def _resolve(value, results, variables):
+    if isinstance(value, list):
+        return [_resolve(v, results, variables) for v in value]
+    if isinstance(value, str) and value.startswith("$"):
+        name = value[1:]
+        return results[int(name)] if name.isdigit() else variables[name]
+    return value
+
+
+def _tool_fn(server, name):
+    tool = getattr(server, name)
+    return getattr(tool, "fn", tool)
+
+
+def measure_mcp_overhead(server, calls=MCP_PROBE_CALLS):
+    """
+    Milliseconds an MCP round trip adds to a tool call: a no-op tool called
+    through an in-memory FastMCP client, minus the same call made directly.
+    None if the client is not available.
+    """
+    try:
+        from fastmcp import Client
+    except ImportError:
+        return None
+
+    async def probe():
+        async with Client(server.mcp) as client:
+            await client.call_tool("list_jobs", {})
+            start = time.perf_counter()
+            for _ in range(calls):
+                await client.call_tool("list_jobs", {})
+            return (time.perf_counter() - start) / calls
+
+    round_trip = asyncio.run(probe())
+    list_jobs = _tool_fn(server, "list_jobs")
+    start = time.perf_counter()
+    for _ in range(calls):
+        list_jobs()
+    direct = (time.perf_counter() - start) / calls
+    return max(0.0, round_trip - direct) * 1000
+
+
+def profiled_write(node, filename, options):
+    """
+    Writes ``node`` like write_videofile does, from a fresh, uncached copy of
+    its graph, and splits the time by node category.
+    """
+    from profiler import EffectProfiler, fresh_copy
+    from render_graph import build_plan, iter_nodes, optimize
+
+    plan = optimize(fresh_copy(node))
+    nodes = {n.key: n for n in iter_nodes(plan)}
+    profiler = EffectProfiler({key: n.op for key, n in nodes.items()}, track_memory=False)
+    try:
+        clip = build_plan(plan, {}, profiler)
+        start = time.perf_counter()
+        clip.write_videofile(filename, logger=None, **options)
+        wall = time.perf_counter() - start
+    finally:
+        profiler.restore()
+
+    split = {"decode_ms": 0.0, "effect_ms": 0.0, "composite_ms": 0.0}
+    for row in profiler.report(1):
+        n = nodes[row["key"]]
+        category = "decode_ms" if n.is_source else "composite_ms" if n.op in COMPOSITE_OPS else "effect_ms"
+        split[category] += row["self_ms"]
+    frames_ms = sum(split.values())
+    # Muxing, audio and everything the writer does besides pulling frames
+    split["encode_ms"] = max(0.0, wall * 1000 - frames_ms)
+    return wall * 1000, split, profiler.report(1)
+
+
+def run_scenario(server, steps, variables, mcp_overhead_ms):
+    """Replays ``steps`` and returns the timing breakdown of the scenario."""
+    results = []
+    tools_ms = 0.0
+    render = {"decode_ms": 0.0, "effect_ms": 0.0, "composite_ms": 0.0, "encode_ms": 0.0}
+    render_ms = 0.0
+    nodes = []
+    try:
+        for step in steps:
+            args = {k: _resolve(v, results, variables) for k, v in step.get("args", {}).items()}
+            if step["tool"] == "write_videofile":
+                options = {k: v for k, v in args.items() if k in WRITE_OPTIONS and v is not None}
+                wall, split, nodes = profiled_write(server.get_node(args["clip_id"]), args["filename"], options)
+                render_ms += wall
+                for key, value in split.items():
+                    render[key] += value
+                results.append(args["filename"])
+                continue
+            start = time.perf_counter()
+            results.append(_tool_fn(server, step["tool"])(**args))
+            tools_ms += (time.perf_counter() - start) * 1000
+    finally:
+        for result in results:
+            if isinstance(result, str) and result in server.CLIPS:
+                _tool_fn(server, "delete_clip")(result)
+
+    breakdown = dict(render)
+    breakdown["tool_calls_ms"] = tools_ms
+    breakdown["mcp_overhead_ms"] = mcp_overhead_ms * len(steps) if mcp_overhead_ms is not None else None
+    total = render_ms + tools_ms + (breakdown["mcp_overhead_ms"] or 0.0)
+    return {"steps": len(steps), "total_ms": total, "render_ms": render_ms, "breakdown": breakdown, "nodes": nodes}
+
+
+def _load_scenarios(names):
+    scenarios = {}
+    for name in names:
+        if name in SCENARIOS:
+            scenarios[name] = SCENARIOS[name]
+        else:
+            with open(name) as f:
+                scenarios[os.path.splitext(os.path.basename(name))[0]] = json.load(f)
+    return scenarios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.pipeline", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS),
+                        help=f"Built-in scenarios ({', '.join(SCENARIOS)}) or paths to scenario JSON files.")
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=["480p", "1080p"])
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="Length of the generated media.")
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    import main as server
+
+    scenarios = _load_scenarios(args.scenarios)
+    mcp_overhead_ms = measure_mcp_overhead(server)
+    print(f"MCP round trip: {mcp_overhead_ms:.2f} ms per call" if mcp_overhead_ms is not None
+          else "MCP round trip: fastmcp client not available")
+
+    report = {"duration": args.duration, "fps": args.fps, "mcp_overhead_ms_per_call": mcp_overhead_ms, "results": []}
+    # Under /tmp so the server's path validation accepts it
+    workdir = tempfile.mkdtemp(prefix="mcp_moviepy_pipeline_", dir="/tmp")
+    try:
+        for resolution in args.resolutions:
+            video = generate_media(workdir, resolution, args.duration, args.fps)
+            for name, steps in scenarios.items():
+                variables = {"video": video, "output": os.path.join(workdir, f"{name}_{resolution}.mp4")}
+                result = run_scenario(server, steps, variables, mcp_overhead_ms)
+                result.update(scenario=name, resolution=resolution)
+                report["results"].append(result)
+                split = "  ".join(
+                    f"{key[:-3]} {value:8.1f}" for key, value in result["breakdown"].items() if value is not None
+                )
+                print(f"{name:<20} {resolution:>5}  total {result['total_ms']:8.1f} ms  {split}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+"""
+Runs the effect benchmarks and compares them against a baseline.
+
+Every (effect, resolution) case runs in its own worker process, so the
+reported peak RSS belongs to that case alone and caches built by one effect
+never speed up another.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_FRAMES = 30
+DEFAULT_FPS = 24
+# Relative slowdown (or memory growth) tolerated before a case counts as a regression
+DEFAULT_TOLERANCE = 0.15
+
+
+def _percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def run_case(effect, resolution, frames=DEFAULT_FRAMES, fps=DEFAULT_FPS):
+    """
+    Renders ``frames`` frames of ``effect`` on synthetic footage at ``resolution``.
+
+    The first frame is timed separately: it is where effects build their
+    lookup tables, atlases or (for AutoFraming) analyze the whole clip.
+    """
+    from .cases import CASES, RESOLUTIONS, synthetic_clip
+
+    w, h = RESOLUTIONS[resolution]
+    result = {"effect": effect, "resolution": resolution, "width": w, "height": h, "frames": frames}
+    try:
+        source = synthetic_clip(w, h, duration=(frames + 1) / fps, fps=fps)
+        clip = source.with_effects([CASES[effect]()])
+
+        def render(t):
+            frame = clip.get_frame(t)
+            if clip.mask is not None:
+                clip.mask.get_frame(t)
+            return frame
+
+        start = time.perf_counter()
+        render(0)
+        result["first_frame_ms"] = (time.perf_counter() - start) * 1000
+
+        latencies = []
+        for i in range(1, frames + 1):
+            start = time.perf_counter()
+            render(i / fps)
+            latencies.append(time.perf_counter() - start)
+
+        total = sum(latencies)
+        result["fps"] = frames / total if total else float("inf")
+        result["latency_ms"] = {
+            "mean": total / frames * 1000,
+            "p50": _percentile(latencies, 50) * 1000,
+            "p95": _percentile(latencies, 95) * 1000,
+            "p99": _percentile(latencies, 99) * 1000,
+            "max": max(latencies) * 1000,
+        }
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def run_all(effects, resolutions, frames=DEFAULT_FRAMES, log=None):
+    """Runs every case in a fresh process and returns the results in order."""
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for resolution in resolutions:
+        for effect in effects:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_case, effect, resolution, frames).result()
+            results.append(result)
+            if log:
+                log(_format_result(result))
+    return results
+
+
+def _format_result(result):
+    name = f"{result['effect']:<22} {result['resolution']:>5}"
+    if "error" in result:
+        return f"{name}  ERROR {result['error']}"
+    lat = result["latency_ms"]
+    return (
+        f"{name}  {result['fps']:8.2f} fps  p50 {lat['p50']:8.2f} ms  p95 {lat['p95']:8.2f} ms  "
+        f"first {result['first_frame_ms']:8.1f} ms  rss {result['peak_rss_mb'] or 0:7.0f} MB"
+    )
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns the regressions of ``results`` against ``baseline`` (both lists of
+    case results): lower fps, higher p95 latency or higher peak RSS beyond
+    ``tolerance``, and cases that ran before but now fail.
+    """
+    previous = {(r["effect"], r["resolution"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result["effect"], result["resolution"]))
+        if old is None or "error" in old:
+            continue
+        case = f"{result['effect']} @ {result['resolution']}"
+        if "error" in result:
+            regressions.append(f"{case}: now fails ({result['error']})")
+            continue
+        if result["fps"] < old["fps"] * (1 - tolerance):
+            regressions.append(f"{case}: {old['fps']:.2f} -> {result['fps']:.2f} fps")
+        if result["latency_ms"]["p95"] > old["latency_ms"]["p95"] * (1 + tolerance):
+            regressions.append(
+                f"{case}: p95 {old['latency_ms']['p95']:.2f} -> {result['latency_ms']['p95']:.2f} ms"
+            )
+        if old.get("peak_rss_mb") and result.get("peak_rss_mb") \
+                and result["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{case}: peak RSS {old['peak_rss_mb']:.0f} -> {result['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def _environment():
+    import cv2
+    import moviepy
+    import numpy as np
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "moviepy": moviepy.__version__,
+    }
+
+
+def main(argv=None):
+    from .cases import CASES, RESOLUTIONS
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--effects", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="Timed frames per case.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Results JSON of a previous run to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative change tolerated before a case counts as a regression.")
+    args = parser.parse_args(argv)
+
+    results = run_all(args.effects, args.resolutions, args.frames, log=print)
+    report = {"environment": _environment(), "frames": args.frames, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
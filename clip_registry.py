@@ -0,0 +1,260 @@
+"""
+Reference-counted registry behind CLIPS.
+
+Every derived clip records the IDs of the clips it was derived from, so:
+
+- deleting a clip that other registered clips still derive from only hides
+  its ID; its readers stay open until the last clip using it is deleted,
+- when the estimated memory or the number of open ffmpeg readers exceeds the
+  budget, the least recently used clips that nothing materialized depends on
+  are evicted: file sources close their readers (they are reopened from
+  their recipe on next use) and derived clips drop their built MoviePy
+  objects (rebuilt from the render graph). Their IDs stay valid.
+"""
+from numbers import Integral
+import os
+import subprocess
+import threading
+import time
+
+from render_graph import RenderNode, iter_nodes
+
+DEFAULT_MAX_BYTES = int(os.environ.get("MCP_MOVIEPY_CLIPS_MB", "2048")) * 1024 * 1024
+DEFAULT_MAX_READERS = int(os.environ.get("MCP_MOVIEPY_MAX_READERS", "32"))
+# Built derived clips used more recently than this are never dropped; a render may still be using them
+MIN_IDLE_SECONDS = 60.0
+
+
+def _nbytes(array):
+    n = getattr(array, "nbytes", 0)
+    return n if isinstance(n, Integral) else 0
+
+
+def _open_reader(reader):
+    return isinstance(getattr(reader, "proc", None), subprocess.Popen)
+
+
+def estimate_clip(clip):
+    """(estimated bytes, open ffmpeg readers) owned by a loaded clip."""
+    nbytes, readers = 0, 0
+    for owner in (clip, getattr(clip, "audio", None)):
+        reader = getattr(owner, "reader", None)
+        if _open_reader(reader):
+            readers += 1
+            # Last decoded frame of video readers, sample buffer of audio readers
+            nbytes += _nbytes(getattr(reader, "last_read", None)) + _nbytes(getattr(reader, "buffer", None))
+    for owner in (clip, getattr(clip, "mask", None)):
+        nbytes += _nbytes(getattr(owner, "img", None))
+    return nbytes, readers
+
+
+def _frame_bytes(clip):
+    w, h = getattr(clip, "w", None), getattr(clip, "h", None)
+    return w * h * 3 if isinstance(w, Integral) and isinstance(h, Integral) else 0
+
+
+class ClipRegistry(dict):
+    """
+    Mapping of clip ID to a loaded clip or a RenderNode, with reference and
+    usage bookkeeping.
+
+    Parameters:
+    -----------
+    max_bytes : int
+        Memory budget for loaded clips.
+    max_readers : int
+        Budget of open ffmpeg readers (file handles and processes).
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_readers=DEFAULT_MAX_READERS):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.max_readers = max_readers
+        self.min_idle = MIN_IDLE_SECONDS
+        # Loader (build, params) of clips that can be reopened from scratch
+        self.recipes = {}
+        self.parents = {}
+        self.children = {}
+        # Deleted clips kept because registered clips still derive from them
+        self.hidden = {}
+        self.last_used = {}
+        # usage() of entries not used since it was last computed
+        self._usage = {}
+        self.evictions = 0
+        self._lock = threading.RLock()
+
+    def add(self, clip_id, entry, parent_ids=()):
+        with self._lock:
+            self[clip_id] = entry
+            self.parents[clip_id] = tuple(parent_ids)
+            for parent_id in parent_ids:
+                self.children.setdefault(parent_id, set()).add(clip_id)
+                self.touch(parent_id)
+            self.touch(clip_id)
+
+    def touch(self, clip_id):
+        self.last_used[clip_id] = time.monotonic()
+        # Using a clip may load it or open readers
+        self._usage.pop(clip_id, None)
+
+    def refs(self, clip_id):
+        """Number of clips (registered or hidden) deriving directly from ``clip_id``."""
+        return len(self.children.get(clip_id, ()))
+
+    def delete(self, clip_id):
+        """
+        Removes ``clip_id``. Its resources are released now if no clip derives
+        from it, otherwise when the last one is deleted. Returns False when
+        they are kept alive.
+        """
+        with self._lock:
+            entry = self.pop(clip_id)
+            if self.refs(clip_id):
+                self.hidden[clip_id] = entry
+                return False
+            self._release(clip_id, entry)
+            return True
+
+    def _release(self, clip_id, entry):
+        try:
+            self._dispose(entry)
+        finally:
+            self.recipes.pop(clip_id, None)
+            self.last_used.pop(clip_id, None)
+            self._usage.pop(clip_id, None)
+            self.children.pop(clip_id, None)
+            for parent_id in self.parents.pop(clip_id, ()):
+                siblings = self.children.get(parent_id)
+                if siblings is not None:
+                    siblings.discard(clip_id)
+                if parent_id in self.hidden and not self.refs(parent_id):
+                    self._release(parent_id, self.hidden.pop(parent_id))
+
+    @staticmethod
+    def _dispose(entry):
+        if isinstance(entry, RenderNode) and not entry.is_source:
+            # Derived clips share their sources' readers; dropping the built clip is enough
+            entry.clip = None
+            return
+        entry.close()
+        if isinstance(entry, RenderNode):
+            entry.clip = None
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            for table in (self.recipes, self.parents, self.children, self.hidden, self.last_used, self._usage):
+                table.clear()
+
+    def _entries(self):
+        return list(self.items()) + list(self.hidden.items())
+
+    def usage(self, clip_id, entry):
+        """(estimated bytes, open readers) held by one entry itself."""
+        if isinstance(entry, RenderNode):
+            if entry.clip is None:
+                return 0, 0
+            if not entry.is_source:
+                # A built derived clip holds about a frame; its readers belong to its sources
+                return _frame_bytes(entry.clip), 0
+            entry = entry.clip
+        return estimate_clip(entry)
+
+    def readers_used(self, entry):
+        """Open readers of every source a clip renders from."""
+        if not isinstance(entry, RenderNode):
+            return estimate_clip(entry)[1]
+        return sum(estimate_clip(n.clip)[1] for n in iter_nodes(entry) if n.is_source and n.clip is not None)
+
+    def _cached_usage(self, clip_id, entry):
+        usage = self._usage.get(clip_id)
+        if usage is None:
+            usage = self._usage[clip_id] = self.usage(clip_id, entry)
+        return usage
+
+    def totals(self):
+        nbytes, readers = 0, 0
+        for clip_id, entry in self._entries():
+            b, r = self._cached_usage(clip_id, entry)
+            nbytes += b
+            readers += r
+        return nbytes, readers
+
+    def _in_use(self):
+        """Keys of nodes that built derived clips render from."""
+        keys = set()
+        for _, entry in self._entries():
+            if isinstance(entry, RenderNode) and not entry.is_source and entry.clip is not None:
+                keys.update(n.key for n in iter_nodes(entry))
+        return keys
+
+    def _evictable(self, clip_id, entry, in_use, now):
+        if isinstance(entry, RenderNode):
+            if entry.clip is None or entry.key in in_use:
+                return False
+            if entry.is_source:
+                return entry.build is not None
+            return now - self.last_used.get(clip_id, 0) >= self.min_idle
+        return clip_id in self.recipes
+
+    def enforce_budget(self):
+        """Evicts least recently used clips until the budget is met or nothing else can go."""
+        with self._lock:
+            while True:
+                nbytes, readers = self.totals()
+                if nbytes <= self.max_bytes and readers <= self.max_readers:
+                    return
+                in_use, now = self._in_use(), time.monotonic()
+                candidates = [
+                    (self.last_used.get(clip_id, 0), clip_id, entry) for clip_id, entry in self._entries()
+                    if self._cached_usage(clip_id, entry) != (0, 0) and self._evictable(clip_id, entry, in_use, now)
+                ]
+                if not candidates:
+                    return
+                _, clip_id, entry = min(candidates, key=lambda c: c[0])
+                self._evict(clip_id, entry)
+
+    def _evict(self, clip_id, entry):
+        if not isinstance(entry, RenderNode):
+            # Loaded clips become reloadable source nodes
+            build, params = self.recipes[clip_id]
+            node = RenderNode.source(entry, build, params)
+            if clip_id in self:
+                self[clip_id] = node
+            else:
+                self.hidden[clip_id] = node
+            entry = node
+        try:
+            self._dispose(entry)
+        except Exception:
+            entry.clip = None
+        self._usage.pop(clip_id, None)
+        self.evictions += 1
+
+    def describe(self, clip_id, entry):
+        """Listing of one clip for list_clips."""
+        if isinstance(entry, RenderNode):
+            kind = (str(type(entry.clip)) if entry.clip is not None else entry.op) if entry.is_source else repr(entry)
+            loaded = entry.clip is not None
+        else:
+            kind, loaded = str(type(entry)), True
+        nbytes, _ = self.usage(clip_id, entry)
+        return {
+            "type": kind,
+            "loaded": loaded,
+            "memory_mb": round(nbytes / 2**20, 2),
+            "open_readers": self.readers_used(entry),
+            "derived_clips": self.refs(clip_id),
+        }
+
+    def stats(self):
+        with self._lock:
+            nbytes, readers = self.totals()
+            return {
+                "clips": len(self),
+                "hidden": len(self.hidden),
+                "bytes": nbytes,
+                "max_bytes": self.max_bytes,
+                "open_readers": readers,
+                "max_readers": self.max_readers,
+                "evictions": self.evictions,
+            }
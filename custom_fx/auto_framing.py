@@ -1,93 +1,229 @@
 from moviepy import Effect
 import numpy as np
 import cv2
+import threading
+
+# Minimum number of optical-flow points needed to keep tracking a subject
+MIN_TRACK_POINTS = 4
 
 class AutoFraming(Effect):
     """
     Automatically crops and centers the frame on a detected face or a specified focus point.
     Ideal for converting horizontal video to vertical while keeping the subject in frame.
+
+    Works in two passes: the clip is analyzed once when the effect is applied,
+    producing a smoothed, time-indexed path of crop centres, and each rendered
+    frame only looks its crop up in that path.
     """
-    def __init__(self, target_aspect_ratio: float = 9/16, smoothing: float = 0.9, 
-                 focus_func=None):
+    def __init__(self, target_aspect_ratio: float = 9/16, smoothing: float = 0.9,
+                 focus_func=None, detect_every: int = 1, detect_scale: float = 1.0,
+                 analysis_fps: float = 10):
         """
         Args:
             target_aspect_ratio (float): The aspect ratio of the output (width/height).
             smoothing (float): Smoothing factor (0 to 1). Higher = smoother movement.
-            focus_func (callable): Optional function taking (frame, t) and returning (x, y) 
+            focus_func (callable): Optional function taking (frame, t) and returning (x, y)
                                  or None. If it returns None, face detection is used.
+            detect_every (int): Run face detection every N frames and follow the face with
+                                Lucas-Kanade optical flow in between. 1 detects on every frame.
+            detect_scale (float): Scale factor (0 to 1] applied to the frame before detection
+                                  and tracking, e.g. 0.5 works on a half-resolution image.
+            analysis_fps (float): Rate at which the clip is sampled to build the crop path.
         """
+        if detect_every < 1:
+            raise ValueError("detect_every must be at least 1.")
+        if not 0 < detect_scale <= 1:
+            raise ValueError("detect_scale must be in (0, 1].")
+        if analysis_fps <= 0:
+            raise ValueError("analysis_fps must be positive.")
         self.target_aspect_ratio = target_aspect_ratio
         self.smoothing = smoothing
         self.focus_func = focus_func
-        
-        # Load the face cascade
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        
-        # State for smoothing
-        self.current_x = None
-        self.current_y = None
+        self.detect_every = detect_every
+        self.detect_scale = detect_scale
+        self.analysis_fps = analysis_fps
+
+        # The face cascade is loaded on first detection
+        self._face_cascade = None
+
+        # Crop paths by render node key; effect copies share this dict
+        self._paths = {}
+        self._analysis_lock = threading.Lock()
+        self._reset_tracking()
+
+    @property
+    def face_cascade(self):
+        if self._face_cascade is None:
+            self._face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        return self._face_cascade
+
+    def _reset_tracking(self):
+        self._frame_index = 0
+        self._prev_gray = None
+        self._points = None
+        self._center = None
+
+    def __getstate__(self):
+        # cv2 classifiers can't be pickled (render workers rebuild the effect); it is reloaded lazily
+        state = self.__dict__.copy()
+        state["_face_cascade"] = None
+        del state["_analysis_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._analysis_lock = threading.Lock()
+
+    def _detect_face(self, gray):
+        """Returns the (x, y, w, h) box of the largest face in ``gray``, or None."""
+        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+        if len(faces) == 0:
+            return None
+        # Select the largest face as the main subject
+        return max(faces, key=lambda f: f[2] * f[3])
+
+    def _locate_subject(self, frame):
+        """
+        Returns the subject centre in frame pixels, or None if it is not found.
+        Detects every ``detect_every`` frames and tracks the face in between.
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        if self.detect_scale != 1:
+            gray = cv2.resize(gray, None, fx=self.detect_scale, fy=self.detect_scale, interpolation=cv2.INTER_AREA)
+
+        center = None
+        if self._frame_index % self.detect_every == 0:
+            face = self._detect_face(gray)
+            self._points = None
+            if face is not None:
+                fx, fy, fw, fh = face
+                center = np.array([fx + fw / 2, fy + fh / 2], dtype=np.float32)
+                if self.detect_every > 1:
+                    # Seed the tracker with corners inside the face box
+                    roi = np.zeros_like(gray)
+                    roi[fy:fy + fh, fx:fx + fw] = 255
+                    self._points = cv2.goodFeaturesToTrack(gray, 40, 0.01, 3, mask=roi)
+        elif self._points is not None:
+            points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, self._points, None)
+            tracked = status.ravel() == 1
+            if tracked.sum() >= MIN_TRACK_POINTS:
+                # The median motion of the face corners moves the centre
+                shift = np.median(points[tracked] - self._points[tracked], axis=0).ravel()
+                center = self._center + shift
+                self._points = points[tracked].reshape(-1, 1, 2)
+            else:
+                self._points = None
+
+        self._frame_index += 1
+        self._prev_gray = gray
+        self._center = center
+        if center is None:
+            return None
+        return center[0] / self.detect_scale, center[1] / self.detect_scale
+
+    def _find_target(self, frame, t):
+        """Subject position in ``frame`` from focus_func, then face detection/tracking. None if not found."""
+        # 1. Try custom focus function
+        if self.focus_func:
+            try:
+                res = self.focus_func(frame, t)
+                if res and len(res) == 2:
+                    return res
+            except Exception:
+                pass
+
+        # 2. Try face detection / tracking
+        return self._locate_subject(frame)
+
+    def analyze(self, clip):
+        """
+        Scans ``clip`` once at ``analysis_fps`` and returns the smoothed crop-centre path,
+        a float32 array of shape (n, 2). Clips built from the render graph are identified
+        by their node key, and their paths are shared by copies of the effect, so a clip
+        rendered again (or rebuilt in a worker) reuses them. Other clips are scanned on
+        every call.
+        """
+        node_key = getattr(getattr(clip, "frame_function", None), "frame_cache_key", None)
+        key = (node_key, self.analysis_fps)
+        with self._analysis_lock:
+            if node_key is not None and key in self._paths:
+                return self._paths[key]
+
+            w, h = clip.size
+            times = np.zeros(1)
+            if clip.duration:
+                times = np.arange(0, clip.duration, 1 / self.analysis_fps)
+            self._reset_tracking()
+
+            # Raw targets, falling back to the last known position (or the centre)
+            raw = np.empty((len(times), 2), dtype=np.float64)
+            last = (w / 2, h / 2)
+            for i, t in enumerate(times):
+                target = self._find_target(clip.get_frame(t), t)
+                if target is not None:
+                    last = target
+                raw[i] = last
+
+            # Zero-phase smoothing: the EMA is run forwards then backwards, so the
+            # camera doesn't lag behind the subject. smoothing is defined per frame
+            # of the clip, as it was for the per-frame filter.
+            alpha = self.smoothing
+            if clip.fps:
+                alpha = self.smoothing ** (clip.fps / self.analysis_fps)
+            path = _ema(_ema(raw, alpha)[::-1], alpha)[::-1].astype(np.float32)
+
+            # Tracking state is only needed during the scan; don't carry it into pickles
+            self._reset_tracking()
+            if node_key is not None:
+                self._paths[key] = path
+            return path
+
+    def _crop_box(self, w, h, center_x, center_y):
+        # Determine dimensions based on target aspect ratio
+        if w / h > self.target_aspect_ratio:
+            # Source is wider than target (e.g. 16:9 -> 9:16)
+            crop_h = h
+            crop_w = h * self.target_aspect_ratio
+        else:
+            # Source is taller than target (e.g. 4:3 -> 1:1)
+            crop_w = w
+            crop_h = w / self.target_aspect_ratio
+
+        # Initial bounds based on smoothed center
+        x1 = int(center_x - crop_w / 2)
+        y1 = int(center_y - crop_h / 2)
+
+        # Clamp bounds to ensure the crop box stays within the original frame
+        x1 = max(0, min(w - int(crop_w), x1))
+        y1 = max(0, min(h - int(crop_h), y1))
+        return x1, y1, x1 + int(crop_w), y1 + int(crop_h)
 
     def apply(self, clip):
+        # Analysis pass: runs once, before any frame is rendered
+        path = self.analyze(clip)
+        last = len(path) - 1
+
         def filter(get_frame, t):
             frame = get_frame(t)
             h, w = frame.shape[:2]
-            
-            target_x, target_y = None, None
-            
-            # 1. Try custom focus function
-            if self.focus_func:
-                try:
-                    res = self.focus_func(frame, t)
-                    if res and len(res) == 2:
-                        target_x, target_y = res
-                except Exception:
-                    pass
-            
-            # 2. Try face detection if no target yet
-            if target_x is None:
-                gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
-                faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
-                
-                if len(faces) > 0:
-                    # Select the largest face as the main subject
-                    fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
-                    target_x = fx + fw / 2
-                    target_y = fy + fh / 2
-                else:
-                    # Fallback to center or last known position
-                    target_x = self.current_x if self.current_x is not None else w / 2
-                    target_y = self.current_y if self.current_y is not None else h / 2
-
-            # 3. Apply Smoothing (Exponential Moving Average)
-            if self.current_x is None:
-                self.current_x = target_x
-                self.current_y = target_y
-            else:
-                self.current_x = self.current_x * self.smoothing + target_x * (1 - self.smoothing)
-                self.current_y = self.current_y * self.smoothing + target_y * (1 - self.smoothing)
-
-            # 4. Calculate Crop Box
-            # Determine dimensions based on target aspect ratio
-            if w / h > self.target_aspect_ratio:
-                # Source is wider than target (e.g. 16:9 -> 9:16)
-                crop_h = h
-                crop_w = h * self.target_aspect_ratio
-            else:
-                # Source is taller than target (e.g. 4:3 -> 1:1)
-                crop_w = w
-                crop_h = w / self.target_aspect_ratio
-
-            # Initial bounds based on smoothed center
-            x1 = int(self.current_x - crop_w / 2)
-            y1 = int(self.current_y - crop_h / 2)
-            
-            # Clamp bounds to ensure the crop box stays within the original frame
-            x1 = max(0, min(w - int(crop_w), x1))
-            y1 = max(0, min(h - int(crop_h), y1))
-            x2 = x1 + int(crop_w)
-            y2 = y1 + int(crop_h)
-
-            # Crop the frame
+
+            # Render pass: pure lookup (linear between analysis samples), so frames
+            # can be requested in any order or from several threads
+            pos = min(max(t * self.analysis_fps, 0), last)
+            i = int(pos)
+            j = min(i + 1, last)
+            center_x, center_y = path[i] + (path[j] - path[i]) * (pos - i)
+
+            x1, y1, x2, y2 = self._crop_box(w, h, center_x, center_y)
             return frame[y1:y2, x1:x2]
 
         return clip.transform(filter)
+
+def _ema(values, alpha):
+    """Exponential moving average along the first axis."""
+    out = np.empty_like(values)
+    acc = values[0]
+    for i, value in enumerate(values):
+        acc = acc * alpha + value * (1 - alpha)
+        out[i] = acc
+    return out
@@ -1,11 +1,16 @@
-from moviepy import Effect
+from moviepy import Effect, VideoClip
 import numpy as np
+import threading
 
 class ChromaKey(Effect):
     """
     An advanced Chroma Key effect that creates a mask for transparency
     based on the distance from a target color.
-    
+
+    The source frame is fetched once per t: the keyed clip and its mask share
+    a one-frame memo, which is what compositors hit when they read a layer's
+    colors and then its mask at the same time.
+
     Parameters:
     -----------
     color : tuple (R, G, B)
@@ -20,32 +25,51 @@ class ChromaKey(Effect):
         self.threshold = threshold
         self.softness = softness
 
-    def apply(self, clip):
-        def filter(image):
-            # Calculate Euclidean distance to target color
-            # Use float32 to avoid overflow during squaring
-            dist = np.sqrt(np.sum((image.astype('float32') - self.color)**2, axis=-1))
-            
-            # Create a smooth mask
-            # 0.0 is transparent, 1.0 is opaque
-            if self.softness > 0:
-                mask = np.clip((dist - self.threshold) / self.softness, 0, 1)
+    def compute_mask(self, image):
+        """Returns the key mask of ``image``: 0.0 is transparent, 1.0 is opaque."""
+        # Squared distance to the target color, accumulated channel by channel
+        # so only HxW float32 buffers are allocated (exact for 8-bit frames)
+        dist2 = None
+        for channel, target in enumerate(self.color):
+            diff = np.subtract(image[..., channel], target, dtype=np.float32)
+            np.multiply(diff, diff, out=diff)
+            if dist2 is None:
+                dist2 = diff
             else:
-                mask = (dist > self.threshold).astype('float32')
-            
-            # MoviePy masks are usually 2D arrays of floats [0, 1]
-            # If the clip already has a mask, we should combine them
-            if clip.mask is not None:
-                old_mask = clip.mask.get_frame(0) # Simplified for image_transform context
-                # Note: combining with existing mask is tricky in image_transform
-                # Usually better to set the mask explicitly
-                pass
-
-            return mask
-
-        # In MoviePy, we apply the mask to the clip
-        mask_clip = clip.image_transform(filter)
-        return clip.with_mask(mask_clip)
+                dist2 += diff
+
+        # Compare against squared thresholds instead of taking sqrt everywhere
+        low = self.threshold
+        high = self.threshold + max(self.softness, 0)
+        low2 = low * low if low > 0 else -1.0
+        high2 = high * high if high > 0 else -1.0
+
+        if self.softness <= 0:
+            return (dist2 > low2).astype('float32')
+
+        mask = (dist2 >= high2).astype('float32')
+        # Only pixels inside the soft edge need the actual distance
+        edge = (dist2 > low2) & (dist2 < high2)
+        mask[edge] = (np.sqrt(dist2[edge]) - self.threshold) / self.softness
+        return mask
+
+    def apply(self, clip):
+        lock = threading.Lock()
+        memo = {}
+
+        def keyed(t):
+            with lock:
+                if memo.get("t") != t:
+                    image = clip.get_frame(t)
+                    mask = self.compute_mask(image)
+                    if clip.mask is not None:
+                        # Keep the transparency the clip already had
+                        mask *= clip.mask.get_frame(t)
+                    memo.update(t=t, image=image, mask=mask)
+                return memo["image"], memo["mask"]
+
+        mask_clip = VideoClip(lambda t: keyed(t)[1], is_mask=True, duration=clip.duration)
+        return clip.with_updated_frame_function(lambda t: keyed(t)[0]).with_mask(mask_clip)
 
 # Usage Example:
 # clip = VideoFileClip("greenscreen.mp4")
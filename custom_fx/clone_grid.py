@@ -1,21 +1,53 @@
 from moviepy import Effect
 import numpy as np
 import cv2
+from functools import lru_cache
+
+def _bounds(length, parts):
+    """Edges splitting ``length`` pixels into ``parts`` cells whose sizes differ by at most one."""
+    return [i * length // parts for i in range(parts + 1)]
+
+@lru_cache(maxsize=64)
+def _grid_cells(w, h, row_counts):
+    """
+    Layout of the clones for rows of ``row_counts`` clones, grouped by the
+    number of clones in the row: [(tile size, [(row slice, [column slices]), ...]), ...].
+    All clones in a group are cut from one tile the size of its largest cell.
+    """
+    groups = {}
+    y_edges = _bounds(h, len(row_counts))
+    for r, count in enumerate(row_counts):
+        x_edges = _bounds(w, count)
+        columns = [slice(x_edges[c], x_edges[c + 1]) for c in range(count)]
+        groups.setdefault(count, []).append((slice(y_edges[r], y_edges[r + 1]), columns))
+    return [
+        ((max(c.stop - c.start for c in bands[0][1]), max(r.stop - r.start for r, _ in bands)), bands)
+        for bands in groups.values()
+    ]
 
 class CloneGrid(Effect):
     """
     Creates a grid of clones of the original clip.
     Supported number of clones: 2, 4, 8, 16, 32, 64.
     The effect automatically determines the best grid layout (rows x columns).
+    Other counts are laid out as rows of unequal length, e.g. 5 clones as a
+    row of 3 above a row of 2, each row spanning the full width.
+
+    Remainder pixels are spread over the cells so the grid covers the frame
+    exactly. The frame is downscaled once per distinct row length, clones
+    are slice-assigned into the output and repeated rows are copied whole.
     """
     def __init__(self, n_clones: int = 4):
         """
         Args:
-            n_clones (int): Number of clones in the grid. 
+            n_clones (int): Number of clones in the grid.
                            Recommended values: 2, 4, 8, 16, 32, 64.
         """
         self.n_clones = n_clones
         self.rows, self.cols = self._calculate_grid(n_clones)
+        # Clones per row, longest rows first
+        base, extra = divmod(n_clones, self.rows)
+        self.row_counts = tuple(base + (1 if r < extra else 0) for r in range(self.rows))
 
     def _calculate_grid(self, n):
         # Specific mappings for the requested powers of 2
@@ -37,28 +69,21 @@ class CloneGrid(Effect):
         def filter(get_frame, t):
             frame = get_frame(t)
             h, w = frame.shape[:2]
-            
-            # Target size for each clone
-            # We want the final composite to be the same size as the original
-            # so each clone must be resized to (w/cols, h/rows)
-            target_w = w // self.cols
-            target_h = h // self.rows
-            
-            # Handle potential rounding issues by adjusting the last clones or 
-            # just resizing to exact division and letting the grid fit.
-            # Best approach: resize one clone and tile it.
-            small_frame = cv2.resize(frame, (target_w, target_h), interpolation=cv2.INTER_AREA)
-            
-            # Tile the small frame
-            # np.tile on (H, W, 3) with (R, C, 1) repeats
-            grid = np.tile(small_frame, (self.rows, self.cols, 1))
-            
-            # If rounding caused the grid to be slightly smaller than the original,
-            # we might want to pad or resize back. But usually w//cols * cols is close enough.
-            # To be safe and maintain original dimensions:
-            if grid.shape[0] != h or grid.shape[1] != w:
-                grid = cv2.resize(grid, (w, h), interpolation=cv2.INTER_NEAREST)
-                
+
+            grid = np.empty_like(frame)
+            for (tile_w, tile_h), bands in _grid_cells(w, h, self.row_counts):
+                tile = cv2.resize(frame, (tile_w, tile_h), interpolation=cv2.INTER_AREA)
+                drawn = {}
+                for rows, columns in bands:
+                    height = rows.stop - rows.start
+                    if height in drawn:
+                        # Same clones at the same height: copy the whole row band
+                        grid[rows] = grid[drawn[height]]
+                        continue
+                    for cols in columns:
+                        grid[rows, cols] = tile[:height, :cols.stop - cols.start]
+                    drawn[height] = rows
+
             return grid
 
         return clip.transform(filter)
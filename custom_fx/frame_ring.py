@@ -0,0 +1,116 @@
+from moviepy import Effect
+from collections import OrderedDict
+import math
+import os
+import threading
+
+DEFAULT_MAX_BYTES = int(os.environ.get("MCP_MOVIEPY_FRAME_RING_MB", "256")) * 1024 * 1024
+# Largest step past the newest frame that still counts as sequential playback (one frame, plus rounding jitter)
+SEQUENTIAL_GAP = 2
+
+class FrameRing:
+    """
+    A small buffer of decoded frames for effects that read a clip at several
+    nearby times, keyed by quantized timestamp.
+
+    With an ``fps``, timestamps are snapped to frame indices the way MoviePy's
+    file reader does (``int(fps * t + 1e-5)``) and frames are always fetched at
+    the start of their frame, so a frame's content never depends on which
+    request decoded it. A miss one frame past the newest buffered frame (give or
+    take rounding) also reads a frame skipped in between, so playback at the
+    clip's rate reads the source forwards in order. Larger steps, such as a
+    render below the clip's frame rate, read only the requested frame.
+    Without an ``fps``, timestamps are only rounded to the microsecond.
+
+    Parameters:
+    -----------
+    fps : float
+        Frame rate of the buffered clip, or None to key by exact time.
+    capacity : int
+        Maximum number of frames kept.
+    max_bytes : int
+        Memory cap; the least recently used frames are dropped past it.
+    """
+    def __init__(self, fps=None, capacity=8, max_bytes=DEFAULT_MAX_BYTES):
+        self.fps = fps
+        self.capacity = max(1, int(capacity))
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self._newest = None
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, t):
+        if self.fps:
+            return int(self.fps * t + 0.00001)
+        return round(float(t), 6)
+
+    def _time(self, key):
+        return key / self.fps if self.fps else key
+
+    def get(self, get_frame, t):
+        """Returns the frame at ``t``, reading it (and a frame skipped over) with ``get_frame`` on a miss."""
+        key = self.key(t)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return frame
+            self.misses += 1
+
+            start = key
+            if self.fps and self._newest is not None and self._newest < key <= self._newest + SEQUENTIAL_GAP:
+                start = self._newest + 1
+            for k in range(start, key + 1) if self.fps else (key,):
+                frame = get_frame(self._time(k))
+                self._put(k, frame)
+            return frame
+
+    def _put(self, key, frame):
+        self._frames[key] = frame
+        self.bytes += getattr(frame, "nbytes", 0)
+        if self._newest is None or key > self._newest:
+            self._newest = key
+        while len(self._frames) > 1 and (len(self._frames) > self.capacity or self.bytes > self.max_bytes):
+            _, evicted = self._frames.popitem(last=False)
+            self.bytes -= getattr(evicted, "nbytes", 0)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._newest = None
+            self.bytes = 0
+
+    @classmethod
+    def for_span(cls, fps, span, max_bytes=DEFAULT_MAX_BYTES):
+        """A ring large enough to hold every frame within ``span`` seconds of each other."""
+        capacity = math.ceil(span * fps) + 2 if fps else 8
+        return cls(fps, capacity, max_bytes)
+
+class FrameBuffer(Effect):
+    """
+    Routes a clip's frames through a FrameRing so temporal effects applied
+    after it (SuperSample, MakeLoopable, ...) read each source frame once and
+    in order.
+
+    Frame times are snapped to the clip's frame grid, which is exact for
+    video files but removes sub-frame sampling from generated clips.
+
+    Parameters:
+    -----------
+    n_frames : int
+        Number of frames the ring keeps.
+    max_bytes : int
+        Memory cap of the ring.
+    """
+    def __init__(self, n_frames=8, max_bytes=DEFAULT_MAX_BYTES):
+        self.n_frames = n_frames
+        self.max_bytes = max_bytes
+
+    def apply(self, clip):
+        ring = FrameRing(getattr(clip, "fps", None), self.n_frames, self.max_bytes)
+        get_frame = clip.get_frame
+        return clip.with_updated_frame_function(lambda t: ring.get(get_frame, t))
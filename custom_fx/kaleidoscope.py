@@ -1,66 +1,75 @@
 from moviepy import Effect
 import numpy as np
+import cv2
+from functools import lru_cache
+
+def _polar_source_coords(w, h, n_slices, x_center, y_center, bilinear):
+    """Source (x, y) position of every output pixel; clipped integers unless ``bilinear``."""
+    # Create a grid of coordinates relative to the center
+    y_rel, x_rel = np.indices((h, w))
+    y_rel = y_rel - y_center
+    x_rel = x_rel - x_center
+
+    # Polar coordinates, theta normalized to [0, 2*pi)
+    r = np.sqrt(x_rel**2 + y_rel**2)
+    theta = np.arctan2(y_rel, x_rel) % (2 * np.pi)
+
+    # Map theta into the first slice, mirroring every other slice for seamless edges
+    slice_angle = 2 * np.pi / n_slices
+    slice_idx = theta // slice_angle
+    theta_in_slice = theta % slice_angle
+    mirrored = (slice_idx % 2 == 1)
+    theta_in_slice[mirrored] = slice_angle - theta_in_slice[mirrored]
+
+    # Convert back to Cartesian: positions inside the source wedge
+    src_x = r * np.cos(theta_in_slice) + x_center
+    src_y = r * np.sin(theta_in_slice) + y_center
+
+    if bilinear:
+        return src_x, src_y
+    return np.clip(src_x.astype(int), 0, w - 1), np.clip(src_y.astype(int), 0, h - 1)
+
+@lru_cache(maxsize=16)
+def _get_remap_tables(w, h, n_slices, x_center, y_center, bilinear):
+    """
+    Source-coordinate maps for cv2.remap, built once per geometry.
+
+    Nearest mode stores exact integer coordinates as a single int16 (x, y) map.
+    Bilinear mode stores OpenCV's fixed-point maps (int16 coordinates plus
+    uint16 interpolation weights), a third of the size of two float32 maps.
+    """
+    src_x, src_y = _polar_source_coords(w, h, n_slices, x_center, y_center, bilinear)
+    if bilinear:
+        return cv2.convertMaps(src_x.astype(np.float32), src_y.astype(np.float32), cv2.CV_16SC2)
+    return np.dstack((src_x, src_y)).astype(np.int16), None
 
 class Kaleidoscope(Effect):
     """
-    A custom effect that creates a kaleidoscope symmetry by taking a wedge 
+    A custom effect that creates a kaleidoscope symmetry by taking a wedge
     of the image and mirroring/rotating it radially.
     """
-    def __init__(self, n_slices: int = 6, x: int = None, y: int = None):
+    def __init__(self, n_slices: int = 6, x: int = None, y: int = None, bilinear: bool = False):
         """
         :param n_slices: Number of radial slices. Usually an even number works best for mirroring.
         :param x: Horizontal center of the kaleidoscope. Defaults to clip center.
         :param y: Vertical center of the kaleidoscope. Defaults to clip center.
+        :param bilinear: Interpolate between source pixels instead of taking the nearest one.
         """
         self.n_slices = n_slices
         self.x = x
         self.y = y
+        self.bilinear = bilinear
 
     def apply(self, clip):
         def filter(get_frame, t):
             frame = get_frame(t)
             h, w = frame.shape[:2]
-            
+
             x_center = self.x if self.x is not None else w // 2
             y_center = self.y if self.y is not None else h // 2
-            
-            # Create a grid of coordinates
-            y_coords, x_coords = np.indices((h, w))
-            
-            # Relative to center
-            y_rel = y_coords - y_center
-            x_rel = x_coords - x_center
-            
-            # Polar coordinates
-            r = np.sqrt(x_rel**2 + y_rel**2)
-            theta = np.arctan2(y_rel, x_rel)
-            
-            # Normalize theta to [0, 2*pi)
-            theta = theta % (2 * np.pi)
-            
-            # Map theta to the kaleidoscope slices
-            slice_angle = 2 * np.pi / self.n_slices
-            
-            # Find which slice we are in
-            slice_idx = theta // slice_angle
-            
-            # Normalize theta to [0, slice_angle)
-            theta_in_slice = theta % slice_angle
-            
-            # Mirror every other slice for seamless edges
-            mask = (slice_idx % 2 == 1)
-            theta_in_slice[mask] = slice_angle - theta_in_slice[mask]
-            
-            # Convert back to Cartesian for source sampling
-            # Using the first slice [0, slice_angle] as the source wedge
-            ix = (r * np.cos(theta_in_slice) + x_center).astype(int)
-            iy = (r * np.sin(theta_in_slice) + y_center).astype(int)
-            
-            # Clip indices to be within frame bounds
-            ix = np.clip(ix, 0, w - 1)
-            iy = np.clip(iy, 0, h - 1)
-            
-            # Sample input frame at calculated source indices
-            return frame[iy, ix]
+
+            map1, map2 = _get_remap_tables(w, h, self.n_slices, x_center, y_center, self.bilinear)
+            interpolation = cv2.INTER_LINEAR if self.bilinear else cv2.INTER_NEAREST
+            return cv2.remap(frame, map1, map2, interpolation, borderMode=cv2.BORDER_REPLICATE)
 
         return clip.transform(filter)
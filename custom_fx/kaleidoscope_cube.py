@@ -1,12 +1,54 @@
 from moviepy import Effect
-from .kaleidoscope import Kaleidoscope
+import numpy as np
+import cv2
+from functools import lru_cache
+from .kaleidoscope import Kaleidoscope, _polar_source_coords
 from .rotating_cube import RotatingCube
+from .quad_mirror import _get_mirror_indices
+
+# Neighbouring texels whose source coordinates are further apart than this lie on a seam
+SEAM_JUMP = 1.5
+
+@lru_cache(maxsize=8)
+def _get_texture_map(w, h, n_slices, x_center, y_center, bilinear, mirror):
+    """
+    Source pixel of the raw frame for every texel of the cube face texture:
+    the kaleidoscope mapping, followed by the quad mirror when enabled.
+    Stored as a float32 (x, y) map so it can itself be warped onto the faces,
+    with a uint8 mask of the texels next to a seam (where the coordinates of
+    neighbouring texels jump, e.g. between the first and last slice for an
+    odd ``n_slices``), where interpolating coordinates is meaningless. The
+    mask is None when the mapping is continuous.
+    """
+    src_x, src_y = _polar_source_coords(w, h, n_slices, x_center, y_center, bilinear)
+    texture = np.dstack((src_x, src_y)).astype(np.float32)
+    if mirror:
+        idx_x, idx_y = _get_mirror_indices(w, h)
+        texture = texture[idx_y][:, idx_x]
+
+    jump_x = np.abs(np.diff(texture, axis=1)).max(axis=-1) > SEAM_JUMP
+    jump_y = np.abs(np.diff(texture, axis=0)).max(axis=-1) > SEAM_JUMP
+    seams = np.zeros((h, w), dtype=bool)
+    seams[:, :-1] |= jump_x
+    seams[:, 1:] |= jump_x
+    seams[:-1] |= jump_y
+    seams[1:] |= jump_y
+    return np.ascontiguousarray(texture), seams.astype(np.uint8) * 255 if seams.any() else None
 
 class KaleidoscopeCube(Effect):
     """
     A custom effect that combines Kaleidoscope and RotatingCube.
     It first applies a kaleidoscope effect and then maps the result
     onto a rotating 3D cube.
+
+    Both effects are fused into a single sampling pass: the kaleidoscope and
+    quad mirror lookups are composed into one cached texture map, each visible
+    face warps that map (not pixels) into its bounding box, and the raw frame
+    is sampled once through the result. No intermediate frame is allocated.
+
+    The map is warped bilinearly, like the cube's own warp, except next to
+    kaleidoscope and mirror seams, where the nearest texel is used instead
+    of blending coordinates from different slices.
     """
     def __init__(self, kaleidoscope_params=None, cube_params=None):
         """
@@ -15,17 +57,42 @@ class KaleidoscopeCube(Effect):
         """
         self.kaleidoscope_params = kaleidoscope_params if kaleidoscope_params is not None else {}
         self.cube_params = cube_params if cube_params is not None else {}
-        
+
         # Instantiate the individual effects
         self.kaleidoscope_effect = Kaleidoscope(**self.kaleidoscope_params)
         self.cube_effect = RotatingCube(**self.cube_params)
 
     def apply(self, clip):
         """
-        Applies the chained effects.
+        Applies the fused effect.
         """
-        # Chain the transformations: first kaleidoscope, then rotating cube
-        kaleidoscope_clip = self.kaleidoscope_effect.apply(clip)
-        final_clip = self.cube_effect.apply(kaleidoscope_clip)
-        
-        return final_clip
+        kaleidoscope = self.kaleidoscope_effect
+        cube = self.cube_effect
+
+        def filter(get_frame, t):
+            frame = get_frame(t)
+            h, w = frame.shape[:2]
+
+            x_center = kaleidoscope.x if kaleidoscope.x is not None else w // 2
+            y_center = kaleidoscope.y if kaleidoscope.y is not None else h // 2
+            texture, seams = _get_texture_map(
+                w, h, kaleidoscope.n_slices, x_center, y_center, kaleidoscope.bilinear, cube.mirror
+            )
+
+            def warp(M, size):
+                coords = cv2.warpPerspective(
+                    texture, M, size, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE
+                )
+                # Pixels whose bilinear footprint touches a seam snap to the nearest texel
+                ys, xs = np.nonzero(cv2.warpPerspective(seams, M, size)) if seams is not None else ((), ())
+                if len(xs):
+                    pts = np.dstack((xs, ys)).astype(np.float32)
+                    texel = cv2.perspectiveTransform(pts, np.linalg.inv(M))[0]
+                    u = np.clip(np.rint(texel[:, 0]).astype(np.intp), 0, w - 1)
+                    v = np.clip(np.rint(texel[:, 1]).astype(np.intp), 0, h - 1)
+                    coords[ys, xs] = texture[v, u]
+                return cv2.remap(frame, coords, None, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+            return cube._render(frame, t, warp)
+
+        return clip.transform(filter)
@@ -1,6 +1,7 @@
 from moviepy import Effect
 import numpy as np
 import cv2
+import threading
 from PIL import Image, ImageDraw, ImageFont
 
 class Matrix(Effect):
@@ -21,8 +22,17 @@ class Matrix(Effect):
         Size of the characters.
     seed : int
         Seed for the random number generator.
+    brightness_levels : int
+        If set, glyphs are prebaked in RGB at this many brightness levels
+        (2 to 359; 359 is exact) so frames are drawn by copying glyphs, with
+        no multiply or LUT pass. Memory grows linearly with the level count,
+        see ``atlas_nbytes``.
     """
-    def __init__(self, speed=150, density=0.2, chars="0123456789ABCDEF", color="green", font_size=16, seed=42):
+    # Fixed-point brightness of a drop's head (1.4 x 256)
+    MAX_BRIGHTNESS = 358
+
+    def __init__(self, speed=150, density=0.2, chars="0123456789ABCDEF", color="green", font_size=16, seed=42,
+                 brightness_levels=None):
         self.seed = seed
         self.speed = speed
         self.density = density
@@ -30,7 +40,10 @@ class Matrix(Effect):
         self.color_name = color.lower()
         self.font_size = font_size
         self.seed = seed
-        
+        if brightness_levels is not None and not 2 <= brightness_levels <= self.MAX_BRIGHTNESS + 1:
+            raise ValueError(f"brightness_levels must be between 2 and {self.MAX_BRIGHTNESS + 1}.")
+        self.brightness_levels = brightness_levels
+
         # Color mapping
         colors = {
             "red": (255, 0, 0),
@@ -50,9 +63,15 @@ class Matrix(Effect):
 
         # Internal state
         self._atlas = None
+        self._rgb_atlas = None
         self.char_w = 0
         self.char_h = 0
 
+    @property
+    def atlas_nbytes(self):
+        """Memory used by the glyph atlases, in bytes."""
+        return sum(a.nbytes for a in (self._atlas, self._rgb_atlas) if a is not None)
+
     def _init_atlas(self):
         """Pre-renders the character set into a font atlas for fast blitting."""
         try:
@@ -74,146 +93,161 @@ class Matrix(Effect):
             draw.text((0, 0), char, font=font, fill=255)
             self._atlas[i] = np.array(img)
 
+        if self.brightness_levels:
+            # (levels, n_chars, char_h, char_w, 3): each glyph already scaled and colored
+            values = self.level_values().astype(np.uint16)
+            scaled = (self._atlas[None].astype(np.uint16) * values[:, None, None, None]) >> 8
+            self._rgb_atlas = self.color_lut[scaled]
+
+    def level_values(self):
+        """Fixed-point brightness of each prebaked level."""
+        levels = np.arange(self.brightness_levels)
+        return (levels * self.MAX_BRIGHTNESS + (self.brightness_levels - 1) // 2) // (self.brightness_levels - 1)
+
+    def quantize(self, brightness):
+        """Maps fixed-point brightness values to the nearest prebaked level index."""
+        steps = self.brightness_levels - 1
+        return (brightness.astype(np.int32) * steps + self.MAX_BRIGHTNESS // 2) // self.MAX_BRIGHTNESS
+
     def apply(self, clip):
         if self._atlas is None:
             self._init_atlas()
-            
-        h, w = clip.h, clip.w
-        rows = h // self.char_h + 1
-        cols = w // self.char_w + 1
-        
+
+        engine = _RainEngine(self, clip.w, clip.h)
+
+        def filter(get_frame, t):
+            return engine.render(get_frame(t), t)
+
+        return clip.transform(filter)
+
+class _RainEngine:
+    """
+    Per-clip rain renderer. Column parameters are drawn once from the seeded
+    generator; the glyph and rain layer buffers are allocated once and reused
+    for every frame.
+
+    Frames with few lit cells (the common case: most columns are inactive or
+    outside their trail) take a sparse path that only gathers, scales and
+    writes the glyphs of lit cells, so their cost follows the number of
+    visible glyphs instead of the frame area.
+    """
+    # Brightness is fixed point (x256); the head of a drop is 1.4 -> 358
+    SCALE = 256
+    HEAD = Matrix.MAX_BRIGHTNESS
+    # Above this fraction of lit cells the dense path is cheaper
+    SPARSE_MAX_FRACTION = 0.5
+
+    def __init__(self, effect, w, h):
+        self.effect = effect
+        self.w, self.h = w, h
+        self.char_h, self.char_w = effect.char_h, effect.char_w
+        self.rows = h // self.char_h + 1
+        self.cols = w // self.char_w + 1
+        self.trail_len = max(1, h // 2)
+
         # Pre-generate column offsets and speeds for consistency
-        rng = np.random.default_rng(self.seed)
-        col_offsets = rng.random(cols) * h * 2
-        col_speeds = self.speed * (0.8 + 0.4 * rng.random(cols))
-        col_active_int = (rng.random(cols) < self.density).astype(np.int16)
-        
+        rng = np.random.default_rng(effect.seed)
+        self.col_offsets = rng.random(self.cols) * h * 2
+        self.col_speeds = effect.speed * (0.8 + 0.4 * rng.random(self.cols))
+        self.col_active = rng.random(self.cols) < effect.density
+
         # Static grid for character randomization
-        base_char_grid = rng.integers(0, len(self.chars), size=(rows, cols))
+        self.base_char_grid = rng.integers(0, len(effect.chars), size=(self.rows, self.cols))
+        self.row_y = np.arange(self.rows, dtype=np.int32) * self.char_h
 
-        def filter(get_frame, t):
-            frame = get_frame(t)
-            
-            # 1. Calculate the Brightness Grid (Vectorized)
-            # Time-based position of the 'lead' for each column
-            trail_len = h // 2
-            # Use integer arithmetic for lead_y
-            lead_y_int = ((col_speeds * t + col_offsets) % (h + trail_len)).astype(np.int32)
-            trail_len = max(1, h // 2)
-            lead_y = (col_speeds * t + col_offsets) % (h + trail_len)
-            lead_y_int = lead_y.astype(np.int32)
-            
-            # Create a Y-coordinate grid for the rows
-            row_y = np.arange(rows, dtype=np.int32) * self.char_h
-            row_y = (np.arange(rows) * self.char_h).astype(np.int32)
-            
-            # Calculate distance from each cell to its column's lead position
-            # Shape: (rows, cols)
-            dist = lead_y_int[None, :] - row_y[:, None]
-            
-            # Brightness decreases as we move away from the lead (upward)
-            # Fixed-point arithmetic (x256)
-            SCALE = 256
-
-            # Initialize brightness mask with 0
-            brightness_int = np.zeros((rows, cols), dtype=np.int16)
-
-            # Trail mask: 0 <= dist < trail_len
-            mask_trail = (dist >= 0) & (dist < trail_len)
-
-            # Calculate brightness for trail
-            if np.any(mask_trail):
-                # brightness = 1.0 - (dist / trail_len)
-                # brightness * SCALE = SCALE - (dist * SCALE // trail_len)
-                val = SCALE - (dist[mask_trail] * SCALE // trail_len)
-                brightness_int[mask_trail] = val.astype(np.int16)
-            
-            # Head highlight: 0 <= dist < char_h
-            # Equivalent to 1.4 * SCALE = 358
-            mask_head = (dist >= 0) & (dist < self.char_h)
-            if np.any(mask_head):
-                brightness_int[mask_head] = 358
-            
-            # Apply column activity mask
-            brightness_int *= col_active_int[None, :]
+        # Reused buffers; the lock keeps concurrent get_frame calls from sharing them mid-frame
+        self._lock = threading.Lock()
+        if effect._rgb_atlas is not None:
+            # Prebaked path gathers colored glyphs; flattened to index by level * n_chars + char
+            self._rgb_atlas = effect._rgb_atlas.reshape(-1, self.char_h, self.char_w, 3)
+            self._glyphs = np.empty((self.rows, self.cols, self.char_h, self.char_w, 3), dtype=np.uint8)
+        else:
+            self._rgb_atlas = None
+            self._glyphs = np.empty((self.rows, self.cols, self.char_h, self.char_w), dtype=np.uint8)
+        # Layers are laid out as (rows, char_h, cols, char_w) so they reshape to (H, W) for free
+        self._layer = np.empty((self.rows, self.char_h, self.cols, self.char_w), dtype=np.uint16)
+        self._rgb_cells = np.zeros((self.rows, self.char_h, self.cols, self.char_w, 3), dtype=np.uint8)
+        self._rain_rgb = self._rgb_cells.reshape(self.rows * self.char_h, self.cols * self.char_w, 3)[:h, :w]
+        # Cells drawn into _rgb_cells by the previous frame (row indices, column indices)
+        self._lit = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp))
 
-            # Calculate brightness map using integer arithmetic (0-256 scale)
-            # Initialize with 0
-            brightness_int = np.zeros((rows, cols), dtype=np.uint16)
-            
-            if trail_len > 0:
-                # Body: brightness decreases linearly from head
-                body_mask = (dist >= 0) & (dist < trail_len)
-                # Formula: 256 * (trail_len - dist) / trail_len
-                # We use integer division.
-                # Note: trail_len - dist is positive in this range.
-                brightness_int[body_mask] = ((trail_len - dist[body_mask]) * 256) // trail_len
-            
-            # Highlight the head of the drop (override body)
-            # 1.4 * 256 = 358.4 -> 358
-            head_mask = (dist >= 0) & (dist < self.char_h)
-            brightness_int[head_mask] = 358
-            
-            # Apply column activity mask
-            # col_active is float 0.0 or 1.0. Convert to bool/int mask.
-            col_mask = (col_active > 0.5)
-            brightness_int *= col_mask[None, :].astype(np.uint16)
-            # Use integer arithmetic for distance
-            lead_y_int = lead_y.astype(np.int32)
-            dist = lead_y_int[None, :] - row_y[:, None]
-            
-            # Brightness decreases as we move away from the lead (upward)
-            # brightness_val = 256 - (dist * 256) // trail_len
-            brightness_val = 256 - ((dist << 8) // trail_len)
+    def brightness(self, t):
+        """Fixed-point brightness of every cell, shape (rows, cols), uint16."""
+        # Time-based position of the 'lead' for each column
+        lead_y = ((self.col_speeds * t + self.col_offsets) % (self.h + self.trail_len)).astype(np.int32)
 
-            # Apply bounds (0 to trail_len)
-            mask_body = (dist >= 0) & (dist < trail_len)
-            brightness_int = np.where(mask_body, brightness_val, 0)
-            
-            # Highlight the head of the drop (brightness 1.4 -> 358)
-            mask_head = (dist >= 0) & (dist < self.char_h)
-            brightness_int = np.where(mask_head, 358, brightness_int)
-            
-            # Apply column activity mask
-            brightness_int = (brightness_int * col_active.astype(np.int32)[None, :]).astype(np.uint16)
-            
-            # 2. Randomize characters periodically
-            # Characters change slightly over time to simulate shifting data
-            char_tick = int(t * 12)
-            char_indices = (base_char_grid + char_tick) % len(self.chars)
-            
-            # 3. Assemble the Rain Layer (Vectorized Blitting)
-            # Pick character bitmaps from atlas: (rows, cols, char_h, char_w)
-            char_slices = self._atlas[char_indices]
-            
-            # Apply brightness: (rows, cols, char_h, char_w)
-            # Use fixed-point arithmetic (x256) for brightness application
-            rain_mask = (char_slices.astype(np.uint16) * brightness_int[:, :, None, None]) >> 8
-            
-            # Reshape/Transpose to form the full rain image
-            # (rows, cols, char_h, char_w) -> (rows, char_h, cols, char_w) -> (H, W)
-            rain_layer = rain_mask.transpose(0, 2, 1, 3).reshape(rows * self.char_h, cols * self.char_w)
-            
-            # Crop to frame size
-            rain_layer = rain_layer[:h, :w]
-            
-            # 4. Coloring and Compositing
-            # Convert to RGB and apply color using precomputed LUT (fast)
-            rain_rgb = self.color_lut[rain_layer]
-            # Convert to RGB and apply color
-            # Use uint8 multiplication (modulo 256) to avoid uint32 overhead
-            rain_rgb = (rain_layer.astype(np.uint8)[:, :, None] * self.rgb).astype(np.uint8)
-            product = rain_layer[:, :, None].astype(np.uint32) * self.rgb
-            rain_rgb = np.minimum(product >> 8, 255).astype(np.uint8)
-            
-            # Composite with original frame
-            # We use an additive blend but slightly dim the background for visibility
-            # Use cv2 for optimized processing
-            dimmed_bg = cv2.convertScaleAbs(frame, alpha=0.8)
-            
-            # Additive blend with saturation
-            out = cv2.add(dimmed_bg, rain_rgb)
-            
-            return out
+        # Distance from each cell to its column's lead position (positive = above the lead)
+        dist = lead_y[None, :] - self.row_y[:, None]
 
-        return clip.transform(filter)
+        # Brightness decreases linearly away from the lead, over trail_len pixels
+        lit = (dist >= 0) & self.col_active[None, :]
+        brightness = np.where(lit & (dist < self.trail_len), self.SCALE - ((dist << 8) // self.trail_len), 0)
+        # Highlight the head of the drop
+        brightness[lit & (dist < self.char_h)] = self.HEAD
+        return brightness.astype(np.uint16)
+
+    def char_indices(self, t):
+        # Characters change slightly over time to simulate shifting data
+        char_tick = int(t * 12)
+        return (self.base_char_grid + char_tick) % len(self.effect.chars)
+
+    def render(self, frame, t):
+        brightness = self.brightness(t)
+        char_indices = self.char_indices(t)
+        lit = np.nonzero(brightness)
+
+        with self._lock:
+            if len(lit[0]) <= self.SPARSE_MAX_FRACTION * brightness.size:
+                self._draw_sparse(brightness, char_indices, lit)
+            else:
+                self._draw_dense(brightness, char_indices)
+            self._lit = lit
+
+            # Slightly dim the background, then add the rain with saturation, in place
+            out = cv2.convertScaleAbs(frame, alpha=0.8)
+            cv2.add(out, self._rain_rgb, dst=out)
+        return out
+
+    def _baked_indices(self, brightness, char_indices):
+        """Row of every cell in the flattened prebaked atlas."""
+        return self.effect.quantize(brightness) * len(self.effect.chars) + char_indices
+
+    def _draw_dense(self, brightness, char_indices):
+        """Renders every cell of the rain layer."""
+        if self._rgb_atlas is not None:
+            np.take(self._rgb_atlas, self._baked_indices(brightness, char_indices), axis=0, out=self._glyphs)
+            self._rgb_cells[...] = self._glyphs.transpose(0, 2, 1, 3, 4)
+            return
+
+        # Pick character bitmaps from the atlas: (rows, cols, char_h, char_w)
+        np.take(self.effect._atlas, char_indices, axis=0, out=self._glyphs)
+
+        # Scale each glyph by its cell brightness, straight into the (H, W) layout
+        layer = self._layer
+        np.multiply(
+            self._glyphs.transpose(0, 2, 1, 3),
+            brightness[:, None, :, None],
+            out=layer,
+            dtype=np.uint16
+        )
+        np.right_shift(layer, 8, out=layer)
+
+        # Color through the precomputed LUT
+        np.take(self.effect.color_lut, layer, axis=0, out=self._rgb_cells)
+
+    def _draw_sparse(self, brightness, char_indices, lit):
+        """Clears the cells lit by the previous frame and draws only the lit cells of this one."""
+        rows, cols = self._lit
+        self._rgb_cells[rows, :, cols, :] = 0
+
+        rows, cols = lit
+        if len(rows) == 0:
+            return
+        if self._rgb_atlas is not None:
+            self._rgb_cells[rows, :, cols, :] = self._rgb_atlas[
+                self._baked_indices(brightness[rows, cols], char_indices[rows, cols])
+            ]
+            return
+        glyphs = self.effect._atlas[char_indices[rows, cols]]
+        scaled = (glyphs.astype(np.uint16) * brightness[rows, cols][:, None, None]) >> 8
+        self._rgb_cells[rows, :, cols, :] = self.effect.color_lut[scaled]
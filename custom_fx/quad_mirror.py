@@ -1,10 +1,55 @@
 from moviepy import Effect
 import numpy as np
+from functools import lru_cache
+
+@lru_cache(maxsize=128)
+def _get_mirror_indices(w, h, x_center=None, y_center=None):
+    """
+    Source column and row of every output pixel: pixels past the center are
+    reflected back across it and clamped to the first column/row. Centers
+    default to the middle of the frame.
+    """
+    xc = w // 2 if x_center is None else x_center
+    yc = h // 2 if y_center is None else y_center
+    idx_x = np.arange(w)
+    idx_x = np.where(idx_x <= xc, idx_x, 2 * xc - idx_x)
+    idx_x = np.clip(idx_x, 0, xc)
+    idx_y = np.arange(h)
+    idx_y = np.where(idx_y <= yc, idx_y, 2 * yc - idx_y)
+    idx_y = np.clip(idx_y, 0, yc)
+    return idx_x, idx_y
+
+@lru_cache(maxsize=128)
+def _mirror_segments(n, center):
+    """
+    The mirror of one axis as (destination, source) slice pairs: a straight
+    copy up to the center, a reversed view after it and, when the mirrored
+    half is longer than the source half, the first row/column repeated.
+    """
+    segments = [(slice(0, center + 1), slice(0, center + 1))]
+    mirrored = min(n - center - 1, center)
+    if mirrored > 0:
+        stop = center - 1 - mirrored
+        segments.append((slice(center + 1, center + 1 + mirrored), slice(center - 1, stop if stop >= 0 else None, -1)))
+    if center + 1 + mirrored < n:
+        segments.append((slice(center + 1 + mirrored, n), slice(0, 1)))
+    return tuple(segments)
+
+def mirror_into(out, frame, x_center, y_center):
+    """Writes the quad mirror of ``frame`` into ``out`` with one block copy per segment pair."""
+    h, w = frame.shape[:2]
+    for dst_y, src_y in _mirror_segments(h, y_center):
+        for dst_x, src_x in _mirror_segments(w, x_center):
+            out[dst_y, dst_x] = frame[src_y, src_x]
+    return out
 
 class QuadMirror(Effect):
     """
     A custom effect that mirrors the clip both horizontally and vertically
     based on a custom center (x, y).
+
+    The mirror is done with slice copies from flipped views into the output,
+    planned once per (w, h, x, y); no index arrays are gathered per frame.
     """
     def __init__(self, x: int = None, y: int = None):
         self.x = x
@@ -14,22 +59,14 @@ class QuadMirror(Effect):
         def filter(get_frame, t):
             frame = get_frame(t)
             h, w = frame.shape[:2]
-            
+
             x_center = self.x if self.x is not None else w // 2
             y_center = self.y if self.y is not None else h // 2
-            
+
             # Ensure center is within bounds
             x_center = int(max(0, min(w - 1, x_center)))
             y_center = int(max(0, min(h - 1, y_center)))
-            
-            idx_x = np.arange(w)
-            idx_x = np.where(idx_x <= x_center, idx_x, 2 * x_center - idx_x)
-            idx_x = np.clip(idx_x, 0, x_center)
-            
-            idx_y = np.arange(h)
-            idx_y = np.where(idx_y <= y_center, idx_y, 2 * y_center - idx_y)
-            idx_y = np.clip(idx_y, 0, y_center)
-            
-            return frame[idx_y][:, idx_x]
+
+            return mirror_into(np.empty_like(frame), frame, x_center, y_center)
 
         return clip.transform(filter)
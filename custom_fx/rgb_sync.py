@@ -1,11 +1,47 @@
 from moviepy import Effect
 import numpy as np
+from .frame_ring import FrameRing
+
+MODES = ("wrap", "clamp")
+
+def _axis_segments(n, shift, mode):
+    """
+    (destination, source) slice pairs that shift an axis of length ``n`` by
+    ``shift`` pixels. Clamp mode fills the uncovered edge from a single
+    source row/column, which broadcasts over the destination slice.
+    """
+    if mode == "wrap":
+        s = shift % n
+        if s == 0:
+            return [(slice(None), slice(None))]
+        return [(slice(s, None), slice(None, n - s)), (slice(None, s), slice(n - s, None))]
+
+    s = max(-n, min(n, shift))
+    if s > 0:
+        return [(slice(s, None), slice(None, n - s)), (slice(None, s), slice(0, 1))]
+    if s < 0:
+        return [(slice(None, n + s), slice(-s, None)), (slice(n + s, None), slice(n - 1, n))]
+    return [(slice(None), slice(None))]
+
+def _shift_channel_into(out, frame, channel, offset, mode):
+    """Writes ``frame[..., channel]`` shifted by ``offset`` (x, y) into ``out[..., channel]``."""
+    h, w = frame.shape[:2]
+    dx, dy = offset
+    for dst_y, src_y in _axis_segments(h, dy, mode):
+        for dst_x, src_x in _axis_segments(w, dx, mode):
+            out[dst_y, dst_x, channel] = frame[src_y, src_x, channel]
 
 class RGBSync(Effect):
     """
     Splits the RGB channels and applies spatial and/or temporal offsets
     to create a "sync" or "split" glitch effect.
-    
+
+    Each shifted channel is slice-assigned straight into a single HxWx3
+    output, so every output pixel is written once and no per-channel copies
+    are made. Time-offset channels are read through a FrameRing, so in a
+    sequential render each source frame is decoded once, in order, and
+    offsets are snapped to the clip's frame grid.
+
     Parameters:
     -----------
     r_offset : tuple (x, y)
@@ -20,55 +56,51 @@ class RGBSync(Effect):
         Time offset (seconds) for the Green channel.
     b_time_offset : float
         Time offset (seconds) for the Blue channel.
+    mode : str
+        How pixels shifted out of frame are replaced: 'wrap' brings them
+        back in from the opposite edge, 'clamp' repeats the edge pixels.
     """
-    def __init__(self, 
+    def __init__(self,
                  r_offset=(0, 0), g_offset=(0, 0), b_offset=(0, 0),
-                 r_time_offset=0, g_time_offset=0, b_time_offset=0):
-        self.offsets = [r_offset, g_offset, b_offset]
+                 r_time_offset=0, g_time_offset=0, b_time_offset=0,
+                 mode="wrap"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}.")
+        self.offsets = [tuple(int(v) for v in offset) for offset in (r_offset, g_offset, b_offset)]
         self.time_offsets = [r_time_offset, g_time_offset, b_time_offset]
+        self.mode = mode
 
     def apply(self, clip):
+        fps = getattr(clip, "fps", None)
+        span = max(max(self.time_offsets), 0) - min(min(self.time_offsets), 0)
+        # Frames at t + offset are kept for the later output frames that need them
+        ring = FrameRing.for_span(fps, span) if span else None
+
         def filter(get_frame, t):
-            # Get frames for each channel based on time offsets
-            # We use float32 for processing and then clip back to uint8
-            channels = []
-            fetched_frames = {}
-            primary_frame = None
+            if ring is None:
+                frame = get_frame(t)
+                out = np.empty(frame.shape[:2] + (3,), dtype=frame.dtype)
+                for i in range(3):
+                    _shift_channel_into(out, frame, i, self.offsets[i], self.mode)
+                return out
 
+            out = None
             for i in range(3):
-                # Calculate the timestamp for this specific channel
-                offset = self.time_offsets[i]
-                
-                # Check if we can reuse the primary frame (at time t)
-                if offset == 0:
-                    if primary_frame is None:
-                        primary_frame = get_frame(t)
-                    frame = primary_frame
-                else:
-                    # Ensure it stays within clip bounds [0, duration]
-                    channel_t = max(0, min(clip.duration, t + offset)) if clip.duration else t + offset
+                # Ensure the channel's timestamp stays within clip bounds [0, duration]
+                channel_t = t + self.time_offsets[i]
+                if clip.duration:
+                    channel_t = max(0, min(clip.duration, channel_t))
+                frame = ring.get(get_frame, channel_t)
+
+                # One output per frame: returned frames may be cached downstream, so it is not reused
+                if out is None:
+                    out = np.empty(frame.shape[:2] + (3,), dtype=frame.dtype)
+                _shift_channel_into(out, frame, i, self.offsets[i], self.mode)
 
-                    if channel_t == t:
-                        if primary_frame is None:
-                            primary_frame = get_frame(t)
-                        frame = primary_frame
-                    else:
-                        if channel_t not in fetched_frames:
-                            fetched_frames[channel_t] = get_frame(channel_t)
-                        frame = fetched_frames[channel_t]
-                channel_data = frame[:, :, i]
-                
-                # Apply spatial offset using np.roll (wraps around)
-                # axis 0 is Y, axis 1 is X
-                if self.offsets[i] != (0, 0):
-                    channel_data = np.roll(channel_data, shift=self.offsets[i], axis=(1, 0))
-                
-                channels.append(channel_data)
-            
-            return np.dstack(channels)
+            return out
 
         return clip.transform(filter)
 
 # Usage Example:
-# effect = RGBSync(r_offset=(5, 0), b_offset=(-5, 0), g_time_offset=0.05)
+# effect = RGBSync(r_offset=(5, 0), b_offset=(-5, 0), g_time_offset=0.05, mode="clamp")
 # clip = clip.apply_effect(effect)
@@ -2,17 +2,7 @@ from moviepy import Effect
 import numpy as np
 import cv2
 from functools import lru_cache
-
-@lru_cache(maxsize=128)
-def _get_mirror_indices(w, h):
-    xc, yc = w // 2, h // 2
-    idx_x = np.arange(w)
-    idx_x = np.where(idx_x <= xc, idx_x, 2 * xc - idx_x)
-    idx_x = np.clip(idx_x, 0, xc)
-    idx_y = np.arange(h)
-    idx_y = np.where(idx_y <= yc, idx_y, 2 * yc - idx_y)
-    idx_y = np.clip(idx_y, 0, yc)
-    return idx_x, idx_y
+from .quad_mirror import mirror_into
 
 @lru_cache(maxsize=128)
 def _get_static_geometry(w, h, zoom):
@@ -61,79 +51,125 @@ class RotatingCube(Effect):
         self.mirror = mirror
         self.motion_radius = motion_radius
         self.motion_speed = motion_speed
+        self._coverage = None
 
     def _apply_quad_mirror(self, frame):
         h, w = frame.shape[:2]
-        idx_x, idx_y = _get_mirror_indices(w, h)
-        return frame[idx_y][:, idx_x]
+        return mirror_into(np.empty_like(frame), frame, w // 2, h // 2)
+
+    def _project_faces(self, w, h, t):
+        """Returns the destination quads of the visible faces at time t, farthest first."""
+        # Rotation angles
+        ax = np.deg2rad((self.speed_x * t) % 360)
+        ay = np.deg2rad((self.speed_y * t) % 360)
+
+        # Motion path offset
+        m_rad = np.deg2rad((self.motion_speed * t) % 360)
+        off_x = w * self.motion_radius * np.cos(m_rad)
+        off_y = h * self.motion_radius * np.sin(m_rad)
+
+        # Retrieve static geometry from cache
+        focal_length, cube_faces, _ = _get_static_geometry(w, h, self.zoom)
+
+        # Rotation Matrices
+        cx, sx = np.cos(ax), np.sin(ax)
+        Rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+        cy, sy = np.cos(ay), np.sin(ay)
+        Ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+
+        R = Ry @ Rx # Combined rotation
+
+        # Project and sort faces by depth
+        rendered_faces = []
+        for face_pts in cube_faces:
+            # Rotate
+            rot_pts = face_pts @ R.T
+
+            # Check visibility (backface culling)
+            v1 = rot_pts[1] - rot_pts[0]
+            v2 = rot_pts[3] - rot_pts[0]
+            normal = np.cross(v1, v2)
+            if normal[2] <= 0: # Facing away
+                continue
+
+            # Project
+            points_2d = []
+            visible = True
+            avg_z = np.mean(rot_pts[:, 2])
+
+            for x, y, z in rot_pts:
+                if z <= 0.1:
+                    visible = False
+                    break
+                px = (x * focal_length / z) + w/2 + off_x
+                py = (y * focal_length / z) + h/2 + off_y
+                points_2d.append([px, py])
+
+            if visible:
+                rendered_faces.append((avg_z, np.array(points_2d, dtype=np.float32)))
+
+        # Sort by depth (farthest first)
+        rendered_faces.sort(key=lambda x: x[0], reverse=True)
+        return [dst_pts for _, dst_pts in rendered_faces]
+
+    def _render(self, frame, t, warp):
+        """
+        Draws the cube for a ``frame``-shaped output. ``warp(M, size)`` must return
+        the face texture warped by the perspective transform M into an ROI of ``size``.
+        """
+        h, w = frame.shape[:2]
+        _, _, src_pts = _get_static_geometry(w, h, self.zoom)
+
+        # The canvas is returned as the frame, so it can't be recycled while
+        # callers such as the frame cache or RGBSync still hold it
+        canvas = np.zeros_like(frame)
+        coverage = self._get_coverage_buffer(w, h)
+
+        for dst_pts in self._project_faces(w, h, t):
+            self._draw_face(canvas, coverage, src_pts, dst_pts, warp)
+
+        return canvas
 
     def apply(self, clip):
         def filter(get_frame, t):
             raw_frame = get_frame(t)
             frame = self._apply_quad_mirror(raw_frame) if self.mirror else raw_frame
-            h, w = frame.shape[:2]
-            
-            # Rotation angles
-            ax = np.deg2rad((self.speed_x * t) % 360)
-            ay = np.deg2rad((self.speed_y * t) % 360)
-            
-            # Motion path offset
-            m_rad = np.deg2rad((self.motion_speed * t) % 360)
-            off_x = w * self.motion_radius * np.cos(m_rad)
-            off_y = h * self.motion_radius * np.sin(m_rad)
-            
-            # Retrieve static geometry from cache
-            focal_length, cube_faces, src_pts = _get_static_geometry(w, h, self.zoom)
-
-            # Rotation Matrices
-            cx, sx = np.cos(ax), np.sin(ax)
-            Rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
-            cy, sy = np.cos(ay), np.sin(ay)
-            Ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
-            
-            R = Ry @ Rx # Combined rotation
-
-            # Project and sort faces by depth
-            rendered_faces = []
-            for face_pts in cube_faces:
-                # Rotate
-                rot_pts = face_pts @ R.T
-                
-                # Check visibility (backface culling)
-                v1 = rot_pts[1] - rot_pts[0]
-                v2 = rot_pts[3] - rot_pts[0]
-                normal = np.cross(v1, v2)
-                if normal[2] <= 0: # Facing away
-                    continue
-                
-                # Project
-                points_2d = []
-                visible = True
-                avg_z = np.mean(rot_pts[:, 2])
-                
-                for x, y, z in rot_pts:
-                    if z <= 0.1:
-                        visible = False
-                        break
-                    px = (x * focal_length / z) + w/2 + off_x
-                    py = (y * focal_length / z) + h/2 + off_y
-                    points_2d.append([px, py])
-                
-                if visible:
-                    rendered_faces.append((avg_z, np.array(points_2d, dtype=np.float32)))
-
-            # Sort by depth (farthest first)
-            rendered_faces.sort(key=lambda x: x[0], reverse=True)
-
-            # Draw
-            canvas = np.zeros_like(frame)
-            
-            for _, dst_pts in rendered_faces:
-                M = cv2.getPerspectiveTransform(src_pts, dst_pts)
-                face_img = cv2.warpPerspective(frame, M, (w, h))
-                mask = np.any(face_img > 0, axis=-1)
-                canvas[mask] = face_img[mask]
-            
-            return canvas
+
+            def warp(M, size):
+                # Replicate the border so edge pixels are not blended with black
+                return cv2.warpPerspective(frame, M, size, borderMode=cv2.BORDER_REPLICATE)
+
+            return self._render(frame, t, warp)
 
         return clip.transform(filter)
+
+    def _get_coverage_buffer(self, w, h):
+        """Scratch mask reused between frames for face rasterization."""
+        if self._coverage is None or self._coverage.shape != (h, w):
+            self._coverage = np.zeros((h, w), dtype=np.uint8)
+        return self._coverage
+
+    @staticmethod
+    def _draw_face(canvas, coverage, src_pts, dst_pts, warp):
+        """Draws the face texture onto the quad ``dst_pts`` of ``canvas``, touching only its bounding box."""
+        h, w = canvas.shape[:2]
+        x0 = max(int(np.floor(dst_pts[:, 0].min())), 0)
+        y0 = max(int(np.floor(dst_pts[:, 1].min())), 0)
+        x1 = min(int(np.ceil(dst_pts[:, 0].max())) + 1, w)
+        y1 = min(int(np.ceil(dst_pts[:, 1].max())) + 1, h)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        # Same perspective transform, expressed in ROI coordinates
+        local_pts = dst_pts - np.array([x0, y0], dtype=np.float32)
+        M = cv2.getPerspectiveTransform(src_pts, local_pts)
+        patch = warp(M, (x1 - x0, y1 - y0))
+
+        # Explicit coverage from the face polygon, so black video pixels are kept
+        mask = coverage[:y1 - y0, :x1 - x0]
+        mask.fill(0)
+        cv2.fillConvexPoly(mask, np.round(local_pts * 16).astype(np.int32), 1, lineType=cv2.LINE_8, shift=4)
+        covered = mask.view(bool)
+        if canvas.ndim == 3:
+            covered = covered[:, :, None]
+        np.copyto(canvas[y0:y1, x0:x1], patch, where=covered)
@@ -0,0 +1,315 @@
+"""
+Shared decoder pool for file clips.
+
+Loading the same file twice normally probes it with ffmpeg again and spawns
+a second decoding process. The pool keys loads on (resolved path, mtime,
+size, load options): the first load of a key is done by MoviePy and kept as
+a template, later loads copy the template without probing the file and get
+their ffmpeg readers from the pool:
+
+- readers of closed clips stay open in the pool (up to ``max_idle``) and are
+  handed to the next clip loading the same key,
+- readers are started on first read, so clips that are only derived from
+  spawn no process until a frame is rendered,
+- at most ``max_processes`` ffmpeg processes run at once; beyond that, and
+  after ``idle_timeout`` seconds without a read, the least recently used
+  reader is suspended (its process closed) and resumes where it was on its
+  next read,
+- video readers seek with a KeyframeSeeker, using the keyframe times given
+  by the pool's ``keyframes`` function.
+"""
+from collections import OrderedDict
+import copy
+import os
+import subprocess
+import threading
+import time
+import weakref
+
+from keyframe_seek import KeyframeSeeker
+
+DEFAULT_MAX_PROCESSES = int(os.environ.get("MCP_MOVIEPY_DECODER_PROCESSES", "16"))
+DEFAULT_MAX_IDLE = int(os.environ.get("MCP_MOVIEPY_DECODER_POOL_SIZE", "8"))
+DEFAULT_IDLE_TIMEOUT = float(os.environ.get("MCP_MOVIEPY_DECODER_IDLE_SECONDS", "60"))
+# Templates (probe results) kept for files loaded earlier
+MAX_TEMPLATES = 256
+
+
+def media_key(filename, *options):
+    """Pool key of a file: (resolved path, mtime, size, *options). A modified file gets a new key."""
+    st = os.stat(filename)
+    return (os.path.realpath(filename), st.st_mtime_ns, st.st_size) + tuple(options)
+
+
+def _live(reader):
+    return isinstance(getattr(reader, "proc", None), subprocess.Popen)
+
+
+def _prototype(reader):
+    """Copy of a MoviePy reader with its probe results and no process or decoded data."""
+    proto = copy.copy(reader)
+    proto.proc = None
+    proto.__dict__.pop("last_read", None)
+    if hasattr(proto, "buffer"):
+        # Audio reader: refilled from the start on first read
+        proto.buffer = None
+        proto.pos = 0
+    return proto
+
+
+class PooledReader:
+    """
+    A MoviePy ffmpeg reader handed out by a DecoderPool.
+
+    Forwards everything to the wrapped reader, (re)starts its process on the
+    first read after a suspension and returns it to the pool on ``close``.
+    """
+    def __init__(self, pool, key, reader):
+        self._pool = pool
+        self._reader = reader
+        # Audio readers keep MoviePy's buffering
+        self.seeker = None if hasattr(reader, "buffer") else KeyframeSeeker(reader, pool.keyframes)
+        self.key = key
+        self.in_use = True
+        self.last_used = time.monotonic()
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        return getattr(self._reader, name)
+
+    @property
+    def alive(self):
+        return _live(self._reader)
+
+    def get_frame(self, t):
+        with self._lock:
+            self.last_used = time.monotonic()
+            reader = self._reader
+            if reader.proc is None:
+                self._pool._make_room(self)
+                self._pool.process_starts += 1
+                if self.seeker is None:
+                    reader.initialize(reader.pos / reader.fps)
+                    if reader.buffer is None:
+                        reader.buffer_around(1)
+            if self.seeker is not None:
+                # Also keeps MoviePy from printing to stdout, the MCP transport, when there is no process
+                return self.seeker.get_frame(t)
+            return reader.get_frame(t)
+
+    def suspend(self):
+        """Closes the process unless a read is in progress. Returns True if it was closed."""
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if self._reader.proc is None:
+                return False
+            self._reader.close()
+            self._pool.suspensions += 1
+            return True
+        finally:
+            self._lock.release()
+
+    def close(self):
+        self._pool._release(self)
+
+
+class DecoderPool:
+    """
+    Pool of probed files and ffmpeg readers shared by every file clip load.
+
+    Parameters:
+    -----------
+    max_processes : int
+        Maximum number of ffmpeg processes running at once.
+    max_idle : int
+        Maximum number of open readers kept for clips loaded later.
+    idle_timeout : float
+        Seconds without a read after which a reader's process is closed.
+    keyframes : callable
+        ``keyframes(filename)`` returns the keyframe times of a video file,
+        used by the readers to seek. None uses MoviePy's heuristics.
+    """
+    def __init__(self, max_processes=DEFAULT_MAX_PROCESSES, max_idle=DEFAULT_MAX_IDLE,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, keyframes=None):
+        self.keyframes = keyframes
+        self.max_processes = max_processes
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._templates = OrderedDict()
+        # Open readers of closed clips, by key
+        self._idle = {}
+        self._readers = weakref.WeakSet()
+        self._lock = threading.RLock()
+        self._reaper = None
+        self.probe_hits = 0
+        self.probe_misses = 0
+        self.reuses = 0
+        self.process_starts = 0
+        self.suspensions = 0
+
+    def open(self, key, load):
+        """
+        Returns a clip for ``key``. The first time it is loaded with ``load()``,
+        afterwards it is copied from that first clip with readers from the pool.
+        Clips without ffmpeg readers are returned as loaded and not pooled.
+        """
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.probe_hits += 1
+        if template is not None:
+            return self._instantiate(key, template)
+
+        clip = load()
+        if not _live(getattr(clip, "reader", None)):
+            return clip
+        audio = getattr(clip, "audio", None)
+        pooled_audio = _live(getattr(audio, "reader", None))
+        template = copy.copy(clip)
+        template.reader = _prototype(clip.reader)
+        if pooled_audio:
+            template.audio = copy.copy(audio)
+            template.audio.reader = _prototype(audio.reader)
+        clip.reader = self._track(key, clip.reader)
+        if pooled_audio:
+            audio.reader = self._track(key + ("audio",), audio.reader)
+        with self._lock:
+            self.probe_misses += 1
+            self.process_starts += 2 if pooled_audio else 1
+            self._make_room(clip.reader)
+            self._templates[key] = template
+            while len(self._templates) > MAX_TEMPLATES:
+                self._templates.popitem(last=False)
+        return clip
+
+    def _instantiate(self, key, template):
+        clip = copy.copy(template)
+        clip.memoized_t = clip.memoized_frame = None
+        clip.reader = self._acquire(key, template.reader)
+        clip.frame_function = lambda t: clip.reader.get_frame(t)
+        audio = getattr(template, "audio", None)
+        if audio is not None and hasattr(audio, "reader"):
+            audio = clip.audio = copy.copy(audio)
+            audio.reader = self._acquire(key + ("audio",), template.audio.reader)
+            audio.frame_function = lambda t: audio.reader.get_frame(t)
+        return clip
+
+    def _acquire(self, key, prototype):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                reader = idle.pop()
+                if not idle:
+                    del self._idle[key]
+                reader.in_use = True
+                reader.last_used = time.monotonic()
+                self.reuses += 1
+                return reader
+        return self._track(key, copy.copy(prototype))
+
+    def _track(self, key, reader):
+        pooled = PooledReader(self, key, reader)
+        with self._lock:
+            self._readers.add(pooled)
+            if self._reaper is None and self.idle_timeout > 0:
+                self._reaper = threading.Thread(target=self._reap, name="decoder-pool-reaper", daemon=True)
+                self._reaper.start()
+        return pooled
+
+    def _release(self, reader):
+        with self._lock:
+            if not reader.in_use:
+                return
+            reader.in_use = False
+            if reader.alive and self.idle_count() < self.max_idle:
+                reader.last_used = time.monotonic()
+                self._idle.setdefault(reader.key, []).append(reader)
+                return
+        reader.suspend()
+
+    def idle_count(self):
+        return sum(len(readers) for readers in self._idle.values())
+
+    def _drop_idle(self, reader):
+        readers = self._idle.get(reader.key)
+        if readers and reader in readers:
+            readers.remove(reader)
+            if not readers:
+                del self._idle[reader.key]
+
+    def _make_room(self, starting):
+        """Suspends least recently used readers until another process may start."""
+        with self._lock:
+            live = [r for r in self._readers if r is not starting and r.alive]
+            # Pooled idle readers go first, then readers of clips by last read
+            live.sort(key=lambda r: (r.in_use, r.last_used))
+            excess = len(live) + 1 - self.max_processes
+            for reader in live:
+                if excess <= 0:
+                    break
+                if reader.suspend():
+                    if not reader.in_use:
+                        self._drop_idle(reader)
+                    excess -= 1
+
+    def sweep(self, now=None):
+        """Suspends readers not read for ``idle_timeout`` seconds; idle pooled ones leave the pool."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for reader in list(self._readers):
+                if now - reader.last_used < self.idle_timeout:
+                    continue
+                if not reader.in_use:
+                    self._drop_idle(reader)
+                    reader.suspend()
+                elif reader.alive:
+                    reader.suspend()
+
+    def _reap(self):
+        while True:
+            time.sleep(max(1.0, self.idle_timeout / 2))
+            self.sweep()
+
+    def clear(self):
+        """Closes every pooled reader and forgets all templates."""
+        with self._lock:
+            for readers in self._idle.values():
+                for reader in readers:
+                    reader.suspend()
+            self._idle.clear()
+            self._templates.clear()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            processes = [
+                {
+                    "file": r.filename,
+                    "stream": "video" if r.seeker is not None else "audio",
+                    "pid": r.proc.pid,
+                    "in_use": r.in_use,
+                    "idle_seconds": round(now - r.last_used, 1),
+                }
+                for r in self._readers if r.alive
+            ]
+            seekers = [r.seeker for r in self._readers if r.seeker is not None]
+            return {
+                "live_processes": len(processes),
+                "max_processes": self.max_processes,
+                "pooled_readers": self.idle_count(),
+                "max_idle": self.max_idle,
+                "idle_timeout": self.idle_timeout,
+                "probed_files": len(self._templates),
+                "probe_hits": self.probe_hits,
+                "probe_misses": self.probe_misses,
+                "reader_reuses": self.reuses,
+                "process_starts": self.process_starts,
+                "suspensions": self.suspensions,
+                # Of the readers still alive
+                "seeks": sum(s.seeks for s in seekers),
+                "reverse_fills": sum(s.reverse_fills for s in seekers),
+                "reverse_hits": sum(s.reverse_hits for s in seekers),
+                "processes": processes,
+            }
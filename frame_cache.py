@@ -0,0 +1,111 @@
+"""
+Content-addressed frame cache shared by every clip built from the render graph.
+
+Frames are keyed on (render node key, t). Because optimized and re-materialized
+nodes keep the key of the node whose output they reproduce, sibling outputs
+that share an ancestor (e.g. two effects applied to the same VideoFileClip)
+decode and filter that ancestor only once.
+"""
+from collections import OrderedDict
+from numbers import Real
+import os
+import threading
+
+DEFAULT_MAX_BYTES = int(os.environ.get("MCP_MOVIEPY_FRAME_CACHE_MB", "512")) * 1024 * 1024
+
+
+class FrameCache:
+    """
+    A thread-safe LRU cache of video frames bounded by total size in bytes.
+
+    Parameters:
+    -----------
+    max_bytes : int
+        Memory budget for cached frames. Least recently used frames are
+        evicted once the budget is exceeded. 0 disables the cache.
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key, frame):
+        size = getattr(frame, "nbytes", 0)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes
+            self._frames[key] = frame
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def wrap(self, node_key, frame_function):
+        """Returns a frame function that serves scalar-time frames from the cache."""
+        def cached_frame_function(t):
+            if not isinstance(t, Real):
+                # Audio clips are queried with arrays of times; never cache those
+                return frame_function(t)
+            key = (node_key, round(float(t), 6))
+            frame = self.get(key)
+            if frame is None:
+                frame = frame_function(t)
+                if hasattr(frame, "flags"):
+                    # Cached frames are shared between consumers; make accidental
+                    # in-place edits fail loudly instead of corrupting the cache.
+                    frame.flags.writeable = False
+                self.put(key, frame)
+            return frame
+        cached_frame_function.frame_cache_key = node_key
+        cached_frame_function.__wrapped__ = frame_function
+        return cached_frame_function
+
+    def attach(self, node_key, clip):
+        """Routes ``clip.get_frame`` through the cache. Video clips only, once per frame function."""
+        frame_function = getattr(clip, "frame_function", None)
+        if self.max_bytes <= 0 or frame_function is None or getattr(clip, "size", None) is None:
+            return
+        # Clips derived by copy (with_start, with_position...) share their parent's
+        # frame function, and therefore its frames; don't wrap those twice.
+        if getattr(frame_function, "frame_cache_key", None) is not None:
+            return
+        clip.frame_function = self.wrap(node_key, frame_function)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._frames),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+FRAME_CACHE = FrameCache()
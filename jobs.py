@@ -0,0 +1,195 @@
+"""
+Background render jobs.
+
+write_videofile / write_gif / write_audiofile block for the whole encode. Jobs
+run the same renders on a bounded thread pool and report progress through a
+proglog logger, which is what MoviePy's writers already drive while encoding.
+A job renders to a temporary file next to its output and only moves it into
+place once the render succeeded, so a failed or cancelled job never touches a
+file that already existed at that path.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+import uuid
+
+import proglog
+
+DEFAULT_MAX_JOBS = int(os.environ.get("MCP_MOVIEPY_RENDER_JOBS", "2"))
+# Bars driven by the MoviePy writers: video/GIF frames and audio chunks
+PROGRESS_BARS = ("frame_index", "chunk")
+# Window used to compute the current render speed
+FPS_WINDOW_SECONDS = 5.0
+
+
+class JobCancelled(Exception):
+    """Raised inside a render when its job has been cancelled."""
+
+
+class RenderJob:
+    """State of a single background render."""
+    def __init__(self, kind, filename):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.filename = filename
+        self.status = "queued"
+        self.error = None
+        self.frames_done = 0
+        self.total_frames = None
+        self.stage = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._cancel = threading.Event()
+        self._samples = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def update(self, stage, frames_done, total_frames=None):
+        if self.cancelled:
+            raise JobCancelled(self.id)
+        now = time.time()
+        with self._lock:
+            if stage != self.stage:
+                # A new pass (e.g. audio before video) restarts the speed samples
+                self.stage = stage
+                self._samples = []
+            self.frames_done = frames_done
+            if total_frames is not None:
+                self.total_frames = total_frames
+            self._samples.append((now, frames_done))
+            while len(self._samples) > 2 and now - self._samples[0][0] > FPS_WINDOW_SECONDS:
+                self._samples.pop(0)
+
+    def fps(self):
+        with self._lock:
+            if len(self._samples) < 2:
+                return None
+            (t0, f0), (t1, f1) = self._samples[0], self._samples[-1]
+            return (f1 - f0) / (t1 - t0) if t1 > t0 else None
+
+    def status_dict(self):
+        fps = self.fps() if self.status == "running" else None
+        eta = None
+        if fps and self.total_frames:
+            eta = max(self.total_frames - self.frames_done, 0) / fps
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "frames_done": self.frames_done,
+            "total_frames": self.total_frames,
+            "fps": fps,
+            "eta_seconds": eta,
+            "elapsed_seconds": end - self.started_at if self.started_at else 0.0,
+            "output_path": self.filename if self.status == "done" else None,
+            "error": self.error,
+        }
+
+
+class JobProgressLogger(proglog.ProgressBarLogger):
+    """Forwards the progress bars of MoviePy writers to a RenderJob."""
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        if bar in PROGRESS_BARS and attr == "index":
+            total = self.bars[bar]["total"]
+            # proglog moves the index one past the end when an iteration finishes
+            done = value + 1 if total is None else min(value + 1, total)
+            self.job.update(bar, done, total)
+
+    def callback(self, **changes):
+        # Called for log messages too, so cancellation is noticed between passes
+        if self.job.cancelled:
+            raise JobCancelled(self.job.id)
+
+
+class JobManager:
+    """
+    Runs render callables on a bounded thread pool.
+
+    Parameters:
+    -----------
+    max_workers : int
+        Maximum number of renders running at the same time. Further jobs wait
+        in the queue.
+    """
+    def __init__(self, max_workers=DEFAULT_MAX_JOBS):
+        self.max_workers = max(1, max_workers)
+        self.jobs = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, kind, filename, render):
+        """Queues ``render(logger, filename)`` and returns the new RenderJob. ``filename`` is a temporary path."""
+        job = RenderJob(kind, filename)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="render")
+            self.jobs[job.id] = job
+            job.future = self._executor.submit(self._run, job, render)
+        return job
+
+    def _run(self, job, render):
+        if job.cancelled:
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        partial = _partial_path(job)
+        try:
+            render(JobProgressLogger(job), partial)
+            os.replace(partial, job.filename)
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+            _remove_partial(partial)
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            _remove_partial(partial)
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id):
+        if job_id not in self.jobs:
+            raise ValueError(f"Job with ID {job_id} not found.")
+        return self.jobs[job_id]
+
+    def cancel(self, job_id):
+        """Requests cancellation. Queued jobs never start; running jobs stop at the next frame."""
+        job = self.get(job_id)
+        if job.status in ("done", "failed", "cancelled"):
+            return job
+        job._cancel.set()
+        if job.future is not None and job.future.cancel():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        return job
+
+
+def _partial_path(job):
+    """Hidden sibling of the job's output; the extension is kept since writers pick the format from it."""
+    folder, name = os.path.split(job.filename)
+    base, ext = os.path.splitext(name)
+    return os.path.join(folder, f".{base}.{job.id[:8]}.partial{ext}")
+
+
+def _remove_partial(filename):
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+
+JOBS = JobManager()
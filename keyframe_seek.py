@@ -0,0 +1,167 @@
+"""
+Keyframe-aware seeking for MoviePy's ffmpeg video readers.
+
+MoviePy restarts ffmpeg for any backward read or a jump of more than 100
+frames, seeking one second before the target, and otherwise decodes
+forward frame by frame. On long-GOP footage both choices are often wrong:
+a jump inside the current GOP is cheaper to decode forward, a short jump
+across a keyframe is cheaper to seek, and playing a clip backwards
+(TimeMirror, TimeSymmetrize) decodes from the previous keyframe for every
+single frame.
+
+KeyframeSeeker uses the keyframe times of the file (from the media index)
+to decide between decoding forward and seeking straight to the target, and
+when reads go backwards it decodes from the keyframe before the target up
+to the target once, into a bounded buffer that serves the following frames.
+"""
+from bisect import bisect_right
+import os
+
+DEFAULT_REVERSE_MAX_BYTES = int(os.environ.get("MCP_MOVIEPY_REVERSE_BUFFER_MB", "256")) * 1024 * 1024
+# Decoding this many frames costs about as much as restarting ffmpeg
+SEEK_COST_FRAMES = 8
+# MoviePy's own forward-decode limit, used while keyframes are unknown
+MAX_FORWARD_FRAMES = 100
+# Consecutive backward reads after which frames are decoded into the reverse buffer
+REVERSE_AFTER = 2
+
+
+def start_reader(reader, frame):
+    """
+    (Re)starts the ffmpeg process of ``reader`` at ``frame``, like the reader's
+    own ``initialize`` but seeking on the input only: ffmpeg jumps to the
+    keyframe before the frame and decodes forward from there.
+    """
+    from moviepy.video.io import ffmpeg_reader
+
+    reader.close(delete_lastread=False)
+    i_arg = ["-i", ffmpeg_reader.ffmpeg_escape_filename(reader.filename)]
+    if frame:
+        i_arg = ["-ss", "%.06f" % (frame / reader.fps - 0.00001)] + i_arg
+    if reader.depth == 4:
+        codec_name = reader.infos.get("video_codec_name")
+        if codec_name in ("vp9", "vp8"):
+            i_arg = ["-c:v", "libvpx-vp9" if codec_name == "vp9" else "libvpx"] + i_arg
+    cmd = [ffmpeg_reader.FFMPEG_BINARY] + i_arg + [
+        "-loglevel", "error",
+        "-f", "image2pipe",
+        "-vf", "scale=%d:%d" % tuple(reader.size),
+        "-sws_flags", reader.resize_algo,
+        "-pix_fmt", reader.pixel_format,
+        "-vcodec", "rawvideo",
+        "-",
+    ]
+    popen_params = ffmpeg_reader.cross_platform_popen_params({
+        "bufsize": reader.bufsize,
+        "stdout": ffmpeg_reader.sp.PIPE,
+        "stderr": ffmpeg_reader.sp.PIPE,
+        "stdin": ffmpeg_reader.sp.DEVNULL,
+    })
+    reader.proc = ffmpeg_reader.sp.Popen(cmd, **popen_params)
+    reader.pos = frame
+    reader.last_read = reader.read_frame()
+
+
+class KeyframeSeeker:
+    """
+    Serves ``get_frame`` for a MoviePy FFMPEG_VideoReader.
+
+    Parameters:
+    -----------
+    reader : FFMPEG_VideoReader
+        The reader to drive. Its process may be closed at any time between
+        reads; it is restarted where needed.
+    keyframes : callable
+        ``keyframes(filename)`` returns the keyframe times of the file. Only
+        called on the first non-sequential read. None (or a failing call)
+        falls back to MoviePy's heuristics.
+    max_bytes : int
+        Memory budget of the reverse playback buffer.
+    """
+    def __init__(self, reader, keyframes=None, max_bytes=DEFAULT_REVERSE_MAX_BYTES):
+        self.reader = reader
+        self.max_bytes = max_bytes
+        self._keyframes = keyframes
+        self._keyframe_frames = None
+        self._reverse = {}
+        self._last = None
+        self._descending = 0
+        self.seeks = 0
+        self.reverse_fills = 0
+        self.reverse_hits = 0
+
+    def keyframe_frames(self):
+        """Frame indices of the keyframes, [] if unknown."""
+        if self._keyframe_frames is None:
+            times = []
+            if self._keyframes is not None:
+                try:
+                    times = self._keyframes(self.reader.filename)
+                except Exception:
+                    times = []
+            fps = self.reader.fps
+            self._keyframe_frames = sorted({int(fps * t + 0.00001) for t in times})
+        return self._keyframe_frames
+
+    def _keyframe_before(self, frame):
+        frames = self.keyframe_frames()
+        i = bisect_right(frames, frame) - 1
+        return frames[i] if i >= 0 else None
+
+    def _capacity(self):
+        w, h = self.reader.size
+        return max(1, self.max_bytes // (w * h * self.reader.depth))
+
+    def _should_seek(self, current, target):
+        gap = target - current
+        if gap <= 1:
+            return False
+        if not self.keyframe_frames():
+            return gap > MAX_FORWARD_FRAMES
+        keyframe = self._keyframe_before(target)
+        # Seeking decodes from the keyframe before the target; worth it only past a keyframe ahead of us
+        return keyframe is not None and keyframe > current and target - keyframe + SEEK_COST_FRAMES < gap
+
+    def _seek(self, frame):
+        start_reader(self.reader, frame)
+        self.seeks += 1
+
+    def _fill_reverse(self, target):
+        """Decodes the frames up to ``target`` from the keyframe before it (at most the buffer capacity)."""
+        self._reverse = {}
+        keyframe = self._keyframe_before(target)
+        start = max(keyframe or 0, target - self._capacity() + 1, 0)
+        self._seek(start)
+        frames = {start: self.reader.last_read}
+        for frame in range(start + 1, target + 1):
+            frames[frame] = self.reader.read_frame()
+        self._reverse = frames
+        self.reverse_fills += 1
+
+    def get_frame(self, t):
+        reader = self.reader
+        target = reader.get_frame_number(t)
+        if self._last is not None and target < self._last:
+            self._descending += 1
+        elif target != self._last:
+            self._descending = 0
+        self._last = target
+
+        frame = self._reverse.get(target)
+        if frame is not None:
+            self.reverse_hits += 1
+            return frame
+        if not self._descending:
+            self._reverse = {}
+
+        current = reader.pos - 1 if reader.proc is not None else None
+        if current is not None and target == current and hasattr(reader, "last_read"):
+            return reader.last_read
+        if self._descending >= REVERSE_AFTER:
+            self._fill_reverse(target)
+            return self._reverse[target]
+        if current is not None and current < target and not self._should_seek(current, target):
+            reader.skip_frames(target - current - 1)
+            return reader.read_frame()
+        self._seek(target)
+        return reader.last_read
@@ -8,6 +8,7 @@ from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
 from moviepy.video.tools.subtitles import file_to_subtitles, SubtitlesClip
 from moviepy.video.tools.credits import CreditsClip
 import os
+import time
 import uuid
 import numpy as np
 import numexpr
@@ -15,11 +16,26 @@ from custom_fx import *
 from typing import Any
 from mcp_ui_server import create_ui_resource, UIMetadataKey
 from ui import DASHBOARD_HTML
+from render_graph import RenderNode, materialize, detach
+from frame_cache import FRAME_CACHE
+from parallel_render import render_parallel, close_sources
+from jobs import JOBS
+from profiler import profile_node
+from clip_registry import ClipRegistry
+from decoder_pool import DecoderPool, media_key
+from media_index import MEDIA_INDEX
+from smart_cut import smart_cut as cut_subclip
 
 mcp = FastMCP("moviepy-mcp")
 
-CLIPS = {}
-MAX_CLIPS = 100
+# Reference-counted; least recently used clips release their readers when over budget
+CLIPS = ClipRegistry()
+# Loader recipes (build, params) for file-backed clips, used to reopen them in render workers or after eviction
+SOURCE_RECIPES = CLIPS.recipes
+# Probes are answered from the on-disk metadata index until a file changes
+MEDIA_INDEX.install()
+# Probe results and ffmpeg readers shared by repeated loads of the same file; readers seek using indexed keyframes
+DECODERS = DecoderPool(keyframes=MEDIA_INDEX.keyframes)
 
 # --- Clip Management ---
 
@@ -58,37 +74,263 @@ def validate_ffmpeg_params(params: list[str]):
             if any(proto in param.lower() for proto in ["://", "file:", "php:", "expect:"]):
                 raise ValueError(f"Potential protocol injection in FFmpeg parameter: {param}")
 
-def register_clip(clip):
-    """Registers a clip in the global state and returns its ID."""
-    if len(CLIPS) >= MAX_CLIPS:
-        raise RuntimeError(f"Maximum number of clips ({MAX_CLIPS}) reached. Delete some clips first.")
+def register_clip(clip, parent_ids=()):
+    """
+    Registers a clip (or a lazy RenderNode) derived from ``parent_ids`` in the global state and returns its ID.
+    Idle clips are evicted if this takes the registry over its memory or reader budget.
+    """
     clip_id = str(uuid.uuid4())
-    CLIPS[clip_id] = clip
+    CLIPS.add(clip_id, clip, parent_ids)
+    CLIPS.enforce_budget()
     return clip_id
 
+def register_source(clip, build, **params):
+    """Registers a loaded clip along with the recipe needed to reload it from scratch."""
+    clip_id = register_clip(clip)
+    SOURCE_RECIPES[clip_id] = (build, params)
+    return clip_id
+
+def get_node(clip_id: str):
+    """Retrieves the render graph node for a clip ID. Raises ValueError if not found."""
+    if clip_id not in CLIPS:
+        raise ValueError(f"Clip with ID {clip_id} not found.")
+    CLIPS.touch(clip_id)
+    entry = CLIPS[clip_id]
+    if not isinstance(entry, RenderNode):
+        # Loaded clips are stored as-is and wrapped the first time something derives from them
+        build, params = SOURCE_RECIPES.get(clip_id, (None, None))
+        entry = CLIPS[clip_id] = RenderNode.source(entry, build, params)
+    return entry
+
 def get_clip(clip_id: str):
-    """Retrieves a clip by ID. Raises ValueError if not found."""
+    """Retrieves a clip by ID, materializing lazy nodes. Raises ValueError if not found."""
     if clip_id not in CLIPS:
         raise ValueError(f"Clip with ID {clip_id} not found.")
-    return CLIPS[clip_id]
+    CLIPS.touch(clip_id)
+    entry = CLIPS[clip_id]
+    return materialize(entry, FRAME_CACHE) if isinstance(entry, RenderNode) else entry
+
+def derive_clip(op: str, build, clip_ids: list[str], pixel: bool = False, **params) -> str:
+    """Registers a lazy operation on already registered clips and returns the new clip ID."""
+    parents = [get_node(cid) for cid in clip_ids]
+    return register_clip(RenderNode(op, build, parents, params, pixel=pixel), clip_ids)
+
+def apply_effects(op: str, clip_id: str, effects: list, pixel: bool = False) -> str:
+    """Registers a lazy with_effects node. Set pixel=True for pure per-pixel filters that may be fused."""
+    return derive_clip(op, _with_effects, [clip_id], pixel=pixel, effects=effects)
 
 @mcp.tool
 def list_clips() -> dict:
-    """Lists all currently loaded clips and their types."""
-    return {cid: str(type(c)) for cid, c in CLIPS.items()}
+    """
+    Lists all registered clips: type (or pending operation for lazy clips), whether it is loaded,
+    estimated memory, open ffmpeg readers it renders from and the number of clips derived from it.
+    """
+    return {cid: CLIPS.describe(cid, c) for cid, c in list(CLIPS.items())}
 
 @mcp.tool
 def delete_clip(clip_id: str) -> str:
-    """Removes a clip from memory and closes it."""
+    """Removes a clip and closes it, or once the clips derived from it are deleted too."""
     if clip_id in CLIPS:
         try:
-            CLIPS[clip_id].close()
+            released = CLIPS.delete(clip_id)
         except Exception:
-            pass
-        del CLIPS[clip_id]
+            released = True
+        if not released:
+            return f"Clip {clip_id} deleted. It stays open until the {CLIPS.refs(clip_id)} clip(s) derived from it are deleted."
         return f"Clip {clip_id} deleted."
     return f"Clip {clip_id} not found."
 
+@mcp.tool
+def clip_registry_stats() -> dict:
+    """Returns the number of clips, estimated memory and open ffmpeg readers against their budgets, and evictions."""
+    return CLIPS.stats()
+
+@mcp.tool
+def decoder_pool_stats() -> dict:
+    """
+    Returns the live ffmpeg decoding processes (file, stream, pid, idle seconds) and the decoder pool counters:
+    probe hits/misses, reused readers, process starts and suspensions.
+    """
+    return DECODERS.stats()
+
+@mcp.tool
+def frame_cache_stats() -> dict:
+    """Returns hit/miss/eviction counters and memory usage of the shared frame cache."""
+    return FRAME_CACHE.stats()
+
+@mcp.tool
+def profile_clip(clip_id: str, sample_frames: int = 10, track_memory: bool = True) -> dict:
+    """
+    Renders sample frames of a clip and returns a per-node timing breakdown of its effect chain:
+    calls, self/inclusive time, p50/p95 per call and peak bytes allocated per frame. Slowest nodes first.
+    """
+    return profile_node(get_node(clip_id), sample_frames, track_memory)
+
+# --- Writers ---
+# Each returns a render(logger, filename=filename) callable so the write_* tools and background jobs share one
+# code path; jobs pass a temporary filename.
+
+def video_writer(
+    node, filename, fps=None, codec="libx264", audio_codec="aac", bitrate=None, preset="medium",
+    threads=None, ffmpeg_params=None, parallel_workers=None, chunk_seconds=10.0
+):
+    validate_ffmpeg_params(ffmpeg_params)
+    options = dict(
+        fps=fps, codec=codec, audio_codec=audio_codec, bitrate=bitrate,
+        preset=preset, threads=threads, ffmpeg_params=ffmpeg_params
+    )
+    if parallel_workers and parallel_workers > 1:
+        return lambda logger, filename=filename: render_parallel(
+            node, filename, parallel_workers, chunk_seconds=chunk_seconds, logger=logger, **options
+        )
+    return lambda logger, filename=filename: materialize(node, FRAME_CACHE).write_videofile(
+        filename=filename, logger=logger, **options
+    )
+
+def audio_writer(node, filename, fps=44100, nbytes=2, codec="libvorbis", bitrate=None):
+    return lambda logger, filename=filename: materialize(node, FRAME_CACHE).write_audiofile(
+        filename=filename, fps=fps, nbytes=nbytes, codec=codec, bitrate=bitrate, logger=logger
+    )
+
+def gif_writer(node, filename, fps=None, loop=0):
+    return lambda logger, filename=filename: materialize(node, FRAME_CACHE).write_gif(
+        filename, fps=fps, loop=loop, logger=logger
+    )
+
+WRITERS = {"video": video_writer, "audio": audio_writer, "gif": gif_writer}
+
+# --- Render Jobs ---
+
+@mcp.tool
+def submit_render(clip_id: str, filename: str, kind: str = "video", options: dict = None) -> str:
+    """Start rendering a clip in the background and return a job ID immediately.
+    kind is 'video', 'audio' or 'gif'; options takes the same arguments as write_videofile,
+    write_audiofile or write_gif. Poll get_job_status for progress."""
+    if kind not in WRITERS:
+        raise ValueError(f"Unknown render kind: {kind}. Use one of {sorted(WRITERS)}.")
+    filename = validate_path(filename)
+    # Render from a private copy of the graph so the job never shares ffmpeg readers with other tools
+    shared = get_node(clip_id)
+    node = detach(shared)
+    try:
+        writer = WRITERS[kind](node, filename, **(options or {}))
+    except TypeError as e:
+        raise ValueError(f"Invalid options for {kind} render: {e}")
+
+    def render(logger, partial):
+        try:
+            writer(logger, partial)
+        finally:
+            if node is not shared:
+                close_sources(node)
+
+    return JOBS.submit(kind, filename, render).id
+
+@mcp.tool
+def get_job_status(job_id: str) -> dict:
+    """Report status, frames done, current fps, ETA and output path of a render job."""
+    return JOBS.get(job_id).status_dict()
+
+@mcp.tool
+def cancel_job(job_id: str) -> dict:
+    """Cancel a queued or running render job. Partially written output is removed."""
+    return JOBS.cancel(job_id).status_dict()
+
+@mcp.tool
+def list_jobs() -> dict:
+    """Lists all render jobs and their status."""
+    return {job_id: job.status for job_id, job in JOBS.jobs.items()}
+
+# --- Render Graph Builders ---
+# Derived clips are stored as RenderNodes and only built when frames are needed.
+# Each builder is called as build(*parent_clips, **params) (see render_graph.py).
+
+def _load_video_file(filename, audio, fps_source, target_resolution):
+    return DECODERS.open(
+        media_key(filename, target_resolution, audio, fps_source),
+        lambda: VideoFileClip(filename=filename, audio=audio, fps_source=fps_source, target_resolution=target_resolution)
+    )
+
+def _load_audio_file(filename, buffersize):
+    return DECODERS.open(
+        media_key(filename, "audio", buffersize),
+        lambda: AudioFileClip(filename=filename, buffersize=buffersize)
+    )
+
+def _image_clip(img, duration=None, transparent=True):
+    return ImageClip(img=img, duration=duration, transparent=transparent)
+
+def _image_sequence_clip(sequence, fps, durations, with_mask):
+    return ImageSequenceClip(sequence, fps=fps, durations=durations, with_mask=with_mask)
+
+def _text_clip(**params):
+    return TextClip(**params)
+
+def _color_clip(size, color, duration):
+    return ColorClip(size=size, color=np.array(color, dtype=np.uint8), duration=duration)
+
+def _with_effects(clip, effects):
+    return clip.with_effects(effects)
+
+def _apply_effect(clip, effect):
+    return effect.apply(clip)
+
+def _with_position(clip, pos, relative):
+    return clip.with_position(pos, relative=relative)
+
+def _with_audio(clip, audio):
+    return clip.with_audio(audio)
+
+def _with_mask(clip, mask):
+    return clip.with_mask(mask)
+
+def _with_start(clip, t):
+    return clip.with_start(t)
+
+def _with_end(clip, t):
+    return clip.with_end(t)
+
+def _with_duration(clip, t):
+    return clip.with_duration(t)
+
+def _subclipped(clip, start_time, end_time):
+    return clip.subclipped(start_time, end_time)
+
+def _composite_video(*clips, size, bg_color, use_bgclip):
+    return CompositeVideoClip(clips=list(clips), size=size, bg_color=bg_color, use_bgclip=use_bgclip)
+
+def _clips_array(*clips, row_lengths, bg_color):
+    rows, i = [], 0
+    for n in row_lengths:
+        rows.append(list(clips[i:i + n]))
+        i += n
+    return clips_array(rows, bg_color=bg_color)
+
+def _concatenate_video(*clips, method, transition):
+    return concatenate_videoclips(list(clips), method=method, transition=transition)
+
+def _composite_audio(*clips):
+    return CompositeAudioClip(list(clips))
+
+def _concatenate_audio(*clips):
+    return concatenate_audioclips(list(clips))
+
+def _freeze_region(clip, mask=None, *, t, region, outside_region):
+    return clip.with_effects([vfx.FreezeRegion(t, region, outside_region, mask)])
+
+def _masks_and(clip, other):
+    return clip.with_effects([vfx.MasksAnd(other)])
+
+def _masks_or(clip, other):
+    return clip.with_effects([vfx.MasksOr(other)])
+
+def _numexpr_func(code):
+    return lambda t: float(numexpr.evaluate(code, local_dict={"t": t}))
+
+def _head_blur(clip, fx_code, fy_code, radius, intensity):
+    fx, fy = _numexpr_func(fx_code), _numexpr_func(fy_code)
+    return clip.with_effects([vfx.HeadBlur(fx, fy, radius, intensity)])
+
 # --- Video IO ---
 
 @mcp.tool
@@ -97,13 +339,30 @@ def video_file_clip(filename: str, audio: bool = True, fps_source: str = "fps",
     filename = validate_path(filename)
     if not os.path.exists(filename):
         raise FileNotFoundError(f"File {filename} not found.")
-    clip = VideoFileClip(
+    params = dict(
         filename=filename,
         audio=audio,
         fps_source=fps_source,
         target_resolution=tuple(target_resolution) if target_resolution else None
     )
-    return register_clip(clip)
+    return register_source(_load_video_file(**params), _load_video_file, **params)
+
+@mcp.tool
+def scan_media_dir(directory: str, recursive: bool = True, workers: int = 4, keyframes: bool = True) -> dict:
+    """
+    Probes every media file under a directory in parallel and stores the results (duration, fps, size, rotation,
+    audio layout and, with keyframes, keyframe times) in the persistent metadata index, so later loads skip probing.
+    Files already indexed and unchanged are skipped.
+    """
+    directory = validate_path(directory)
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"Directory {directory} not found.")
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
+    start = time.perf_counter()
+    result = MEDIA_INDEX.scan(directory, recursive=recursive, workers=workers, keyframes=keyframes)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
 
 @mcp.tool
 def image_clip(filename: str, duration: float = None, transparent: bool = True) -> str:
@@ -113,8 +372,8 @@ def image_clip(filename: str, duration: float = None, transparent: bool = True)
         raise FileNotFoundError(f"File {filename} not found.")
     if duration is not None and duration <= 0:
         raise ValueError("Duration must be positive.")
-    clip = ImageClip(img=filename, duration=duration, transparent=transparent)
-    return register_clip(clip)
+    params = dict(img=filename, duration=duration, transparent=transparent)
+    return register_source(_image_clip(**params), _image_clip, **params)
 
 @mcp.tool
 def image_sequence_clip(sequence: list[str], fps: float = None, durations: list[float] = None, with_mask: bool = True) -> str:
@@ -122,12 +381,11 @@ def image_sequence_clip(sequence: list[str], fps: float = None, durations: list[
     if not sequence:
         raise ValueError("Sequence cannot be empty.")
     if len(sequence) == 1 and os.path.isdir(sequence[0]):
-        path = validate_path(sequence[0])
-        clip = ImageSequenceClip(path, fps=fps, durations=durations, with_mask=with_mask)
+        seq = validate_path(sequence[0])
     else:
         seq = [validate_path(s) for s in sequence]
-        clip = ImageSequenceClip(seq, fps=fps, durations=durations, with_mask=with_mask)
-    return register_clip(clip)
+    params = dict(sequence=seq, fps=fps, durations=durations, with_mask=with_mask)
+    return register_source(_image_sequence_clip(**params), _image_sequence_clip, **params)
 
 @mcp.tool
 def text_clip(
@@ -143,22 +401,23 @@ def text_clip(
     """Create a text clip."""
     if duration is not None and duration <= 0:
         raise ValueError("Duration must be positive.")
+    params = dict(
+        text=text,
+        font=font,
+        font_size=font_size,
+        color=color,
+        bg_color=bg_color,
+        size=tuple(size) if size else None,
+        method=method,
+        duration=duration
+    )
     try:
-        clip = TextClip(
-            text=text,
-            font=font,
-            font_size=font_size,
-            color=color,
-            bg_color=bg_color,
-            size=tuple(size) if size else None,
-            method=method,
-            duration=duration
-        )
+        clip = _text_clip(**params)
     except Exception as e:
         if "ImageMagick" in str(e) or "convert" in str(e):
             raise RuntimeError("ImageMagick is required for TextClip. Please ensure it is installed and configured.")
         raise
-    return register_clip(clip)
+    return register_source(clip, _text_clip, **params)
 
 @mcp.tool
 def color_clip(size: list[int], color: list[int], duration: float = None) -> str:
@@ -167,8 +426,8 @@ def color_clip(size: list[int], color: list[int], duration: float = None) -> str
         raise ValueError("Duration must be positive.")
     if not size or len(size) != 2 or any(s <= 0 for s in size):
         raise ValueError("Size must be a list of two positive integers.")
-    clip = ColorClip(size=tuple(size), color=np.array(color, dtype=np.uint8), duration=duration)
-    return register_clip(clip)
+    params = dict(size=tuple(size), color=list(color), duration=duration)
+    return register_source(_color_clip(**params), _color_clip, **params)
 
 @mcp.tool
 def credits_clip(
@@ -217,27 +476,29 @@ def write_videofile(
     bitrate: str = None,
     preset: str = "medium",
     threads: int = None,
-    ffmpeg_params: list[str] = None
+    ffmpeg_params: list[str] = None,
+    parallel_workers: int = None,
+    chunk_seconds: float = 10.0
 ) -> str:
-    """Write a video clip to a file."""
+    """Write a video clip to a file.
+    Set parallel_workers > 1 to render ~chunk_seconds long segments in separate processes
+    and join them without re-encoding."""
     filename = validate_path(filename)
-    validate_ffmpeg_params(ffmpeg_params)
-    clip = get_clip(clip_id)
-    clip.write_videofile(
-        filename=filename,
-        fps=fps,
-        codec=codec,
-        audio_codec=audio_codec,
-        bitrate=bitrate,
-        preset=preset,
-        threads=threads,
-        ffmpeg_params=ffmpeg_params
-    )
+    video_writer(
+        get_node(clip_id), filename, fps, codec, audio_codec, bitrate, preset, threads,
+        ffmpeg_params, parallel_workers, chunk_seconds
+    )("bar")
     return f"Successfully wrote video to {filename}"
 
 @mcp.tool
-def tools_ffmpeg_extract_subclip(filename: str, start_time: float, end_time: float, targetname: str = None) -> str:
-    """Fast extraction of a subclip using ffmpeg (no decoding)."""
+def tools_ffmpeg_extract_subclip(
+    filename: str, start_time: float, end_time: float, targetname: str = None, smart_cut: bool = False
+) -> str:
+    """
+    Fast extraction of a subclip using ffmpeg. By default a stream copy (no decoding), which starts
+    on the keyframe before start_time. smart_cut=True cuts on the exact frames by re-encoding only
+    the partial GOPs at both ends and stream-copying the rest.
+    """
     filename = validate_path(filename)
     if not os.path.exists(filename):
         raise FileNotFoundError(f"File {filename} not found.")
@@ -245,8 +506,19 @@ def tools_ffmpeg_extract_subclip(filename: str, start_time: float, end_time: flo
         targetname = validate_path(targetname)
     if start_time >= end_time:
         raise ValueError("start_time must be less than end_time")
-    ffmpeg_extract_subclip(filename, start_time, end_time, outputfile=targetname)
-    return f"Extracted subclip to {targetname}"
+    if not smart_cut:
+        ffmpeg_extract_subclip(filename, start_time, end_time, outputfile=targetname)
+        return f"Extracted subclip to {targetname}"
+    if not targetname:
+        name, ext = os.path.splitext(filename)
+        targetname = "%sSUB%d_%d%s" % (name, int(1000 * start_time), int(1000 * end_time), ext)
+    result = cut_subclip(
+        filename, start_time, end_time, targetname, MEDIA_INDEX.parse_infos(filename), MEDIA_INDEX.keyframes(filename)
+    )
+    return (
+        f"Extracted subclip to {targetname} ({result['copied_frames']} of {result['frames']} frames stream-copied, "
+        f"{result['reencoded_frames']} re-encoded)"
+    )
 
 # --- Audio IO ---
 
@@ -256,8 +528,8 @@ def audio_file_clip(filename: str, buffersize: int = 200000) -> str:
     filename = validate_path(filename)
     if not os.path.exists(filename):
         raise FileNotFoundError(f"File {filename} not found.")
-    clip = AudioFileClip(filename=filename, buffersize=buffersize)
-    return register_clip(clip)
+    clip = _load_audio_file(filename, buffersize)
+    return register_source(clip, _load_audio_file, filename=filename, buffersize=buffersize)
 
 @mcp.tool
 def write_audiofile(
@@ -270,14 +542,7 @@ def write_audiofile(
 ) -> str:
     """Write an audio clip to a file."""
     filename = validate_path(filename)
-    clip = get_clip(clip_id)
-    clip.write_audiofile(
-        filename=filename,
-        fps=fps,
-        nbytes=nbytes,
-        codec=codec,
-        bitrate=bitrate
-    )
+    audio_writer(get_node(clip_id), filename, fps, nbytes, codec, bitrate)("bar")
     return f"Successfully wrote audio to {filename}"
 
 # --- Clip Configuration ---
@@ -285,7 +550,6 @@ def write_audiofile(
 @mcp.tool
 def set_position(clip_id: str, x: int = None, y: int = None, pos_str: str = None, relative: bool = False) -> str:
     """Set clip position. Use x/y for pixels, or pos_str for 'center', 'left', etc."""
-    clip = get_clip(clip_id)
     if pos_str:
         pos = pos_str
     elif x is not None and y is not None:
@@ -296,64 +560,53 @@ def set_position(clip_id: str, x: int = None, y: int = None, pos_str: str = None
         pos = ("center", y)
     else:
         raise ValueError("Provide x, y, or pos_str")
-    return register_clip(clip.with_position(pos, relative=relative))
+    return derive_clip("set_position", _with_position, [clip_id], pos=pos, relative=relative)
 
 @mcp.tool
 def set_audio(clip_id: str, audio_clip_id: str) -> str:
     """Set the audio of a video clip."""
-    clip = get_clip(clip_id)
-    audio = get_clip(audio_clip_id)
-    return register_clip(clip.with_audio(audio))
+    return derive_clip("set_audio", _with_audio, [clip_id, audio_clip_id])
 
 @mcp.tool
 def set_mask(clip_id: str, mask_clip_id: str) -> str:
     """Set the mask of a clip."""
-    clip = get_clip(clip_id)
-    mask = get_clip(mask_clip_id)
-    return register_clip(clip.with_mask(mask))
+    return derive_clip("set_mask", _with_mask, [clip_id, mask_clip_id])
 
 @mcp.tool
 def set_start(clip_id: str, t: float) -> str:
     """Set clip start time."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_start(t))
+    return derive_clip("set_start", _with_start, [clip_id], t=t)
 
 @mcp.tool
 def set_end(clip_id: str, t: float) -> str:
     """Set clip end time."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_end(t))
+    return derive_clip("set_end", _with_end, [clip_id], t=t)
 
 @mcp.tool
 def set_duration(clip_id: str, t: float) -> str:
     """Set clip duration."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_duration(t))
+    return derive_clip("set_duration", _with_duration, [clip_id], t=t)
 
 # --- Transformations & Compositing ---
 
 @mcp.tool
 def subclip(clip_id: str, start_time: float = 0, end_time: float = None) -> str:
     """Cut a clip."""
-    clip = get_clip(clip_id)
     if end_time is not None and start_time >= end_time:
         raise ValueError("start_time must be less than end_time")
-    new_clip = clip.subclipped(start_time, end_time)
-    return register_clip(new_clip)
+    return derive_clip("subclip", _subclipped, [clip_id], start_time=start_time, end_time=end_time)
 
 @mcp.tool
 def composite_video_clips(clip_ids: list[str], size: list[int] = None, bg_color: list[int] = None, use_bgclip: bool = False) -> str:
     """Compose multiple clips."""
     if not clip_ids:
         raise ValueError("At least one clip_id must be provided.")
-    clips = [get_clip(cid) for cid in clip_ids]
-    comp_clip = CompositeVideoClip(
-        clips=clips,
+    return derive_clip(
+        "composite_video_clips", _composite_video, clip_ids,
         size=tuple(size) if size else None,
         bg_color=tuple(bg_color) if bg_color else None,
         use_bgclip=use_bgclip
     )
-    return register_clip(comp_clip)
 
 @mcp.tool
 def tools_clips_array(clip_ids_rows: list[list[str]], bg_color: list[int] = None) -> str:
@@ -367,217 +620,182 @@ def tools_clips_array(clip_ids_rows: list[list[str]], bg_color: list[int] = None
         # MoviePy's clips_array might fail or produce weird results if not consistent and no bg
         pass
 
-    clips = [[get_clip(cid) for cid in row] for row in clip_ids_rows]
-    comp_clip = clips_array(
-        clips,
+    return derive_clip(
+        "tools_clips_array", _clips_array, [cid for row in clip_ids_rows for cid in row],
+        row_lengths=row_lengths,
         bg_color=tuple(bg_color) if bg_color else None
     )
-    return register_clip(comp_clip)
 
 @mcp.tool
 def concatenate_video_clips(clip_ids: list[str], method: str = "chain", transition: str = None) -> str:
     """Concatenate multiple clips."""
     if not clip_ids:
         raise ValueError("At least one clip_id must be provided.")
-    clips = [get_clip(cid) for cid in clip_ids]
-    concat_clip = concatenate_videoclips(clips, method=method, transition=transition)
-    return register_clip(concat_clip)
+    return derive_clip("concatenate_video_clips", _concatenate_video, clip_ids, method=method, transition=transition)
 
 @mcp.tool
 def composite_audio_clips(clip_ids: list[str]) -> str:
     """Compose multiple audio clips."""
-    clips = [get_clip(cid) for cid in clip_ids]
-    comp_clip = CompositeAudioClip(clips)
-    return register_clip(comp_clip)
+    return derive_clip("composite_audio_clips", _composite_audio, clip_ids)
 
 @mcp.tool
 def concatenate_audio_clips(clip_ids: list[str]) -> str:
     """Concatenate multiple audio clips."""
-    clips = [get_clip(cid) for cid in clip_ids]
-    concat_clip = concatenate_audioclips(clips)
-    return register_clip(concat_clip)
+    return derive_clip("concatenate_audio_clips", _concatenate_audio, clip_ids)
 
 # --- Video Effects ---
 
 @mcp.tool
 def vfx_accel_decel(clip_id: str, new_duration: float = None, abruptness: float = 1.0, soonness: float = 1.0) -> str:
     """Accelerate/Decelerate clip."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.AccelDecel(new_duration, abruptness, soonness)]))
+    return apply_effects("vfx_accel_decel", clip_id, [vfx.AccelDecel(new_duration, abruptness, soonness)])
 
 @mcp.tool
 def vfx_black_white(clip_id: str) -> str:
     """Convert to black and white."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.BlackAndWhite()]))
+    return apply_effects("vfx_black_white", clip_id, [vfx.BlackAndWhite()], pixel=True)
 
 @mcp.tool
 def vfx_blink(clip_id: str, duration_on: float, duration_off: float) -> str:
     """Make clip blink."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Blink(duration_on, duration_off)]))
+    return apply_effects("vfx_blink", clip_id, [vfx.Blink(duration_on, duration_off)])
 
 @mcp.tool
 def vfx_crop(clip_id: str, x1: int = None, y1: int = None, x2: int = None, y2: int = None, width: int = None, height: int = None, x_center: int = None, y_center: int = None) -> str:
     """Crop clip."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Crop(x1, y1, x2, y2, width, height, x_center, y_center)]))
+    return apply_effects("vfx_crop", clip_id, [vfx.Crop(x1, y1, x2, y2, width, height, x_center, y_center)])
 
 @mcp.tool
 def vfx_cross_fade_in(clip_id: str, duration: float) -> str:
     """Cross fade in."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.CrossFadeIn(duration)]))
+    return apply_effects("vfx_cross_fade_in", clip_id, [vfx.CrossFadeIn(duration)])
 
 @mcp.tool
 def vfx_cross_fade_out(clip_id: str, duration: float) -> str:
     """Cross fade out."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.CrossFadeOut(duration)]))
+    return apply_effects("vfx_cross_fade_out", clip_id, [vfx.CrossFadeOut(duration)])
 
 @mcp.tool
 def vfx_even_size(clip_id: str) -> str:
     """Make dimensions even."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.EvenSize()]))
+    return apply_effects("vfx_even_size", clip_id, [vfx.EvenSize()])
 
 @mcp.tool
 def vfx_fade_in(clip_id: str, duration: float) -> str:
     """Fade in from black."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.FadeIn(duration)]))
+    return apply_effects("vfx_fade_in", clip_id, [vfx.FadeIn(duration)])
 
 @mcp.tool
 def vfx_fade_out(clip_id: str, duration: float) -> str:
     """Fade out to black."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.FadeOut(duration)]))
+    return apply_effects("vfx_fade_out", clip_id, [vfx.FadeOut(duration)])
 
 @mcp.tool
 def vfx_freeze(clip_id: str, t: float = 0, freeze_duration: float = None, total_duration: float = None, padding: float = 0) -> str:
     """Freeze a frame."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Freeze(t, freeze_duration, total_duration, padding)]))
+    return apply_effects("vfx_freeze", clip_id, [vfx.Freeze(t, freeze_duration, total_duration, padding)])
 
 @mcp.tool
 def vfx_freeze_region(clip_id: str, t: float = 0, region: list[int] = None, outside_region: list[int] = None, mask_clip_id: str = None) -> str:
     """Freeze a region."""
-    clip = get_clip(clip_id)
-    mask = get_clip(mask_clip_id) if mask_clip_id else None
-    return register_clip(clip.with_effects([vfx.FreezeRegion(t, tuple(region) if region else None, tuple(outside_region) if outside_region else None, mask)]))
+    return derive_clip(
+        "vfx_freeze_region", _freeze_region, [clip_id, mask_clip_id] if mask_clip_id else [clip_id],
+        t=t,
+        region=tuple(region) if region else None,
+        outside_region=tuple(outside_region) if outside_region else None
+    )
 
 @mcp.tool
 def vfx_gamma_correction(clip_id: str, gamma: float) -> str:
     """Gamma correction."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.GammaCorrection(gamma)]))
+    return apply_effects("vfx_gamma_correction", clip_id, [vfx.GammaCorrection(gamma)], pixel=True)
 
 @mcp.tool
 def vfx_head_blur(clip_id: str, fx_code: str, fy_code: str, radius: float, intensity: float = None) -> str:
     """Blur moving head (requires math expressions for fx/fy positions, e.g., '100 + 50*t')."""
-    def safe_eval_func(code):
+    for code in (fx_code, fy_code):
         # Test once to see if it's a valid expression
         try:
             numexpr.evaluate(code, local_dict={"t": 0})
         except Exception as e:
             raise ValueError(f"Invalid math expression '{code}': {e}")
-        return lambda t: float(numexpr.evaluate(code, local_dict={"t": t}))
-    fx = safe_eval_func(fx_code)
-    fy = safe_eval_func(fy_code)
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.HeadBlur(fx, fy, radius, intensity)]))
+    return derive_clip("vfx_head_blur", _head_blur, [clip_id], fx_code=fx_code, fy_code=fy_code, radius=radius, intensity=intensity)
 
 @mcp.tool
 def vfx_invert_colors(clip_id: str) -> str:
     """Invert colors."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.InvertColors()]))
+    return apply_effects("vfx_invert_colors", clip_id, [vfx.InvertColors()], pixel=True)
 
 @mcp.tool
 def vfx_loop(clip_id: str, n: int = None, duration: float = None) -> str:
     """Loop clip."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Loop(n, duration)]))
+    return apply_effects("vfx_loop", clip_id, [vfx.Loop(n, duration)])
 
 @mcp.tool
 def vfx_lum_contrast(clip_id: str, lum: float = 0, contrast: float = 0, contrast_threshold: float = 127) -> str:
     """Luminosity contrast."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.LumContrast(lum, contrast, contrast_threshold)]))
+    return apply_effects("vfx_lum_contrast", clip_id, [vfx.LumContrast(lum, contrast, contrast_threshold)], pixel=True)
 
 @mcp.tool
-def vfx_make_loopable(clip_id: str, overlap_duration: float) -> str:
-    """Make clip loopable with fade."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.MakeLoopable(overlap_duration)]))
+def vfx_make_loopable(clip_id: str, overlap_duration: float, buffer_frames: int = 0) -> str:
+    """Make clip loopable with fade. buffer_frames > 0 keeps that many decoded source frames in a ring buffer."""
+    buffer = [FrameBuffer(buffer_frames)] if buffer_frames > 0 else []
+    return apply_effects("vfx_make_loopable", clip_id, buffer + [vfx.MakeLoopable(overlap_duration)])
 
 @mcp.tool
 def vfx_margin(clip_id: str, margin: int, color: list[int] = (0, 0, 0)) -> str:
     """Add margin."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Margin(margin, color=tuple(color))]))
+    return apply_effects("vfx_margin", clip_id, [vfx.Margin(margin, color=tuple(color))])
 
 @mcp.tool
 def vfx_mask_color(clip_id: str, color: list[int] = (0, 0, 0), threshold: float = 0, stiffness: float = 1) -> str:
     """Mask color."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.MaskColor(tuple(color), threshold, stiffness)]))
+    return apply_effects("vfx_mask_color", clip_id, [vfx.MaskColor(tuple(color), threshold, stiffness)])
 
 @mcp.tool
 def vfx_masks_and(clip_id: str, other_clip_id: str) -> str:
     """Logical AND of masks."""
-    clip = get_clip(clip_id)
-    other = get_clip(other_clip_id)
-    return register_clip(clip.with_effects([vfx.MasksAnd(other)]))
+    return derive_clip("vfx_masks_and", _masks_and, [clip_id, other_clip_id])
 
 @mcp.tool
 def vfx_masks_or(clip_id: str, other_clip_id: str) -> str:
     """Logical OR of masks."""
-    clip = get_clip(clip_id)
-    other = get_clip(other_clip_id)
-    return register_clip(clip.with_effects([vfx.MasksOr(other)]))
+    return derive_clip("vfx_masks_or", _masks_or, [clip_id, other_clip_id])
 
 @mcp.tool
 def vfx_mirror_x(clip_id: str) -> str:
     """Mirror X."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.MirrorX()]))
+    return apply_effects("vfx_mirror_x", clip_id, [vfx.MirrorX()])
 
 @mcp.tool
 def vfx_mirror_y(clip_id: str) -> str:
     """Mirror Y."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.MirrorY()]))
+    return apply_effects("vfx_mirror_y", clip_id, [vfx.MirrorY()])
 
 @mcp.tool
 def vfx_multiply_color(clip_id: str, factor: float) -> str:
     """Multiply color."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.MultiplyColor(factor)]))
+    return apply_effects("vfx_multiply_color", clip_id, [vfx.MultiplyColor(factor)], pixel=True)
 
 @mcp.tool
 def vfx_multiply_speed(clip_id: str, factor: float) -> str:
     """Multiply speed."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.MultiplySpeed(factor)]))
+    return apply_effects("vfx_multiply_speed", clip_id, [vfx.MultiplySpeed(factor)])
 
 @mcp.tool
 def vfx_painting(clip_id: str, saturation: float = 1.4, black: float = 0.006) -> str:
     """Painting effect."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Painting(saturation, black)]))
+    return apply_effects("vfx_painting", clip_id, [vfx.Painting(saturation, black)], pixel=True)
 
 @mcp.tool
 def vfx_quad_mirror(clip_id: str, x: int = None, y: int = None) -> str:
     """Apply quad mirror effect with custom axes."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([QuadMirror(x, y)]))
+    return apply_effects("vfx_quad_mirror", clip_id, [QuadMirror(x, y)])
 
 @mcp.tool
 def vfx_chroma_key(clip_id: str, color: list[int] = (0, 255, 0), threshold: float = 50, softness: float = 20) -> str:
     """Apply an advanced Chroma Key effect to create transparency."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([ChromaKey(tuple(color), threshold, softness)]))
+    return apply_effects("vfx_chroma_key", clip_id, [ChromaKey(tuple(color), threshold, softness)])
 
 @mcp.tool
 def vfx_rgb_sync(
@@ -587,20 +805,19 @@ def vfx_rgb_sync(
     b_offset: list[int] = (0, 0),
     r_time_offset: float = 0.0,
     g_time_offset: float = 0.0,
-    b_time_offset: float = 0.0
+    b_time_offset: float = 0.0,
+    mode: str = "wrap"
 ) -> str:
-    """Apply an RGB sync/split effect with spatial and temporal offsets."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([RGBSync(
+    """Apply an RGB sync/split effect with spatial and temporal offsets. Mode is 'wrap' or 'clamp' at the edges."""
+    return apply_effects("vfx_rgb_sync", clip_id, [RGBSync(
         tuple(r_offset), tuple(g_offset), tuple(b_offset),
-        r_time_offset, g_time_offset, b_time_offset
-    )]))
+        r_time_offset, g_time_offset, b_time_offset, mode
+    )])
 
 @mcp.tool
-def vfx_kaleidoscope(clip_id: str, n_slices: int = 6, x: int = None, y: int = None) -> str:
-    """Apply a kaleidoscope effect with radial symmetry."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([Kaleidoscope(n_slices, x, y)]))
+def vfx_kaleidoscope(clip_id: str, n_slices: int = 6, x: int = None, y: int = None, bilinear: bool = False) -> str:
+    """Apply a kaleidoscope effect with radial symmetry. Set bilinear for smoother edges."""
+    return apply_effects("vfx_kaleidoscope", clip_id, [Kaleidoscope(n_slices, x, y, bilinear)])
 
 @mcp.tool
 def vfx_matrix(
@@ -610,23 +827,37 @@ def vfx_matrix(
     chars: str = "0123456789ABCDEF",
     color: str = "green",
     font_size: int = 16,
-    seed: int = 42
+    seed: int = 42,
+    brightness_levels: int = None
 ) -> str:
-    """Apply a Matrix-style digital rain effect with scrolling characters."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([Matrix(speed, density, chars, color, font_size, seed)]))
+    """Apply a Matrix-style digital rain effect with scrolling characters.
+    brightness_levels (2-359) prebakes colored glyphs for faster rendering; 359 is exact,
+    fewer levels use less memory (about levels * len(chars) * font_size^2 * 3.9 bytes)."""
+    effect = Matrix(speed, density, chars, color, font_size, seed, brightness_levels=brightness_levels)
+    return apply_effects("vfx_matrix", clip_id, [effect])
 
 @mcp.tool
-def vfx_auto_framing(clip_id: str, target_aspect_ratio: float = 9/16, smoothing: float = 0.9) -> str:
-    """Automatically crops and centers the frame on a detected face or subject."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([AutoFraming(target_aspect_ratio, smoothing)]))
+def vfx_auto_framing(
+    clip_id: str,
+    target_aspect_ratio: float = 9/16,
+    smoothing: float = 0.9,
+    detect_every: int = 1,
+    detect_scale: float = 1.0,
+    analysis_fps: float = 10
+) -> str:
+    """Automatically crops and centers the frame on a detected face or subject.
+    The clip is scanned once at analysis_fps to build a smoothed crop path.
+    detect_every > 1 detects faces every N frames and tracks them with optical flow in between;
+    detect_scale < 1 runs detection on a downscaled frame. Both speed up long renders."""
+    effect = AutoFraming(
+        target_aspect_ratio, smoothing, detect_every=detect_every, detect_scale=detect_scale, analysis_fps=analysis_fps
+    )
+    return apply_effects("vfx_auto_framing", clip_id, [effect])
 
 @mcp.tool
 def vfx_clone_grid(clip_id: str, n_clones: int = 4) -> str:
     """Creates a grid of clones of the original clip (e.g., 2, 4, 8, 16, 32, 64)."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([CloneGrid(n_clones)]))
+    return apply_effects("vfx_clone_grid", clip_id, [CloneGrid(n_clones)])
 
 @mcp.tool
 def vfx_rotating_cube(
@@ -639,27 +870,24 @@ def vfx_rotating_cube(
     motion_speed: float = 20
 ) -> str:
     """Simulates a 3D rotating cube effect with the video mapped to its faces."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([RotatingCube(
+    return apply_effects("vfx_rotating_cube", clip_id, [RotatingCube(
         speed_x=speed_x, 
         speed_y=speed_y, 
         zoom=zoom, 
         mirror=mirror,
         motion_radius=motion_radius,
         motion_speed=motion_speed
-    )]))
+    )])
 
 @mcp.tool
 def vfx_kaleidoscope_cube(clip_id: str, kaleidoscope_params: dict = None, cube_params: dict = None) -> str:
     """Apply a KaleidoscopeCube effect."""
-    clip = get_clip(clip_id)
     effect = KaleidoscopeCube(kaleidoscope_params=kaleidoscope_params, cube_params=cube_params)
-    return register_clip(effect.apply(clip))
+    return derive_clip("vfx_kaleidoscope_cube", _apply_effect, [clip_id], effect=effect)
 
 @mcp.tool
 def vfx_resize(clip_id: str, width: int = None, height: int = None, scale: float = None) -> str:
     """Resize clip."""
-    clip = get_clip(clip_id)
     if scale is not None:
         effect = vfx.Resize(scale)
     elif width is not None and height is not None:
@@ -670,93 +898,80 @@ def vfx_resize(clip_id: str, width: int = None, height: int = None, scale: float
         effect = vfx.Resize(height=height)
     else:
         raise ValueError("Provide scale, width, or height.")
-    return register_clip(clip.with_effects([effect]))
+    return apply_effects("vfx_resize", clip_id, [effect])
 
 @mcp.tool
 def vfx_rotate(clip_id: str, angle: float, unit: str = "deg", resample: str = "bicubic", expand: bool = True) -> str:
     """Rotate clip."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Rotate(angle, unit=unit, resample=resample, expand=expand)]))
+    return apply_effects("vfx_rotate", clip_id, [vfx.Rotate(angle, unit=unit, resample=resample, expand=expand)])
 
 @mcp.tool
 def vfx_scroll(clip_id: str, w: int = None, h: int = None, x_speed: float = 0, y_speed: float = 0, x_start: float = 0, y_start: float = 0) -> str:
     """Scroll clip."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.Scroll(w, h, x_speed, y_speed, x_start, y_start)]))
+    return apply_effects("vfx_scroll", clip_id, [vfx.Scroll(w, h, x_speed, y_speed, x_start, y_start)])
 
 @mcp.tool
 def vfx_slide_in(clip_id: str, duration: float, side: str) -> str:
     """Slide in."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.SlideIn(duration, side)]))
+    return apply_effects("vfx_slide_in", clip_id, [vfx.SlideIn(duration, side)])
 
 @mcp.tool
 def vfx_slide_out(clip_id: str, duration: float, side: str) -> str:
     """Slide out."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.SlideOut(duration, side)]))
+    return apply_effects("vfx_slide_out", clip_id, [vfx.SlideOut(duration, side)])
 
 @mcp.tool
-def vfx_supersample(clip_id: str, d: float, nframes: int) -> str:
-    """Supersample."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.SuperSample(d, nframes)]))
+def vfx_supersample(clip_id: str, d: float, nframes: int, buffer_frames: int = 0) -> str:
+    """Supersample. buffer_frames > 0 keeps that many decoded source frames in a ring buffer."""
+    buffer = [FrameBuffer(buffer_frames)] if buffer_frames > 0 else []
+    return apply_effects("vfx_supersample", clip_id, buffer + [vfx.SuperSample(d, nframes)])
 
 @mcp.tool
 def vfx_time_mirror(clip_id: str) -> str:
     """Time mirror."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.TimeMirror()]))
+    return apply_effects("vfx_time_mirror", clip_id, [vfx.TimeMirror()])
 
 @mcp.tool
 def vfx_time_symmetrize(clip_id: str) -> str:
     """Time symmetrize."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([vfx.TimeSymmetrize()]))
+    return apply_effects("vfx_time_symmetrize", clip_id, [vfx.TimeSymmetrize()])
 
 # --- Audio Effects ---
 
 @mcp.tool
 def afx_audio_delay(clip_id: str, offset: float = 0.2, n_repeats: int = 8, decay: float = 1) -> str:
     """Audio delay."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([afx.AudioDelay(offset, n_repeats, decay)]))
+    return apply_effects("afx_audio_delay", clip_id, [afx.AudioDelay(offset, n_repeats, decay)])
 
 @mcp.tool
 def afx_audio_fade_in(clip_id: str, duration: float) -> str:
     """Audio fade in."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([afx.AudioFadeIn(duration)]))
+    return apply_effects("afx_audio_fade_in", clip_id, [afx.AudioFadeIn(duration)])
 
 @mcp.tool
 def afx_audio_fade_out(clip_id: str, duration: float) -> str:
     """Audio fade out."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([afx.AudioFadeOut(duration)]))
+    return apply_effects("afx_audio_fade_out", clip_id, [afx.AudioFadeOut(duration)])
 
 @mcp.tool
 def afx_audio_loop(clip_id: str, n_loops: int = None, duration: float = None) -> str:
     """Audio loop."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([afx.AudioLoop(n_loops, duration)]))
+    return apply_effects("afx_audio_loop", clip_id, [afx.AudioLoop(n_loops, duration)])
 
 @mcp.tool
 def afx_audio_normalize(clip_id: str) -> str:
     """Audio normalize."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([afx.AudioNormalize()]))
+    return apply_effects("afx_audio_normalize", clip_id, [afx.AudioNormalize()])
 
 @mcp.tool
 def afx_multiply_stereo_volume(clip_id: str, left: float = 1, right: float = 1) -> str:
     """Multiply stereo volume."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([afx.MultiplyStereoVolume(left, right)]))
+    return apply_effects("afx_multiply_stereo_volume", clip_id, [afx.MultiplyStereoVolume(left, right)])
 
 @mcp.tool
 def afx_multiply_volume(clip_id: str, factor: float) -> str:
     """Multiply volume."""
-    clip = get_clip(clip_id)
-    return register_clip(clip.with_effects([afx.MultiplyVolume(factor)]))
+    return apply_effects("afx_multiply_volume", clip_id, [afx.MultiplyVolume(factor)])
 
 # --- Tools ---
 
@@ -785,8 +1000,7 @@ def tools_drawing_color_gradient(size: list[int], p1: list[int], p2: list[int],
         shape=shape,
         offset=offset
     )
-    clip = ImageClip(img)
-    return register_clip(clip)
+    return register_source(_image_clip(img), _image_clip, img=img)
 
 @mcp.tool
 def tools_drawing_color_split(size: list[int], x: int, y: int, p1: list[int], p2: list[int], col1: list[int], col2: list[int], grad_width: int = 0) -> str:
@@ -801,8 +1015,7 @@ def tools_drawing_color_split(size: list[int], x: int, y: int, p1: list[int], p2
         color_2=np.array(col2, dtype=float),
         gradient_width=grad_width
     )
-    clip = ImageClip(img)
-    return register_clip(clip)
+    return register_source(_image_clip(img), _image_clip, img=img)
 
 @mcp.tool
 def tools_file_to_subtitles(filename: str, encoding: str = "utf-8") -> list:
@@ -822,12 +1035,7 @@ def write_gif(
 ) -> str:
     """Write a video clip to a GIF file."""
     filename = validate_path(filename)
-    clip = get_clip(clip_id)
-    clip.write_gif(
-        filename,
-        fps=fps,
-        loop=loop
-    )
+    gif_writer(get_node(clip_id), filename, fps, loop)("bar")
     return f"Successfully wrote GIF to {filename}"
 
 @mcp.tool
@@ -0,0 +1,196 @@
+"""
+Persistent media metadata index.
+
+MoviePy probes a file with ffmpeg every time a reader is opened. Once
+installed, the index answers those probes from a SQLite database keyed on
+(resolved path, mtime, size), so a file is only probed again after it
+changed, including across server restarts. Keyframe times of the first
+video stream are stored alongside, listed by demuxing the file without
+decoding it.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import threading
+
+DEFAULT_PATH = os.environ.get(
+    "MCP_MOVIEPY_MEDIA_INDEX", os.path.join(os.path.expanduser("~"), ".cache", "mcp-moviepy", "media_index.sqlite")
+)
+MEDIA_EXTENSIONS = {
+    ".mp4", ".mov", ".m4v", ".mkv", ".webm", ".avi", ".mpg", ".mpeg", ".ts", ".mts", ".flv", ".wmv", ".gif",
+    ".mp3", ".wav", ".m4a", ".aac", ".flac", ".ogg", ".opus",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    path TEXT NOT NULL, options TEXT NOT NULL, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, infos TEXT NOT NULL,
+    PRIMARY KEY (path, options)
+);
+CREATE TABLE IF NOT EXISTS keyframes (
+    path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, times TEXT NOT NULL
+);
+"""
+_TIME_BASE = re.compile(r"^#tb 0: (\d+)/(\d+)")
+
+
+def _options(check_duration=True, fps_source="fps", decode_file=False):
+    return json.dumps([check_duration, fps_source, decode_file])
+
+
+def _stat(filename):
+    st = os.stat(filename)
+    return os.path.realpath(filename), st.st_mtime_ns, st.st_size
+
+
+def parse_keyframes(framecrc):
+    """Keyframe times (seconds) in the output of ffmpeg's framecrc muxer for one stream."""
+    time_base, times = None, []
+    for line in framecrc.splitlines():
+        if line.startswith("#"):
+            match = _TIME_BASE.match(line)
+            if match:
+                time_base = int(match.group(1)) / int(match.group(2))
+            continue
+        # stream, dts, pts, duration, size, hash[, F=flags]; flags are only printed when not exactly "key"
+        fields = [f.strip() for f in line.split(",")]
+        flags = next((f[2:] for f in fields[6:] if f.startswith("F=")), None)
+        if time_base is not None and (flags is None or int(flags, 16) & 1):
+            times.append(round(int(fields[2]) * time_base, 6))
+    return sorted(times)
+
+
+def list_keyframes(filename):
+    """Keyframe times of the first video stream, from a stream copy of its packets (nothing is decoded)."""
+    from moviepy.config import FFMPEG_BINARY
+
+    out = subprocess.run(
+        [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-i", filename,
+         "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"],
+        capture_output=True, text=True, check=True, stdin=subprocess.DEVNULL,
+    ).stdout
+    return parse_keyframes(out)
+
+
+class MediaIndex:
+    """
+    SQLite-backed cache of ffmpeg probe results and keyframe times.
+
+    Parameters:
+    -----------
+    path : str
+        Database file, created on first use. ":memory:" keeps it in memory.
+    """
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+        # MoviePy's own ffmpeg_parse_infos
+        self._probe = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        if self._db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            if self.path != ":memory:":
+                # Render worker processes share the file
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def _lookup(self, table, path, mtime_ns, size, options=None):
+        column = "infos" if table == "probes" else "times"
+        query = f"SELECT {column} FROM {table} WHERE path = ? AND mtime_ns = ? AND size = ?"
+        args = [path, mtime_ns, size]
+        if options is not None:
+            query += " AND options = ?"
+            args.append(options)
+        with self._lock:
+            row = self._connect().execute(query, args).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _store(self, table, row):
+        with self._lock:
+            db = self._connect()
+            db.execute(f"INSERT OR REPLACE INTO {table} VALUES ({', '.join('?' * len(row))})", row)
+            db.commit()
+
+    def parse_infos(self, filename, check_duration=True, fps_source="fps", decode_file=False, print_infos=False):
+        """Drop-in replacement for MoviePy's ffmpeg_parse_infos that answers from the index when it can."""
+        path, mtime_ns, size = _stat(filename)
+        options = _options(check_duration, fps_source, decode_file)
+        infos = self._lookup("probes", path, mtime_ns, size, options)
+        if infos is not None:
+            self.hits += 1
+            return infos
+        self.misses += 1
+        infos = self._original_probe()(
+            filename, check_duration=check_duration, fps_source=fps_source, decode_file=decode_file,
+            print_infos=print_infos
+        )
+        self._store("probes", (path, options, mtime_ns, size, json.dumps(infos)))
+        return infos
+
+    def keyframes(self, filename):
+        """Keyframe times of ``filename``, listed once per version of the file."""
+        path, mtime_ns, size = _stat(filename)
+        times = self._lookup("keyframes", path, mtime_ns, size)
+        if times is None:
+            times = list_keyframes(filename)
+            self._store("keyframes", (path, mtime_ns, size, json.dumps(times)))
+        return times
+
+    def _original_probe(self):
+        if self._probe is None:
+            import moviepy.video.io.ffmpeg_reader as video_readers
+            self._probe = video_readers.ffmpeg_parse_infos
+        return self._probe
+
+    def install(self):
+        """Routes MoviePy's video and audio reader probes through the index."""
+        import moviepy.audio.io.readers as audio_readers
+        import moviepy.video.io.ffmpeg_reader as video_readers
+
+        self._original_probe()
+        video_readers.ffmpeg_parse_infos = self.parse_infos
+        audio_readers.ffmpeg_parse_infos = self.parse_infos
+
+    def warm(self, filename, keyframes=True):
+        """Indexes one file with the options clip loads use. Returns "cached" if it was already up to date, else "indexed"."""
+        path, mtime_ns, size = _stat(filename)
+        infos = self._lookup("probes", path, mtime_ns, size, _options())
+        cached = infos is not None
+        if not cached:
+            infos = self.parse_infos(filename)
+        if keyframes and infos.get("video_found") and self._lookup("keyframes", path, mtime_ns, size) is None:
+            cached = False
+            self.keyframes(filename)
+        return "cached" if cached else "indexed"
+
+    def scan(self, directory, recursive=True, workers=4, keyframes=True):
+        """Warms the index for every media file under ``directory`` with ``workers`` parallel probes."""
+        files = []
+        for root, _, names in os.walk(directory):
+            files.extend(
+                os.path.join(root, name) for name in sorted(names)
+                if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS
+            )
+            if not recursive:
+                break
+        result = {"files": len(files), "indexed": 0, "cached": 0, "failed": {}}
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="media-index") as pool:
+            futures = {f: pool.submit(self.warm, f, keyframes) for f in files}
+            for filename, future in futures.items():
+                try:
+                    result[future.result()] += 1
+                except Exception as e:
+                    result["failed"][filename] = f"{type(e).__name__}: {e}"
+        return result
+
+
+MEDIA_INDEX = MediaIndex()
@@ -0,0 +1,179 @@
+"""
+Parallel chunked rendering for write_videofile.
+
+The timeline is split into segments holding a whole number of frames. Each
+segment is rendered by a worker process that rebuilds the clip from the
+pickled render graph (see RenderNode.__getstate__), so file-backed sources are
+reopened in the worker instead of sharing ffmpeg readers across processes.
+Every segment is an independent encode starting on a keyframe, which lets the
+ffmpeg concat demuxer join them with a plain stream copy.
+
+A segment reads its frames forward, so workers don't use the shared frame
+cache: each segment gets a private cache of a few frames (enough for effects
+that look at neighbouring frames), dropped when the segment is done.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import os
+import pickle
+import shutil
+import subprocess
+import tempfile
+import numpy as np
+import proglog
+
+from render_graph import iter_nodes, materialize
+from frame_cache import FRAME_CACHE, FrameCache
+
+# Frame cache budget of a worker rendering one segment (a few 1080p frames)
+WORKER_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def plan_segments(n_frames, frames_per_segment):
+    """Returns [first_frame, last_frame) ranges covering ``n_frames`` frames."""
+    frames_per_segment = max(1, int(frames_per_segment))
+    return [(first, min(first + frames_per_segment, n_frames)) for first in range(0, n_frames, frames_per_segment)]
+
+
+def close_sources(node):
+    """Closes the clips of every source node reachable from ``node``."""
+    for n in iter_nodes(node):
+        if n.is_source and n.clip is not None:
+            try:
+                n.clip.close()
+            except Exception:
+                pass
+
+
+def _render_segment(recipe, first_frame, last_frame, fps, filename, writer_params):
+    """Worker entry point: rebuilds the clip and encodes frames [first_frame, last_frame)."""
+    from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+    node = pickle.loads(recipe)
+    # Graph clips still get their node keys, which copied effects use to find their precomputed state
+    clip = materialize(node, FrameCache(WORKER_CACHE_BYTES))
+    has_mask = clip.mask is not None
+    try:
+        with FFMPEG_VideoWriter(filename, clip.size, fps, with_mask=has_mask, **writer_params) as writer:
+            for index in range(first_frame, last_frame):
+                # Same timestamps as a sequential render (Clip.iter_frames)
+                t = index / fps
+                frame = clip.get_frame(t)
+                if frame.dtype != "uint8":
+                    frame = frame.astype("uint8")
+                if has_mask:
+                    mask = 255 * clip.mask.get_frame(t)
+                    if mask.dtype != "uint8":
+                        mask = mask.astype("uint8")
+                    frame = np.dstack([frame, mask])
+                writer.write_frame(frame)
+    finally:
+        close_sources(node)
+    return filename
+
+
+def concat_segments(segments, filename, audiofile=None):
+    """Joins encoded segments (and an optional audio track) with the concat demuxer, without re-encoding."""
+    from moviepy.config import FFMPEG_BINARY
+
+    list_path = os.path.join(os.path.dirname(segments[0]), "segments.txt")
+    with open(list_path, "w") as f:
+        for path in segments:
+            f.write("file '%s'\n" % os.path.abspath(path).replace("'", "'\\''"))
+
+    cmd = [FFMPEG_BINARY, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+    if audiofile:
+        cmd += ["-i", audiofile, "-map", "0:v", "-map", "1:a"]
+    cmd += ["-c", "copy", filename]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to concatenate rendered segments: {result.stderr.strip()}")
+
+
+def render_parallel(
+    node,
+    filename,
+    workers,
+    chunk_seconds=10.0,
+    fps=None,
+    codec="libx264",
+    audio_codec="aac",
+    bitrate=None,
+    preset="medium",
+    threads=None,
+    ffmpeg_params=None,
+    logger="bar"
+):
+    """
+    Renders the clip of ``node`` to ``filename`` using a pool of worker processes.
+
+    Parameters:
+    -----------
+    node : RenderNode
+        Output node of the render graph.
+    workers : int
+        Number of worker processes.
+    chunk_seconds : float
+        Approximate segment length; rounded to a whole number of frames.
+    fps, codec, audio_codec, bitrate, preset, threads, ffmpeg_params :
+        Same meaning as in VideoClip.write_videofile.
+    logger : str or proglog logger
+        Receives "frame_index" progress as segments complete.
+    """
+    from moviepy.tools import find_extension
+
+    if workers < 1:
+        raise ValueError("parallel_workers must be at least 1.")
+    if chunk_seconds <= 0:
+        raise ValueError("chunk_seconds must be positive.")
+
+    clip = materialize(node, FRAME_CACHE)
+    if clip.duration is None:
+        raise ValueError("Cannot render a clip without a duration. Use set_duration first.")
+    fps = fps or clip.fps
+    if not fps:
+        raise ValueError("fps must be provided for clips without a frame rate.")
+
+    try:
+        recipe = pickle.dumps(node)
+    except Exception as e:
+        raise ValueError(f"This clip cannot be rebuilt in a worker process ({e}). Render it without parallel_workers.")
+
+    logger = proglog.default_bar_logger(logger)
+    n_frames = int(clip.duration * fps)
+    segments = plan_segments(n_frames, round(chunk_seconds * fps))
+    writer_params = dict(codec=codec, preset=preset, bitrate=bitrate, threads=threads, ffmpeg_params=ffmpeg_params)
+    ext = os.path.splitext(filename)[1] or ".mp4"
+    workdir = tempfile.mkdtemp(prefix=".render_", dir=os.path.dirname(os.path.abspath(filename)))
+    try:
+        # spawn, not fork: the server process holds ffmpeg reader pipes and event-loop threads
+        context = multiprocessing.get_context("spawn")
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(segments)), mp_context=context)
+        try:
+            futures = {
+                pool.submit(
+                    _render_segment, recipe, first, last, fps,
+                    os.path.join(workdir, f"segment_{i:05d}{ext}"), writer_params
+                ): last - first
+                for i, (first, last) in enumerate(segments)
+            }
+            logger(frame_index__total=n_frames)
+            done = 0
+            for future in as_completed(futures):
+                future.result()
+                done += futures[future]
+                logger(frame_index__index=done - 1)
+            paths = [future.result() for future in futures]
+        finally:
+            # Drop queued segments if a worker failed or the logger aborted the render
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        audiofile = None
+        if clip.audio is not None and audio_codec:
+            audiofile = os.path.join(workdir, "audio." + find_extension(audio_codec))
+            clip.audio.write_audiofile(audiofile, fps=44100, nbytes=4, buffersize=2000, codec=audio_codec, logger=logger)
+
+        concat_segments(paths, filename, audiofile)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return filename
@@ -0,0 +1,279 @@
+"""
+Lazy render graph backing the CLIPS registry.
+
+Tools that derive a clip from other clips do not build MoviePy objects
+immediately. Instead they record a RenderNode (operation name, parameters and
+parent nodes). The MoviePy clip is only materialized when something actually
+needs frames (write_videofile, write_gif, analysis tools), after an optimizer
+pass has simplified the part of the graph reachable from the requested output.
+"""
+import itertools
+import pickle
+
+_node_keys = itertools.count(1)
+
+# Operations where only the outermost call matters when several are chained,
+# e.g. clip.with_start(1).with_start(2) == clip.with_start(2).
+LAST_WINS_OPS = {"set_start", "set_end", "set_duration"}
+
+
+class RenderNode:
+    """
+    A single operation in the render graph.
+
+    Source nodes (no parents) wrap an already-loaded MoviePy clip, optionally
+    with the loader needed to reopen it. Every other node records a
+    module-level ``build`` callable which is invoked as
+    ``build(*parent_clips, **params)`` at materialization time.
+
+    Nodes pickle without their materialized clips (except for sources that
+    have no loader), so a graph can be shipped to a worker process and rebuilt
+    there from its recipe.
+
+    Parameters:
+    -----------
+    op : str
+        Name of the operation (usually the MCP tool that created the node).
+    build : callable
+        Builder returning the derived clip, or reloading a source clip.
+        None for sources that cannot be reloaded.
+    parents : sequence of RenderNode
+        Nodes whose clips are passed positionally to ``build``.
+    params : dict
+        Keyword arguments passed to ``build``.
+    pixel : bool
+        True if ``params["effects"]`` only holds per-pixel image filters that
+        may be fused with neighbouring pixel nodes.
+    clip : Clip
+        The loaded clip for source nodes, the materialized clip otherwise.
+    key : int
+        Stable identity of the node's output. Optimized nodes inherit the key
+        of the node whose output they reproduce.
+    """
+    def __init__(self, op, build=None, parents=(), params=None, pixel=False, clip=None, key=None):
+        self.op = op
+        self.build = build
+        self.parents = tuple(parents)
+        self.params = params if params is not None else {}
+        self.pixel = pixel
+        self.clip = clip
+        self.key = key if key is not None else next(_node_keys)
+
+    @classmethod
+    def source(cls, clip, build=None, params=None):
+        """Wraps an eagerly loaded clip into a leaf node, with an optional loader recipe."""
+        return cls(type(clip).__name__, build, params=params, clip=clip)
+
+    @property
+    def is_source(self):
+        return not self.parents
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.build is not None:
+            state["clip"] = None
+        return state
+
+    def close(self):
+        """Closes the materialized clip held by this node, if any."""
+        if self.clip is not None:
+            self.clip.close()
+
+    def __repr__(self):
+        return f"<RenderNode {self.op} #{self.key}>"
+
+
+def iter_nodes(root):
+    """Yields every node reachable from ``root`` once, parents before children."""
+    seen = set()
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            yield node
+            continue
+        if node.key in seen:
+            continue
+        seen.add(node.key)
+        stack.append((node, True))
+        for parent in reversed(node.parents):
+            stack.append((parent, False))
+
+
+def count_consumers(root):
+    """Returns how many reachable nodes consume each node key."""
+    consumers = {}
+    for node in iter_nodes(root):
+        for parent in node.parents:
+            consumers[parent.key] = consumers.get(parent.key, 0) + 1
+    return consumers
+
+
+class _FilterRecorder:
+    """Stand-in clip that captures the function an effect passes to image_transform."""
+    def __init__(self, is_mask):
+        self.is_mask = is_mask
+        self.func = None
+
+    def image_transform(self, image_func, apply_to=None):
+        self.func = image_func
+        return self
+
+
+def fuse_effects(clip, effects):
+    """
+    Applies a run of per-pixel effects as a single image_transform.
+
+    Each effect is applied to a recorder to capture its image filter, and the
+    filters are composed so the resulting clip adds one level of indirection to
+    get_frame instead of one per effect. Falls back to ``with_effects`` if an
+    effect does not reduce to a plain image_transform.
+    """
+    funcs = []
+    for effect in effects:
+        recorder = _FilterRecorder(getattr(clip, "is_mask", False))
+        if effect.copy().apply(recorder) is not recorder or recorder.func is None:
+            return clip.with_effects(effects)
+        funcs.append(recorder.func)
+
+    def fused(image):
+        for func in funcs:
+            image = func(image)
+        return image
+
+    return clip.image_transform(fused)
+
+
+def _compose_subclips(outer, inner):
+    """
+    Returns (start, end) equivalent to ``clip.subclipped(*inner).subclipped(*outer)``,
+    or None when the ranges use negative (end-relative) times.
+    """
+    s1, e1 = inner
+    s2, e2 = outer
+    if s1 < 0 or s2 < 0 or (e1 is not None and e1 < 0) or (e2 is not None and e2 < 0):
+        return None
+    start = s1 + s2
+    end = e1 if e2 is None else s1 + e2
+    if e1 is not None and end is not None:
+        end = min(end, e1)
+    return start, end
+
+
+def optimize(root):
+    """
+    Returns an optimized plan for materializing ``root``.
+
+    Only nodes reachable from ``root`` are considered, so deleted branches and
+    sibling outputs never take part in the render. The pass:
+
+    - fuses chains of adjacent pixel nodes into one node,
+    - collapses chains of subclip calls into one subclip,
+    - collapses chains of set_start / set_end / set_duration to the outermost.
+
+    Nodes consumed by more than one node are never merged into their
+    children, so shared ancestors are still built once. The original graph is
+    left untouched; rewritten nodes keep the key of the node they replace.
+    """
+    consumers = count_consumers(root)
+    plan = {}
+
+    def exclusive(node):
+        return node.clip is None and consumers.get(node.key, 0) == 1
+
+    def visit(node):
+        if node.key in plan:
+            return plan[node.key]
+        if node.clip is not None:
+            # Sources and already materialized nodes are leaves of the plan.
+            plan[node.key] = node
+            return node
+
+        op, build, params, pixel, parents = node.op, node.build, node.params, node.pixel, node.parents
+
+        if node.pixel:
+            effects = list(params["effects"])
+            ops = [op]
+            parent = parents[0]
+            while parent.pixel and exclusive(parent):
+                effects = list(parent.params["effects"]) + effects
+                ops.insert(0, parent.op)
+                parent = parent.parents[0]
+            if len(ops) > 1:
+                op, build, params, parents = "+".join(ops), fuse_effects, {"effects": effects}, (parent,)
+        elif op == "subclip":
+            span = (params["start_time"], params["end_time"])
+            parent = parents[0]
+            while parent.op == "subclip" and exclusive(parent):
+                composed = _compose_subclips(span, (parent.params["start_time"], parent.params["end_time"]))
+                if composed is None:
+                    break
+                span = composed
+                parent = parent.parents[0]
+            if parent is not parents[0]:
+                params, parents = {"start_time": span[0], "end_time": span[1]}, (parent,)
+        elif op in LAST_WINS_OPS:
+            parent = parents[0]
+            while parent.op == op and exclusive(parent):
+                parent = parent.parents[0]
+            parents = (parent,)
+
+        new_parents = tuple(visit(p) for p in parents)
+        if new_parents == node.parents and params is node.params and build is node.build:
+            result = node
+        else:
+            result = RenderNode(op, build, new_parents, params, pixel=pixel, key=node.key)
+        plan[node.key] = result
+        return result
+
+    return visit(root)
+
+
+def build_plan(node, memo, frame_cache=None):
+    """
+    Builds the clip for an (optimized) node, reusing clips already in ``memo``.
+
+    If a ``frame_cache`` is given, every clip in the plan is attached to it
+    under its node key. Anything with an ``attach(node_key, clip)`` method
+    works, e.g. the effect profiler.
+    """
+    if node.key in memo:
+        return memo[node.key]
+    if node.clip is not None:
+        clip = node.clip
+    elif node.is_source:
+        # Sources reopened from their recipe (detached copies, evicted clips) keep their clip
+        clip = node.clip = node.build(**node.params)
+    else:
+        parents = [build_plan(p, memo, frame_cache) for p in node.parents]
+        clip = node.build(*parents, **node.params)
+    if frame_cache is not None:
+        frame_cache.attach(node.key, clip)
+    memo[node.key] = clip
+    return clip
+
+
+def materialize(node, frame_cache=None):
+    """
+    Returns the MoviePy clip for ``node``, optimizing and building it on first use.
+
+    The result is kept on the node so repeated lookups return the same clip.
+    """
+    if node.clip is None:
+        node.clip = build_plan(optimize(node), {}, frame_cache)
+    return node.clip
+
+
+def detach(node):
+    """
+    Returns a copy of the graph under ``node`` that shares no MoviePy clips with it.
+
+    Sources with a recipe are reloaded in the copy, so it can be rendered from
+    another thread without sharing ffmpeg readers. Keys are preserved, so the
+    copy still shares frame cache entries. Falls back to ``node`` itself when
+    part of the graph cannot be copied.
+    """
+    try:
+        return pickle.loads(pickle.dumps(node))
+    except Exception:
+        return node
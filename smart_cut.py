@@ -0,0 +1,138 @@
+"""
+Frame-accurate subclip extraction that re-encodes as little as possible.
+
+A stream copy can only start on a keyframe, so ffmpeg_extract_subclip snaps
+the cut to the keyframe before ``start_time``, while rendering a subclip with
+write_videofile re-encodes every frame of the range. smart_cut re-encodes
+only the partial GOPs at the head and tail of the range, stream-copies the
+whole GOPs in between and joins the pieces with the concat demuxer.
+
+The concat demuxer converts H.264 pieces to Annex B, which repeats the
+parameter sets of each piece in band, so the decoder follows the switch
+between the source's encoder settings and the re-encoded head and tail. Audio frames do not line up with the video
+cut points; the audio of the range is re-encoded once, which costs little
+next to video.
+"""
+import math
+import os
+import subprocess
+import tempfile
+
+from parallel_render import concat_segments
+
+# Source video codecs whose GOPs can be joined with re-encoded ones, and their encoders
+ENCODERS = {"h264": "libx264"}
+
+
+def frame_range(start_time, end_time, fps):
+    """[first, last) frame indices shown between ``start_time`` and ``end_time``."""
+    first = int(fps * start_time + 0.00001)
+    last = max(first + 1, math.ceil(fps * end_time - 0.00001))
+    return first, last
+
+
+def plan_cut(keyframes, first, last):
+    """
+    Splits frames [first, last) into (first, last, copy) pieces. The GOPs between
+    the first keyframe at or after ``first`` and the last keyframe at or before
+    ``last`` are copied, the partial GOPs around them re-encoded.
+    """
+    inside = [k for k in keyframes if first <= k <= last]
+    if len(inside) < 2:
+        return [(first, last, False)]
+    pieces = []
+    if first < inside[0]:
+        pieces.append((first, inside[0], False))
+    pieces.append((inside[0], inside[-1], True))
+    if inside[-1] < last:
+        pieces.append((inside[-1], last, False))
+    return pieces
+
+
+def _run(cmd, what):
+    result = subprocess.run(cmd, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to {what}: {result.stderr.strip()}")
+
+
+def _piece_command(ffmpeg, filename, first, last, copy, fps, encoder, crf, preset, path):
+    if copy:
+        # Half a frame past the keyframe: the demuxer seeks back to it and a stream copy keeps everything from
+        # there, starting the piece at the keyframe instead of half a frame before zero
+        seek = ["-ss", "%.06f" % ((first + 0.5) / fps)]
+        codec = ["-c:v", "copy", "-avoid_negative_ts", "make_zero"]
+    else:
+        # Decoding seeks to the keyframe before and drops the frames before ``first``
+        seek = ["-ss", "%.06f" % (first / fps - 0.00001)] if first else []
+        codec = ["-c:v", encoder, "-crf", str(crf), "-preset", preset]
+    return (
+        [ffmpeg, "-y", "-loglevel", "error"] + seek + ["-i", filename, "-map", "0:v:0"] + codec
+        + ["-frames:v", str(last - first), path]
+    )
+
+
+def smart_cut(filename, start_time, end_time, outputfile, infos, keyframes, crf=18, preset="medium"):
+    """
+    Writes frames ``start_time`` to ``end_time`` of ``filename`` to ``outputfile``,
+    re-encoding only the frames before the first and after the last keyframe
+    of the range.
+
+    Parameters:
+    -----------
+    infos : dict
+        ffmpeg probe of the file (MoviePy's ffmpeg_parse_infos).
+    keyframes : list
+        Keyframe times of the file's first video stream.
+    crf, preset : int, str
+        Encoder settings of the re-encoded frames.
+
+    Returns a dict with the frame counts of the range, stream-copied and re-encoded.
+    Video that is not H.264 is re-encoded in full with the container's default
+    encoder.
+    """
+    from moviepy.config import FFMPEG_BINARY
+
+    fps = infos["video_fps"]
+    first, last = frame_range(start_time, end_time, fps)
+    encoder = ENCODERS.get(infos.get("video_codec_name"))
+    offset = infos.get("start") or 0
+    keyframe_frames = {int(fps * (t - offset) + 0.00001) for t in keyframes}
+    if infos.get("video_n_frames"):
+        # The end of the file closes the last GOP
+        keyframe_frames.add(infos["video_n_frames"])
+    keyframe_frames = sorted(keyframe_frames)
+    pieces = plan_cut(keyframe_frames, first, last) if encoder else [(first, last, False)]
+    copied = sum(b - a for a, b, copy in pieces if copy)
+    result = {"frames": last - first, "copied_frames": copied, "reencoded_frames": last - first - copied}
+    # The audio of the range, re-encoded from its own (accurately seeking) input
+    audio = ["-ss", "%.06f" % (first / fps), "-t", "%.06f" % ((last - first) / fps), "-i", filename]
+
+    if not copied:
+        # Nothing to copy: a single frame-accurate encode of the range
+        seek = ["-ss", "%.06f" % (first / fps - 0.00001)] if first else []
+        codec = ["-c:v", encoder, "-crf", str(crf), "-preset", preset] if encoder else []
+        _run(
+            [FFMPEG_BINARY, "-y", "-loglevel", "error"] + seek + ["-i", filename] + audio
+            + ["-map", "0:v:0", "-map", "1:a?"] + codec + ["-frames:v", str(last - first), outputfile],
+            "re-encode the subclip"
+        )
+        return result
+
+    with tempfile.TemporaryDirectory(prefix="smart_cut_") as tmp:
+        segments = []
+        for i, (a, b, copy) in enumerate(pieces):
+            path = os.path.join(tmp, f"piece_{i:02d}.mp4")
+            _run(
+                _piece_command(FFMPEG_BINARY, filename, a, b, copy, fps, encoder, crf, preset, path),
+                "copy the whole GOPs of the subclip" if copy else "re-encode the edge of the subclip"
+            )
+            segments.append(path)
+        audiofile = None
+        if infos.get("audio_found"):
+            audiofile = os.path.join(tmp, "audio.m4a")
+            _run(
+                [FFMPEG_BINARY, "-y", "-loglevel", "error"] + audio + ["-vn", "-c:a", "aac", audiofile],
+                "encode the audio of the subclip"
+            )
+        concat_segments(segments, outputfile, audiofile)
+    return result
@@ -8,6 +8,31 @@ def create_dummy_file(filename, *args, **kwargs):
     with open(filename, 'w') as f:
         f.write('dummy')
 
+class FrameClip:
+    """
+    Stands in for a clip in effect tests. ``frame`` is a fixed frame or a
+    function of t; transform() returns a FrameClip running the filter over it,
+    so effects can be chained, and calling the clip renders a frame.
+    """
+    duration = 1.0
+
+    def __init__(self, frame):
+        self.get_frame = frame if callable(frame) else (lambda t: frame)
+
+    @property
+    def w(self):
+        return self.get_frame(0).shape[1]
+
+    @property
+    def h(self):
+        return self.get_frame(0).shape[0]
+
+    def transform(self, func):
+        return FrameClip(lambda t: func(self.get_frame, t))
+
+    def __call__(self, t):
+        return self.get_frame(t)
+
 # Mock numpy
 if 'numpy' not in sys.modules:
     numpy = MagicMock()
@@ -38,15 +63,19 @@ if 'moviepy' not in sys.modules:
     sys.modules['moviepy'] = moviepy
 
     # Mock moviepy submodules
+    sys.modules['moviepy.config'] = MagicMock()
     sys.modules['moviepy.video'] = MagicMock()
     sys.modules['moviepy.video.io'] = MagicMock()
     sys.modules['moviepy.video.io.ffmpeg_tools'] = MagicMock()
+    sys.modules['moviepy.video.io.ffmpeg_reader'] = MagicMock()
     sys.modules['moviepy.video.tools'] = MagicMock()
     sys.modules['moviepy.video.tools.drawing'] = MagicMock()
     sys.modules['moviepy.video.tools.cuts'] = MagicMock()
     sys.modules['moviepy.video.tools.subtitles'] = MagicMock()
     sys.modules['moviepy.video.tools.credits'] = MagicMock()
     sys.modules['moviepy.audio'] = MagicMock()
+    sys.modules['moviepy.audio.io'] = MagicMock()
+    sys.modules['moviepy.audio.io.readers'] = MagicMock()
     sys.modules['moviepy.audio.tools'] = MagicMock()
     sys.modules['moviepy.audio.tools.cuts'] = MagicMock()
 
@@ -160,6 +189,8 @@ if 'custom_fx' not in sys.modules:
     custom_fx.AutoFraming = MagicMock()
     custom_fx.CloneGrid = MagicMock()
     custom_fx.RotatingCube = MagicMock()
+    custom_fx.FrameRing = MagicMock()
+    custom_fx.FrameBuffer = MagicMock()
 
     sys.modules['custom_fx'] = custom_fx
 
@@ -181,7 +212,8 @@ if 'custom_fx' not in sys.modules:
 
     custom_fx.__all__ = [
         'KaleidoscopeCube', 'RGBSync', 'QuadMirror', 'ChromaKey',
-        'Kaleidoscope', 'Matrix', 'AutoFraming', 'CloneGrid', 'RotatingCube'
+        'Kaleidoscope', 'Matrix', 'AutoFraming', 'CloneGrid', 'RotatingCube',
+        'FrameRing', 'FrameBuffer'
     ]
 
 # Mock ui
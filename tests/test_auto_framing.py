@@ -0,0 +1,103 @@
+import pickle
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+
+def is_numpy_mocked():
+    return isinstance(np, MagicMock) or hasattr(np, 'assert_called')
+
+def textured_frame(offset_x, h=120, w=200):
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    patch = np.random.default_rng(0).integers(0, 255, (30, 30), dtype=np.uint8)
+    frame[40:70, 50 + offset_x:80 + offset_x] = patch[:, :, None]
+    return frame
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+@pytest.mark.parametrize("scale", [1.0, 0.5])
+def test_subject_is_tracked_between_detections(scale):
+    from custom_fx import AutoFraming
+    effect = AutoFraming(detect_every=10, detect_scale=scale)
+    detections = []
+    def detect(gray):
+        detections.append(gray.shape)
+        return (np.array([50, 40, 30, 30]) * scale).astype(int)
+    effect._detect_face = detect
+
+    centers = [effect._locate_subject(textured_frame(3 * i)) for i in range(6)]
+
+    assert len(detections) == 1
+    assert detections[0] == (int(120 * scale), int(200 * scale))
+    for i, (x, y) in enumerate(centers):
+        assert x == pytest.approx(65 + 3 * i, abs=1.5)
+        assert y == pytest.approx(55, abs=1.5)
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_effect_survives_pickling():
+    from custom_fx import AutoFraming
+    effect = AutoFraming(detect_every=5)
+    effect._face_cascade = object()  # stands in for an unpicklable cv2 classifier
+    copy = pickle.loads(pickle.dumps(effect))
+    assert copy.detect_every == 5
+    assert copy._face_cascade is None
+
+FOCUS_CALLS = []
+
+def focus(frame, t):
+    FOCUS_CALLS.append(t)
+    return (40 + 40 * t, 50)
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_crop_path_is_order_independent_and_reused():
+    from moviepy import VideoClip
+    from custom_fx import AutoFraming
+    from frame_cache import FrameCache
+    calls = FOCUS_CALLS
+    calls.clear()
+    clip = VideoClip(lambda t: np.zeros((100, 200, 3), dtype=np.uint8), duration=2).with_fps(10)
+    # Built from the render graph: the clip carries its node key
+    FrameCache().attach(7, clip)
+    effect = AutoFraming(target_aspect_ratio=0.5, smoothing=0.5, focus_func=focus, analysis_fps=5)
+
+    framed = effect.apply(clip)
+    assert len(calls) == 10
+    times = [1.5, 0.2, 1.9, 0.2, 1.0]
+    first = [framed.get_frame(t).tobytes() for t in times]
+    second = [framed.get_frame(t).tobytes() for t in reversed(times)][::-1]
+    assert first == second
+    assert framed.get_frame(0.2).shape == (100, 50, 3)
+
+    # Copies made for workers carry the path and skip the analysis pass
+    pickle.loads(pickle.dumps(effect)).apply(clip)
+    assert len(calls) == 10
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_one_effect_frames_each_clip_on_its_own_subject():
+    from moviepy import VideoClip
+    from custom_fx import AutoFraming
+    effect = AutoFraming(target_aspect_ratio=0.5, focus_func=lambda frame, t: (frame[0, :, 0].argmax(), 50))
+
+    def subject_at(x):
+        frame = np.zeros((100, 200, 3), dtype=np.uint8)
+        frame[:, x] = 255
+        return VideoClip(lambda t: frame, duration=1).with_fps(10)
+
+    left, right = effect.apply(subject_at(30)), effect.apply(subject_at(170))
+    # 50-wide crops centred on each clip's own subject
+    assert left.get_frame(0.5)[0].argmax(axis=0)[0] == 25
+    assert right.get_frame(0.5)[0].argmax(axis=0)[0] == 25
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_zero_length_clip_is_framed():
+    from moviepy import VideoClip
+    from custom_fx import AutoFraming
+    clip = VideoClip(lambda t: np.zeros((100, 200, 3), dtype=np.uint8), duration=0).with_fps(10)
+    framed = AutoFraming(target_aspect_ratio=0.5, focus_func=lambda frame, t: (40, 50)).apply(clip)
+    assert framed.get_frame(0).shape == (100, 50, 3)
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_smoothing_is_zero_phase():
+    from custom_fx.auto_framing import _ema
+    step = np.array([[0.0]] * 10 + [[10.0]] * 10)
+    smoothed = _ema(_ema(step, 0.5)[::-1], 0.5)[::-1]
+    # Forward-backward filtering doesn't lag: the step stays centred
+    assert smoothed[9, 0] < 5 < smoothed[10, 0]
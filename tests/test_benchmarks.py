@@ -0,0 +1,23 @@
+from benchmarks.run import compare
+
+def result(effect, fps, p95, rss=100.0, resolution="1080p"):
+    return {"effect": effect, "resolution": resolution, "fps": fps, "latency_ms": {"p95": p95}, "peak_rss_mb": rss}
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = [result("a", 100, 10), result("b", 100, 10), result("c", 100, 10), result("d", 100, 10)]
+    results = [
+        result("a", 95, 10.5),       # within tolerance
+        result("b", 70, 10),         # slower
+        result("c", 100, 20, 200),   # worse tail latency and memory
+        {"effect": "d", "resolution": "1080p", "error": "ValueError: boom"},
+    ]
+    regressions = compare(results, baseline, tolerance=0.1)
+    assert not any(r.startswith("a @") for r in regressions)
+    assert "b @ 1080p: 100.00 -> 70.00 fps" in regressions
+    assert sum(r.startswith("c @") for r in regressions) == 2
+    assert any(r.startswith("d @") and "now fails" in r for r in regressions)
+
+def test_compare_ignores_new_and_previously_failing_cases():
+    baseline = [{"effect": "a", "resolution": "4k", "error": "MemoryError"}]
+    results = [result("a", 1, 1000, resolution="4k"), result("new", 1, 1000)]
+    assert compare(results, baseline) == []
@@ -0,0 +1,42 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+
+def is_numpy_mocked():
+    return isinstance(np, MagicMock) or hasattr(np, 'assert_called')
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+@pytest.mark.parametrize("threshold, softness", [(50, 20), (0, 0), (120, 0), (-5, 10)])
+def test_mask_matches_euclidean_distance(threshold, softness):
+    from custom_fx import ChromaKey
+    image = np.random.default_rng(0).integers(0, 256, (20, 30, 3), dtype=np.uint8)
+    dist = np.sqrt(np.sum((image.astype('float64') - (0, 255, 0)) ** 2, axis=-1))
+    if softness > 0:
+        expected = np.clip((dist - threshold) / softness, 0, 1)
+    else:
+        expected = (dist > threshold).astype('float32')
+
+    mask = ChromaKey((0, 255, 0), threshold, softness).compute_mask(image)
+    np.testing.assert_allclose(mask, expected, atol=1e-5)
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_frame_fetched_once_and_existing_mask_kept():
+    from moviepy import VideoClip
+    from custom_fx import ChromaKey
+    frame = np.zeros((10, 10, 3), dtype=np.uint8)
+    frame[:, 5:] = (200, 0, 0)
+    calls = []
+    def frame_function(t):
+        calls.append(t)
+        return frame
+    old_mask = VideoClip(lambda t: np.full((10, 10), 0.5), is_mask=True, duration=1)
+    clip = VideoClip(frame_function, duration=1).with_mask(old_mask)
+
+    keyed = ChromaKey((0, 0, 0), threshold=10, softness=0).apply(clip)
+    calls.clear()
+    keyed.get_frame(0.5)
+    mask = keyed.mask.get_frame(0.5)
+
+    assert calls == [0.5]
+    assert (mask[:, :5] == 0).all()
+    assert (mask[:, 5:] == 0.5).all()
@@ -0,0 +1,138 @@
+import subprocess
+import pytest
+from clip_registry import ClipRegistry
+from render_graph import RenderNode, build_plan
+
+class FakeProc(subprocess.Popen):
+    """Stands in for a live ffmpeg process."""
+    _child_created = False
+
+    def __init__(self):
+        pass
+
+class FakeReader:
+    def __init__(self):
+        self.proc = FakeProc()
+
+    def close(self):
+        self.proc = None
+
+class FakeArray:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+class FakeClip:
+    """Loaded clip with one open reader and ``nbytes`` of decoded data."""
+    def __init__(self, nbytes=0, reader=True):
+        self.reader = FakeReader() if reader else None
+        self.img = FakeArray(nbytes)
+        self.audio = None
+        self.mask = None
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        if self.reader is not None:
+            self.reader.close()
+
+def load(nbytes=0):
+    return FakeClip(nbytes)
+
+def derived(*parents):
+    return RenderNode("subclip", lambda *clips: FakeClip(reader=False), parents)
+
+def test_delete_parent_with_live_child_keeps_it_open():
+    registry = ClipRegistry()
+    parent = FakeClip()
+    registry.add("parent", parent)
+    registry.add("child", derived(RenderNode.source(parent)), ["parent"])
+
+    assert registry.delete("parent") is False
+    assert "parent" not in registry
+    assert not parent.closed
+    assert registry.stats()["hidden"] == 1
+
+    assert registry.delete("child") is True
+    assert parent.closed
+    assert registry.stats()["hidden"] == 0
+
+def test_cascade_waits_for_every_child():
+    registry = ClipRegistry()
+    parent = FakeClip()
+    registry.add("parent", parent)
+    registry.add("a", derived(RenderNode.source(parent)), ["parent"])
+    registry.add("b", derived(RenderNode.source(parent)), ["parent"])
+
+    registry.delete("parent")
+    registry.delete("a")
+    assert not parent.closed
+    registry.delete("b")
+    assert parent.closed
+
+def test_memory_budget_evicts_least_recently_used():
+    registry = ClipRegistry(max_bytes=250, max_readers=100)
+    clips = {}
+    for name in ("a", "b", "c"):
+        clips[name] = FakeClip(100)
+        registry.add(name, clips[name])
+        registry.recipes[name] = (load, {"nbytes": 100})
+    registry.touch("a")
+    registry.enforce_budget()
+
+    assert clips["b"].closed
+    assert not clips["a"].closed and not clips["c"].closed
+    assert isinstance(registry["b"], RenderNode) and registry["b"].clip is None
+    assert registry.stats()["evictions"] == 1
+    assert registry.totals() == (200, 2)
+
+def test_reader_budget_evicts_sources():
+    registry = ClipRegistry(max_bytes=10**9, max_readers=2)
+    for name in ("a", "b", "c", "d"):
+        registry.add(name, FakeClip())
+        registry.recipes[name] = (load, {})
+        registry.enforce_budget()
+
+    assert registry.totals()[1] == 2
+    assert registry.stats()["evictions"] == 2
+
+def test_clips_without_recipe_are_never_evicted():
+    registry = ClipRegistry(max_bytes=0, max_readers=0)
+    clip = FakeClip(100)
+    registry.add("a", clip)
+    registry.enforce_budget()
+
+    assert registry["a"] is clip
+    assert not clip.closed
+
+def test_sources_of_built_clips_are_not_evicted():
+    registry = ClipRegistry(max_bytes=10**9, max_readers=0)
+    source = RenderNode.source(FakeClip(), load, {})
+    registry.add("source", source)
+    child = derived(source)
+    child.clip = FakeClip(reader=False)
+    registry.add("child", child, ["source"])
+    registry.enforce_budget()
+
+    assert source.clip is not None and not source.clip.closed
+    assert registry.stats()["evictions"] == 0
+
+def test_evicted_source_is_reopened_on_use():
+    registry = ClipRegistry(max_bytes=0, max_readers=100)
+    registry.add("a", FakeClip(100))
+    registry.recipes["a"] = (load, {"nbytes": 100})
+    registry.enforce_budget()
+    node = registry["a"]
+    assert node.clip is None
+
+    clip = build_plan(node, {})
+    assert isinstance(clip, FakeClip) and node.clip is clip
+    assert registry.describe("a", node)["open_readers"] == 1
+
+def test_describe_reports_memory_and_readers():
+    registry = ClipRegistry()
+    registry.add("a", FakeClip(3 * 2**20))
+    info = registry.describe("a", registry["a"])
+    assert info["loaded"] is True
+    assert info["memory_mb"] == 3.0
+    assert info["open_readers"] == 1
+    assert info["derived_clips"] == 0
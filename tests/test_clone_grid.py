@@ -0,0 +1,45 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+from conftest import FrameClip
+
+def is_numpy_mocked():
+    return isinstance(np, MagicMock) or hasattr(np, 'assert_called')
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_exact_division_matches_tiling():
+    import cv2
+    from custom_fx import CloneGrid
+    frame = np.random.default_rng(0).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    out = CloneGrid(8).apply(FrameClip(frame))(0)
+    small = cv2.resize(frame, (40, 60), interpolation=cv2.INTER_AREA)
+    np.testing.assert_array_equal(out, np.tile(small, (2, 4, 1)))
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_remainder_pixels_are_spread_over_cells():
+    from custom_fx import CloneGrid
+    from custom_fx.clone_grid import _bounds
+    # Solid frame: every clone is the same color, so coverage is easy to check
+    frame = np.full((101, 203, 3), 77, dtype=np.uint8)
+    out = CloneGrid(16).apply(FrameClip(frame))(0)
+    assert out.shape == frame.shape
+    np.testing.assert_array_equal(out, frame)
+    widths = np.diff(_bounds(203, 4))
+    assert widths.max() - widths.min() <= 1 and widths.sum() == 203
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_non_uniform_layout():
+    from custom_fx import CloneGrid
+    from custom_fx.clone_grid import _grid_cells
+    effect = CloneGrid(5)
+    assert effect.row_counts == (3, 2)
+    cells = [cols for _, bands in _grid_cells(90, 40, effect.row_counts) for _, columns in bands for cols in columns]
+    assert len(cells) == 5
+
+    frame = np.zeros((40, 90), dtype=np.uint8)
+    frame[:, :45] = 255
+    out = effect.apply(FrameClip(frame))(0)
+    # Top row: three clones 30px wide, each half white
+    assert out[5, 0] == 255 and out[5, 29] == 0 and out[5, 30] == 255
+    # Bottom row: two clones 45px wide
+    assert out[35, 44] == 0 and out[35, 45] == 255
@@ -0,0 +1,142 @@
+import subprocess
+import time
+import pytest
+import keyframe_seek
+from decoder_pool import DecoderPool, media_key
+
+class FakeProc(subprocess.Popen):
+    """Stands in for a live ffmpeg process."""
+    _child_created = False
+    pid = 0
+
+    def __init__(self):
+        pass
+
+class FakeReader:
+    """Video reader whose frames are their timestamps."""
+    def __init__(self, filename):
+        self.filename = filename
+        self.fps = 10
+        self.proc = None
+        self.starts = 0
+        start_at(self, 0)
+
+    def get_frame_number(self, t):
+        return int(self.fps * t + 0.00001)
+
+    def read_frame(self):
+        assert self.proc is not None
+        self.pos += 1
+        return (self.pos - 1) / self.fps
+
+    def skip_frames(self, n=1):
+        self.pos += n
+
+    def close(self, delete_lastread=True):
+        self.proc = None
+
+def start_at(reader, frame):
+    reader.proc = FakeProc()
+    reader.pos = frame
+    reader.starts += 1
+    reader.last_read = reader.read_frame()
+
+@pytest.fixture(autouse=True)
+def fake_ffmpeg(monkeypatch):
+    monkeypatch.setattr(keyframe_seek, "start_reader", start_at)
+
+class FakeClip:
+    def __init__(self, filename):
+        self.reader = FakeReader(filename)
+        self.audio = None
+        self.frame_function = lambda t: self.reader.get_frame(t)
+
+    def get_frame(self, t):
+        return self.frame_function(t)
+
+    def close(self):
+        self.reader.close()
+        self.reader = None
+
+@pytest.fixture
+def loads():
+    return []
+
+@pytest.fixture
+def opener(loads):
+    def open_clip(pool, key="a.mp4"):
+        def load():
+            loads.append(key)
+            return FakeClip(key)
+        return pool.open((key,), load)
+    return open_clip
+
+def test_second_load_reuses_probe_and_starts_lazily(opener, loads):
+    pool = DecoderPool(idle_timeout=0)
+    first = opener(pool)
+    second = opener(pool)
+
+    assert loads == ["a.mp4"]
+    assert second.reader is not first.reader
+    assert not second.reader.alive
+    assert second.get_frame(1.5) == 1.5
+    assert second.reader.alive
+    stats = pool.stats()
+    assert stats["probe_hits"] == 1 and stats["probe_misses"] == 1
+    assert stats["live_processes"] == 2
+
+def test_closed_clip_reader_is_handed_out_again(opener):
+    pool = DecoderPool(idle_timeout=0)
+    first = opener(pool)
+    reader = first.reader
+    first.close()
+    assert pool.stats()["pooled_readers"] == 1
+
+    second = opener(pool)
+    assert second.reader is reader
+    assert second.get_frame(0.3) == 0.3
+    assert pool.stats()["reader_reuses"] == 1
+
+def test_process_limit_suspends_least_recently_used(opener):
+    pool = DecoderPool(max_processes=1, idle_timeout=0)
+    first = opener(pool)
+    second = opener(pool)
+    second.get_frame(0.2)
+    assert not first.reader.alive and second.reader.alive
+
+    # Resumes at the requested time on its next read
+    assert first.get_frame(0.7) == 0.7
+    assert first.reader.starts == 2
+    assert pool.stats()["live_processes"] == 1
+    assert pool.stats()["suspensions"] == 2
+
+def test_sweep_closes_idle_readers(opener):
+    pool = DecoderPool(idle_timeout=10)
+    active = opener(pool)
+    closed = opener(pool)
+    closed.get_frame(0)
+    closed.close()
+    assert pool.stats()["live_processes"] == 2
+
+    pool.sweep(time.monotonic() + 60)
+    stats = pool.stats()
+    assert stats["live_processes"] == 0
+    assert stats["pooled_readers"] == 0
+    assert active.get_frame(0.4) == 0.4
+
+def test_clips_without_ffmpeg_readers_are_not_pooled(loads):
+    pool = DecoderPool(idle_timeout=0)
+    clip = object()
+    assert pool.open(("x",), lambda: loads.append(1) or clip) is clip
+    pool.open(("x",), lambda: loads.append(1) or clip)
+    assert loads == [1, 1]
+    assert pool.stats()["probed_files"] == 0
+
+def test_media_key_changes_with_the_file(tmp_path):
+    path = tmp_path / "a.mp4"
+    path.write_bytes(b"1")
+    key = media_key(str(path), None, True)
+    assert media_key(str(path), None, True) == key
+    assert media_key(str(path), (64, 48), True) != key
+    path.write_bytes(b"12")
+    assert media_key(str(path), None, True) != key
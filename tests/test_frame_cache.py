@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+from frame_cache import FrameCache
+
+class FakeFrame:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+def test_hits_and_misses_are_counted():
+    cache = FrameCache(max_bytes=100)
+    calls = []
+    def frame_function(t):
+        calls.append(t)
+        return FakeFrame(10)
+
+    cached = cache.wrap(1, frame_function)
+    first = cached(0.5)
+    assert cached(0.5) is first
+    cached(1.0)
+
+    stats = cache.stats()
+    assert calls == [0.5, 1.0]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["entries"] == 2
+    assert stats["bytes"] == 20
+
+def test_lru_eviction_respects_byte_budget():
+    cache = FrameCache(max_bytes=25)
+    cache.put(("a", 0), FakeFrame(10))
+    cache.put(("b", 0), FakeFrame(10))
+    cache.get(("a", 0))  # "a" becomes most recently used
+    cache.put(("c", 0), FakeFrame(10))
+
+    assert cache.get(("b", 0)) is None
+    assert cache.get(("a", 0)) is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.bytes == 20
+
+def test_frames_larger_than_budget_are_not_cached():
+    cache = FrameCache(max_bytes=5)
+    cache.put(("a", 0), FakeFrame(10))
+    assert cache.stats()["entries"] == 0
+
+def test_different_nodes_do_not_share_frames():
+    cache = FrameCache(max_bytes=100)
+    a = cache.wrap(1, lambda t: FakeFrame(1))
+    b = cache.wrap(2, lambda t: FakeFrame(1))
+    assert a(0) is not b(0)
+
+def test_array_times_bypass_cache():
+    cache = FrameCache(max_bytes=100)
+    cached = cache.wrap(1, lambda t: FakeFrame(1))
+    cached([0.0, 0.1])
+    assert cache.stats()["misses"] == 0
+
+def test_attach_wraps_each_frame_function_once():
+    cache = FrameCache(max_bytes=100)
+    clip = SimpleNamespace(size=(2, 2), frame_function=lambda t: FakeFrame(1))
+    cache.attach(1, clip)
+    wrapped = clip.frame_function
+    derived = SimpleNamespace(size=(2, 2), frame_function=wrapped)
+    cache.attach(2, derived)
+    assert derived.frame_function is wrapped
+
+def test_attach_skips_audio_clips():
+    cache = FrameCache(max_bytes=100)
+    frame_function = lambda t: t
+    audio = SimpleNamespace(frame_function=frame_function)
+    cache.attach(1, audio)
+    assert audio.frame_function is frame_function
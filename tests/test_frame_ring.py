@@ -0,0 +1,86 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+
+def is_numpy_mocked():
+    return isinstance(np, MagicMock) or hasattr(np, 'assert_called')
+
+class Source:
+    """Frame source recording the times it was asked for; frame n is filled with n."""
+    def __init__(self, fps=10):
+        self.fps = fps
+        self.calls = []
+
+    def get_frame(self, t):
+        self.calls.append(t)
+        return np.full((4, 6, 3), int(self.fps * t + 0.00001), dtype=np.uint8)
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_ring_reads_ahead_in_order():
+    from custom_fx.frame_ring import FrameRing
+    source = Source()
+    ring = FrameRing(fps=10, capacity=4)
+    assert ring.get(source.get_frame, 0.0)[0, 0, 0] == 0
+    # A step of two frames reads the skipped frame too, forwards
+    assert ring.get(source.get_frame, 0.2)[0, 0, 0] == 2
+    assert ring.get(source.get_frame, 0.1)[0, 0, 0] == 1
+    assert source.calls == [0.0, 0.1, 0.2]
+    assert ring.hits == 1
+    # Larger steps read only the requested frame
+    assert ring.get(source.get_frame, 0.5)[0, 0, 0] == 5
+    assert source.calls == [0.0, 0.1, 0.2, 0.5]
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_ring_respects_capacity_and_memory_cap():
+    from custom_fx.frame_ring import FrameRing
+    source = Source()
+    ring = FrameRing(fps=10, capacity=3)
+    for n in range(10):
+        ring.get(source.get_frame, n / 10)
+    assert len(ring._frames) == 3
+    assert sorted(ring._frames) == [7, 8, 9]
+
+    frame_bytes = 4 * 6 * 3
+    capped = FrameRing(fps=10, capacity=8, max_bytes=2 * frame_bytes)
+    for n in range(5):
+        capped.get(source.get_frame, n / 10)
+    assert capped.bytes == 2 * frame_bytes
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_rgb_sync_decodes_each_frame_once():
+    from custom_fx.rgb_sync import RGBSync
+    source = Source(fps=10)
+
+    class Clip:
+        fps = 10
+        duration = 10.0
+
+        def transform(self, func):
+            return lambda t: func(source.get_frame, t)
+
+    render = RGBSync(g_time_offset=0.2, b_time_offset=-0.1).apply(Clip())
+    for n in range(20):
+        out = render(n / 10)
+        assert list(out[0, 0]) == [n, min(n + 2, 100), max(n - 1, 0)]
+    # Every source frame read once, never stepping backwards
+    assert source.calls == sorted(set(source.calls))
+    assert len(source.calls) == 22
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_rgb_sync_below_clip_fps_reads_no_extra_frames():
+    from custom_fx.rgb_sync import RGBSync
+    source = Source(fps=60)
+
+    class Clip:
+        fps = 60
+        duration = 10.0
+
+        def transform(self, func):
+            return lambda t: func(source.get_frame, t)
+
+    render = RGBSync(g_time_offset=0.1, b_time_offset=-0.1).apply(Clip())
+    # Rendered at 24 fps: output frames are 2.5 source frames apart
+    for n in range(96):
+        render(n / 24)
+    # At most one read per channel, never the frames in between
+    assert len(source.calls) <= 3 * 96
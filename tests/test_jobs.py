@@ -0,0 +1,88 @@
+import threading
+from jobs import JobManager
+
+def render_frames(n, started=None, release=None):
+    def render(logger, filename):
+        with open(filename, "w") as f:
+            for i in logger.iter_bar(frame_index=range(n)):
+                f.write(f"frame {i}\n")
+                if started is not None and i == 1:
+                    started.set()
+                    release.wait(5)
+    return render
+
+def test_job_reports_progress_and_output(tmp_path):
+    jobs = JobManager(max_workers=1)
+    job = jobs.submit("video", str(tmp_path / "out.mp4"), render_frames(10))
+    job.future.result(timeout=5)
+
+    status = job.status_dict()
+    assert status["status"] == "done"
+    assert status["frames_done"] == 10
+    assert status["total_frames"] == 10
+    assert status["output_path"] == str(tmp_path / "out.mp4")
+    # Moved into place; no temporary file left behind
+    assert (tmp_path / "out.mp4").read_text().count("frame") == 10
+    assert [p.name for p in tmp_path.iterdir()] == ["out.mp4"]
+
+def test_failed_job_reports_error(tmp_path):
+    def render(logger, filename):
+        raise RuntimeError("encoder crashed")
+    jobs = JobManager(max_workers=1)
+    job = jobs.submit("video", str(tmp_path / "out.mp4"), render)
+    job.future.result(timeout=5)
+
+    assert job.status == "failed"
+    assert job.error == "encoder crashed"
+    assert job.status_dict()["output_path"] is None
+
+def test_cancel_running_job_removes_partial_output(tmp_path):
+    out = tmp_path / "out.mp4"
+    started, release = threading.Event(), threading.Event()
+    jobs = JobManager(max_workers=1)
+    job = jobs.submit("video", str(out), render_frames(100, started, release))
+    started.wait(5)
+
+    jobs.cancel(job.id)
+    release.set()
+    job.future.result(timeout=5)
+    assert job.status == "cancelled"
+    assert job.frames_done < 100
+    assert list(tmp_path.iterdir()) == []
+
+def test_failed_job_keeps_existing_output(tmp_path):
+    out = tmp_path / "out.mp4"
+    out.write_text("previous render")
+
+    def render(logger, filename):
+        # Fails before the writer opens its file, e.g. while building the effect chain
+        raise ValueError("bad effect")
+
+    jobs = JobManager(max_workers=1)
+    job = jobs.submit("video", str(out), render)
+    job.future.result(timeout=5)
+    assert job.status == "failed"
+    assert out.read_text() == "previous render"
+
+    started, release = threading.Event(), threading.Event()
+    job = jobs.submit("video", str(out), render_frames(100, started, release))
+    started.wait(5)
+    jobs.cancel(job.id)
+    release.set()
+    job.future.result(timeout=5)
+    assert job.status == "cancelled"
+    assert out.read_text() == "previous render"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.mp4"]
+
+def test_cancel_queued_job(tmp_path):
+    started, release = threading.Event(), threading.Event()
+    jobs = JobManager(max_workers=1)
+    first = jobs.submit("video", str(tmp_path / "a.mp4"), render_frames(5, started, release))
+    started.wait(5)
+    queued = jobs.submit("video", str(tmp_path / "b.mp4"), render_frames(5))
+
+    assert jobs.cancel(queued.id).status == "cancelled"
+    release.set()
+    first.future.result(timeout=5)
+    assert first.status == "done"
+    assert queued.status == "cancelled"
@@ -0,0 +1,37 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+from conftest import FrameClip
+
+def is_numpy_mocked():
+    return isinstance(np, MagicMock) or hasattr(np, 'assert_called')
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_nearest_matches_polar_mapping():
+    from custom_fx import Kaleidoscope
+    h, w = 30, 40
+    frame = np.arange(h * w * 3, dtype=np.uint8).reshape(h, w, 3)
+    out = Kaleidoscope(n_slices=6).apply(FrameClip(frame))(0)
+
+    slice_angle = 2 * np.pi / 6
+    for (py, px) in [(0, 0), (5, 33), (29, 39), (15, 20), (22, 7)]:
+        dx, dy = px - w // 2, py - h // 2
+        r, theta = np.hypot(dx, dy), np.arctan2(dy, dx) % (2 * np.pi)
+        a = theta % slice_angle
+        if (theta // slice_angle) % 2 == 1:
+            a = slice_angle - a
+        sx = min(max(int(r * np.cos(a) + w // 2), 0), w - 1)
+        sy = min(max(int(r * np.sin(a) + h // 2), 0), h - 1)
+        np.testing.assert_array_equal(out[py, px], frame[sy, sx])
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_remap_tables_are_cached_per_geometry():
+    from custom_fx import Kaleidoscope
+    from custom_fx.kaleidoscope import _get_remap_tables
+    frame = np.zeros((20, 30, 3), dtype=np.uint8)
+    _get_remap_tables.cache_clear()
+    effect = Kaleidoscope(n_slices=8, bilinear=True).apply(FrameClip(frame))
+    effect(0)
+    effect(1)
+    info = _get_remap_tables.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
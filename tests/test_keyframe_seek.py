@@ -0,0 +1,128 @@
+import subprocess
+import pytest
+import keyframe_seek
+from keyframe_seek import KeyframeSeeker
+
+FPS = 10
+
+class FakeProc(subprocess.Popen):
+    _child_created = False
+
+    def __init__(self):
+        pass
+
+class FakeReader:
+    """Reader whose frames are their indices, counting the frames it decodes."""
+    def __init__(self, keyframes=(0,)):
+        self.filename = "clip.mp4"
+        self.fps = FPS
+        self.size = (4, 2)
+        self.depth = 3
+        self.keyframes = list(keyframes)
+        self.proc = None
+        self.pos = 0
+        self.decoded = 0
+        self.starts = []
+
+    def get_frame_number(self, t):
+        return int(self.fps * t + 0.00001)
+
+    def read_frame(self):
+        self.decoded += 1
+        self.pos += 1
+        return self.pos - 1
+
+    def skip_frames(self, n=1):
+        self.decoded += n
+        self.pos += n
+
+    def close(self, delete_lastread=True):
+        self.proc = None
+
+def fake_start(reader, frame):
+    # ffmpeg decodes (and drops) the frames from the keyframe before ``frame``
+    keyframe = max(k for k in reader.keyframes if k <= frame)
+    reader.decoded += frame - keyframe
+    reader.starts.append(frame)
+    reader.proc = FakeProc()
+    reader.pos = frame
+    reader.last_read = reader.read_frame()
+
+@pytest.fixture(autouse=True)
+def fake_ffmpeg(monkeypatch):
+    monkeypatch.setattr(keyframe_seek, "start_reader", fake_start)
+
+def make(keyframes=(0,), **kwargs):
+    reader = FakeReader(keyframes)
+    calls = []
+
+    def lookup(filename):
+        calls.append(filename)
+        return [k / FPS for k in keyframes]
+
+    return reader, KeyframeSeeker(reader, lookup, **kwargs), calls
+
+def test_sequential_reads_decode_forward_without_keyframe_lookup():
+    reader, seeker, calls = make()
+    assert [seeker.get_frame(i / FPS) for i in range(20)] == list(range(20))
+    assert reader.starts == [0]
+    assert calls == []
+
+def test_jump_inside_a_gop_decodes_forward():
+    reader, seeker, _ = make(keyframes=(0, 300))
+    seeker.get_frame(0)
+    # MoviePy would restart ffmpeg for a 250 frame jump; the GOP has to be decoded either way
+    assert seeker.get_frame(250 / FPS) == 250
+    assert reader.starts == [0]
+
+def test_short_jump_across_a_keyframe_seeks():
+    reader, seeker, _ = make(keyframes=(0, 50))
+    seeker.get_frame(4.0)
+    assert seeker.get_frame(6.0) == 60
+    assert reader.starts == [40, 60]
+
+def test_without_keyframes_falls_back_to_moviepy_rule():
+    reader = FakeReader()
+    seeker = KeyframeSeeker(reader, None)
+    seeker.get_frame(0)
+    seeker.get_frame(90 / FPS)
+    assert reader.starts == [0]
+    seeker.get_frame(200 / FPS)
+    assert reader.starts == [0, 200]
+
+def test_failing_keyframe_lookup_falls_back():
+    reader = FakeReader()
+
+    def lookup(filename):
+        raise OSError("no index")
+
+    seeker = KeyframeSeeker(reader, lookup)
+    seeker.get_frame(0)
+    assert seeker.get_frame(50 / FPS) == 50
+    assert seeker.keyframe_frames() == []
+
+def test_reverse_playback_decodes_each_gop_once():
+    reader, seeker, _ = make(keyframes=(0, 25, 50, 75))
+    frames = [seeker.get_frame(i / FPS) for i in range(99, -1, -1)]
+
+    assert frames == list(range(99, -1, -1))
+    assert seeker.reverse_fills == 4
+    # Two plain seeks before reverse playback is detected, then every frame once
+    assert reader.decoded < 100 + 2 * 25
+
+def test_reverse_buffer_is_bounded():
+    # Room for 10 frames of 4x2x3 bytes
+    reader, seeker, _ = make(keyframes=(0,), max_bytes=10 * 24)
+    frames = [seeker.get_frame(i / FPS) for i in range(59, 29, -1)]
+
+    assert frames == list(range(59, 29, -1))
+    assert len(seeker._reverse) <= 10
+    assert seeker.reverse_fills == 3
+
+def test_forward_read_drops_the_reverse_buffer():
+    reader, seeker, _ = make(keyframes=(0, 25))
+    for i in (40, 39, 38, 37):
+        seeker.get_frame(i / FPS)
+    assert seeker._reverse
+    assert seeker.get_frame(45 / FPS) == 45
+    assert not seeker._reverse
@@ -30,7 +30,8 @@ def test_list_clips_populated():
 
     assert len(result) == 1
     assert id1 in result
-    assert isinstance(result[id1], str)
+    assert isinstance(result[id1]["type"], str)
+    assert result[id1]["open_readers"] == 0
     # The string representation depends on the mock object's type.
 
 def test_list_clips_multiple_clips():
@@ -49,8 +50,8 @@ def test_list_clips_multiple_clips():
     assert len(result) == 2
     assert id1 in result
     assert id2 in result
-    assert isinstance(result[id1], str)
-    assert isinstance(result[id2], str)
+    assert isinstance(result[id1]["type"], str)
+    assert isinstance(result[id2]["type"], str)
 
 def test_list_clips_type_string():
     """Verify the string representation of the clip type."""
@@ -65,4 +66,4 @@ def test_list_clips_type_string():
     result = main.list_clips.fn()
 
     assert id1 in result
-    assert "MyClip" in result[id1]
+    assert "MyClip" in result[id1]["type"]
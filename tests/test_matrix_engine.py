@@ -0,0 +1,60 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+from conftest import FrameClip
+
+def is_numpy_mocked():
+    return isinstance(np, MagicMock) or hasattr(np, 'assert_called')
+
+def render(effect, times, w=120, h=90):
+    clip = effect.apply(FrameClip(np.full((h, w, 3), 40, dtype=np.uint8)))
+    return [clip(t) for t in times]
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+@pytest.mark.parametrize("density", [0.2, 1.0])
+def test_sparse_and_dense_paths_agree(density, monkeypatch):
+    from custom_fx.matrix import Matrix, _RainEngine
+    times = [0.0, 0.4, 0.45, 1.3, 2.0, 0.1]
+
+    monkeypatch.setattr(_RainEngine, "SPARSE_MAX_FRACTION", 0.0)
+    dense = render(Matrix(density=density, font_size=10), times)
+    monkeypatch.setattr(_RainEngine, "SPARSE_MAX_FRACTION", 1.0)
+    sparse = render(Matrix(density=density, font_size=10), times)
+    # Switching paths between frames must not leave stale glyphs behind
+    monkeypatch.setattr(_RainEngine, "SPARSE_MAX_FRACTION", 0.5)
+    mixed = render(Matrix(density=density, font_size=10), times)
+
+    for d, s, m in zip(dense, sparse, mixed):
+        np.testing.assert_array_equal(d, s)
+        np.testing.assert_array_equal(d, m)
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_returned_frames_are_not_reused():
+    from custom_fx.matrix import Matrix
+    first, second = render(Matrix(density=1.0, font_size=10), [0.2, 1.1])
+    kept = first.copy()
+    assert first is not second
+    np.testing.assert_array_equal(first, kept)
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+@pytest.mark.parametrize("density", [0.2, 1.0])
+def test_full_precision_atlas_is_exact(density):
+    from custom_fx.matrix import Matrix
+    times = [0.0, 0.7, 1.9]
+    expected = render(Matrix(density=density, font_size=10), times)
+    baked = Matrix(density=density, font_size=10, brightness_levels=359)
+    for e, b in zip(expected, render(baked, times)):
+        np.testing.assert_array_equal(e, b)
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_atlas_memory_is_bounded_by_levels():
+    from custom_fx.matrix import Matrix
+    small, large = Matrix(font_size=10, brightness_levels=8), Matrix(font_size=10, brightness_levels=64)
+    render(small, [0.5])
+    render(large, [0.5])
+    glyph_bytes = len(small.chars) * small.char_h * small.char_w
+    assert small._rgb_atlas.shape == (8, len(small.chars), small.char_h, small.char_w, 3)
+    assert small.atlas_nbytes == glyph_bytes * (1 + 8 * 3)
+    assert large.atlas_nbytes == glyph_bytes * (1 + 64 * 3)
+    with pytest.raises(ValueError):
+        Matrix(brightness_levels=1)
@@ -0,0 +1,97 @@
+import pytest
+import media_index
+from media_index import MediaIndex, parse_keyframes
+
+FRAMECRC = """#software: Lavf61.1.100
+#tb 0: 1/12800
+#media_type 0: video
+0,      -1024,          0,      512,    13175, 0xed2527ba
+0,       -512,       1024,      512,     7309, 0x5d1f3eb6, F=0x0
+0,          0,        512,      512,     4547, 0xc013cbdc, F=0x0
+0,      12288,      12800,      512,    12993, 0x1b0d2c11
+0,      12800,      25600,      512,     5120, 0x0a0b0c0d, F=0x3
+"""
+
+@pytest.fixture
+def index(tmp_path):
+    probes = []
+
+    def probe(filename, **kwargs):
+        probes.append(filename)
+        return {"duration": 2.0, "video_found": True, "video_size": [64, 48], "video_fps": 10.0, "audio_found": False}
+
+    index = MediaIndex(str(tmp_path / "index.sqlite"))
+    index._probe = probe
+    index.probes = probes
+    return index
+
+@pytest.fixture
+def media(tmp_path):
+    folder = tmp_path / "media"
+    (folder / "sub").mkdir(parents=True)
+    for name in ("a.mp4", "b.mov", "sub/c.mkv", "notes.txt"):
+        (folder / name).write_bytes(b"data")
+    return folder
+
+def test_parse_keyframes():
+    assert parse_keyframes(FRAMECRC) == [0.0, 1.0, 2.0]
+
+def test_probe_is_answered_from_the_index(index, media):
+    path = str(media / "a.mp4")
+    first = index.parse_infos(path)
+    second = index.parse_infos(path)
+
+    assert first == second
+    assert second["video_size"] == [64, 48]
+    assert index.probes == [path]
+    assert (index.hits, index.misses) == (1, 1)
+
+def test_changed_file_is_probed_again(index, media):
+    path = media / "a.mp4"
+    index.parse_infos(str(path))
+    path.write_bytes(b"longer data")
+    index.parse_infos(str(path))
+    assert len(index.probes) == 2
+
+def test_probe_options_are_part_of_the_key(index, media):
+    path = str(media / "a.mp4")
+    index.parse_infos(path)
+    index.parse_infos(path, fps_source="tbr")
+    assert len(index.probes) == 2
+
+def test_index_persists_across_instances(index, media):
+    path = str(media / "a.mp4")
+    index.parse_infos(path)
+
+    reopened = MediaIndex(index.path)
+    reopened._probe = lambda *args, **kwargs: pytest.fail("probed again")
+    assert reopened.parse_infos(path)["duration"] == 2.0
+
+def test_scan_warms_media_files_in_parallel(index, media, monkeypatch):
+    listed = []
+    monkeypatch.setattr(media_index, "list_keyframes", lambda f: listed.append(f) or [0.0, 1.0])
+
+    result = index.scan(str(media), workers=3)
+    assert (result["files"], result["indexed"], result["cached"]) == (3, 3, 0)
+    assert len(listed) == 3
+    assert index.keyframes(str(media / "sub" / "c.mkv")) == [0.0, 1.0]
+
+    again = index.scan(str(media), workers=3)
+    assert (again["indexed"], again["cached"]) == (0, 3)
+    assert len(index.probes) == 3 and len(listed) == 3
+
+def test_scan_non_recursive_and_failures(index, media, monkeypatch):
+    monkeypatch.setattr(media_index, "list_keyframes", lambda f: [])
+    probe = index._probe
+
+    def failing_probe(filename, **kwargs):
+        if filename.endswith(".mov"):
+            raise OSError("unreadable")
+        return probe(filename, **kwargs)
+
+    index._probe = failing_probe
+    result = index.scan(str(media), recursive=False)
+    assert result["files"] == 2
+    assert result["indexed"] == 1
+    assert list(result["failed"]) == [str(media / "b.mov")]
+    assert "unreadable" in result["failed"][str(media / "b.mov")]
@@ -0,0 +1,29 @@
+import pickle
+from parallel_render import plan_segments
+from render_graph import RenderNode, materialize
+
+class Loaded:
+    def __init__(self, name):
+        self.name = name
+
+def load(name):
+    return Loaded(name)
+
+def rename(clip, suffix):
+    return Loaded(clip.name + suffix)
+
+def test_segments_cover_all_frames():
+    assert plan_segments(25, 10) == [(0, 10), (10, 20), (20, 25)]
+    assert plan_segments(0, 10) == []
+    assert plan_segments(3, 0) == [(0, 1), (1, 2), (2, 3)]
+
+def test_pickled_graph_rebuilds_sources():
+    src = RenderNode.source(Loaded("a.mp4"), load, {"name": "a.mp4"})
+    leaf = RenderNode("rename", rename, [src], {"suffix": "!"})
+    materialize(leaf)
+
+    copy = pickle.loads(pickle.dumps(leaf))
+    assert copy.clip is None
+    assert copy.parents[0].clip is None
+    assert copy.key == leaf.key
+    assert materialize(copy).name == "a.mp4!"
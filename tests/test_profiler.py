@@ -0,0 +1,56 @@
+import time
+import pytest
+from render_graph import RenderNode
+from profiler import profile_node
+
+class TimedClip:
+    """Video-like clip whose frames cost ``cost`` seconds on top of its parent's."""
+    def __init__(self, parent=None, cost=0.0):
+        self.parent = parent
+        self.cost = cost
+        self.size = (4, 4)
+        self.duration = 1.0
+        self.frame_function = self._frame
+
+    def _frame(self, t):
+        time.sleep(self.cost)
+        frame = self.parent.get_frame(t) if self.parent else 0
+        return frame + 1
+
+    def get_frame(self, t):
+        return self.frame_function(t)
+
+def slow(parent, cost):
+    return TimedClip(parent, cost)
+
+def test_self_time_is_attributed_per_node():
+    source = TimedClip(cost=0.001)
+    src = RenderNode.source(source)
+    fast_node = RenderNode("fast", slow, [src], {"cost": 0.0})
+    slow_node = RenderNode("slow", slow, [fast_node], {"cost": 0.02})
+
+    report = profile_node(slow_node, sample_frames=3, track_memory=False)
+    nodes = {row["op"]: row for row in report["nodes"]}
+
+    assert report["frames"] == 3
+    assert report["nodes"][0]["op"] == "slow"
+    assert set(nodes) == {"TimedClip", "fast", "slow"}
+    assert all(row["calls"] == 3 for row in nodes.values())
+    assert nodes["slow"]["p50_ms"] >= 15
+    assert nodes["fast"]["self_ms"] < nodes["slow"]["self_ms"] / 4
+    assert nodes["slow"]["inclusive_ms"] >= nodes["slow"]["self_ms"] + nodes["TimedClip"]["self_ms"] * 0.9
+
+def test_source_clip_is_restored_and_graph_untouched():
+    source = TimedClip()
+    original = source.frame_function
+    src = RenderNode.source(source)
+    node = RenderNode("fast", slow, [src], {"cost": 0.0})
+
+    report = profile_node(node, sample_frames=2)
+    assert source.frame_function == original
+    assert node.clip is None
+    assert all("peak_alloc_bytes_max" in row for row in report["nodes"])
+
+def test_rejects_no_samples():
+    with pytest.raises(ValueError):
+        profile_node(RenderNode.source(TimedClip()), sample_frames=0)
@@ -0,0 +1,31 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+from conftest import FrameClip
+
+def is_numpy_mocked():
+    return isinstance(np, MagicMock) or hasattr(np, 'assert_called')
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+@pytest.mark.parametrize("center", [(None, None), (0, 0), (3, 20), (38, 1), (100, -5), (10, 13)])
+def test_matches_index_gather(center):
+    from custom_fx import QuadMirror
+    from custom_fx.quad_mirror import _get_mirror_indices
+    h, w = 25, 39
+    frame = np.random.default_rng(1).integers(0, 256, (h, w, 3), dtype=np.uint8)
+    out = QuadMirror(*center).apply(FrameClip(frame))(0)
+
+    x = w // 2 if center[0] is None else int(max(0, min(w - 1, center[0])))
+    y = h // 2 if center[1] is None else int(max(0, min(h - 1, center[1])))
+    idx_x, idx_y = _get_mirror_indices(w, h, x, y)
+    np.testing.assert_array_equal(out, frame[idx_y][:, idx_x])
+    assert not np.shares_memory(out, frame)
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_mask_frames():
+    from custom_fx import QuadMirror
+    from custom_fx.quad_mirror import _get_mirror_indices
+    mask = np.random.default_rng(2).random((12, 17))
+    out = QuadMirror().apply(FrameClip(mask))(0)
+    idx_x, idx_y = _get_mirror_indices(17, 12)
+    np.testing.assert_array_equal(out, mask[idx_y][:, idx_x])
@@ -32,23 +32,18 @@ def test_register_clip_uuid_format():
     val = uuid.UUID(clip_id, version=4)
     assert str(val) == clip_id
 
-def test_register_clip_max_limit():
-    """Verify that RuntimeError is raised when MAX_CLIPS is reached."""
-    # Temporarily set MAX_CLIPS to a small value for testing
-    original_max = main.MAX_CLIPS
-    main.MAX_CLIPS = 3
-    try:
-        register_clip(MagicMock())
-        register_clip(MagicMock())
-        register_clip(MagicMock())
-
-        with pytest.raises(RuntimeError) as excinfo:
-            register_clip(MagicMock())
-
-        assert "Maximum number of clips" in str(excinfo.value)
-        assert str(main.MAX_CLIPS) in str(excinfo.value)
-    finally:
-        main.MAX_CLIPS = original_max
+def test_register_clip_has_no_count_limit():
+    """Registering more than the former MAX_CLIPS (100) clips succeeds; budgets evict instead of raising."""
+    ids = {register_clip(MagicMock()) for _ in range(150)}
+    assert len(ids) == 150
+    assert all(clip_id in main.CLIPS for clip_id in ids)
+
+def test_register_clip_records_parents():
+    """Derived clips record which registered clips they were built from."""
+    parent = register_clip(MagicMock())
+    child = register_clip(MagicMock(), [parent])
+    assert main.CLIPS.parents[child] == (parent,)
+    assert main.CLIPS.refs(parent) == 1
 
 @patch("uuid.uuid4")
 def test_register_clip_mock_uuid(mock_uuid4):
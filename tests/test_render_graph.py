@@ -0,0 +1,123 @@
+import pytest
+from render_graph import RenderNode, optimize, materialize, iter_nodes
+
+class FakeClip:
+    """Minimal clip recording the calls made on it."""
+    def __init__(self, ops=()):
+        self.ops = list(ops)
+        self.is_mask = False
+        self.image_funcs = []
+
+    def derive(self, op):
+        return FakeClip(self.ops + [op])
+
+    def image_transform(self, func, apply_to=None):
+        new = self.derive("image_transform")
+        new.image_funcs = self.image_funcs + [func]
+        return new
+
+    def subclipped(self, start, end):
+        return self.derive(("subclip", start, end))
+
+    def with_start(self, t):
+        return self.derive(("start", t))
+
+    def with_effects(self, effects):
+        clip = self
+        for effect in effects:
+            clip = effect.apply(clip)
+        return clip
+
+class AddEffect:
+    """Pixel effect adding a constant through image_transform."""
+    def __init__(self, value):
+        self.value = value
+
+    def copy(self):
+        return AddEffect(self.value)
+
+    def apply(self, clip):
+        return clip.image_transform(lambda im: im + self.value)
+
+def with_effects(clip, effects):
+    return clip.with_effects(effects)
+
+def subclipped(clip, start_time, end_time):
+    return clip.subclipped(start_time, end_time)
+
+def with_start(clip, t):
+    return clip.with_start(t)
+
+def pixel(parent, value):
+    return RenderNode("add", with_effects, [parent], {"effects": [AddEffect(value)]}, pixel=True)
+
+def test_pixel_chain_is_fused():
+    src = RenderNode.source(FakeClip())
+    leaf = pixel(pixel(pixel(src, 1), 10), 100)
+
+    plan = optimize(leaf)
+    assert len(list(iter_nodes(plan))) == 2
+    assert plan.key == leaf.key
+
+    clip = materialize(leaf)
+    assert clip.ops == ["image_transform"]
+    assert clip.image_funcs[0](0) == 111
+
+def test_shared_ancestor_is_not_fused():
+    src = RenderNode.source(FakeClip())
+    shared = pixel(src, 1)
+    a = pixel(shared, 10)
+    b = pixel(shared, 100)
+    root = RenderNode("pair", lambda x, y: (x, y), [a, b])
+
+    plan = optimize(root)
+    keys = [n.key for n in iter_nodes(plan)]
+    assert shared.key in keys
+    x, y = materialize(root)
+    # Both branches receive the very same built ancestor
+    assert x.image_funcs[0] is y.image_funcs[0]
+
+def test_subclip_chain_is_collapsed():
+    src = RenderNode.source(FakeClip())
+    s1 = RenderNode("subclip", subclipped, [src], {"start_time": 1, "end_time": 9})
+    s2 = RenderNode("subclip", subclipped, [s1], {"start_time": 2, "end_time": 20})
+    s3 = RenderNode("subclip", subclipped, [s2], {"start_time": 1, "end_time": None})
+
+    assert materialize(s3).ops == [("subclip", 4, 9)]
+
+def test_negative_subclip_is_not_collapsed():
+    src = RenderNode.source(FakeClip())
+    s1 = RenderNode("subclip", subclipped, [src], {"start_time": 0, "end_time": -1})
+    s2 = RenderNode("subclip", subclipped, [s1], {"start_time": 1, "end_time": None})
+
+    assert materialize(s2).ops == [("subclip", 0, -1), ("subclip", 1, None)]
+
+def test_set_start_chain_keeps_outermost():
+    src = RenderNode.source(FakeClip())
+    n = RenderNode("set_start", with_start, [src], {"t": 1})
+    n = RenderNode("set_start", with_start, [n], {"t": 5})
+
+    assert materialize(n).ops == [("start", 5)]
+
+def test_materialize_is_cached_and_graph_untouched():
+    src = RenderNode.source(FakeClip())
+    a = pixel(src, 1)
+    b = pixel(a, 2)
+
+    clip = materialize(b)
+    assert materialize(b) is clip
+    assert a.clip is None
+    assert b.parents == (a,)
+
+def test_unreachable_nodes_are_not_built():
+    calls = []
+    def build(clip):
+        calls.append(clip)
+        return clip
+
+    src = RenderNode.source(FakeClip())
+    RenderNode("sibling", build, [src])
+    wanted = RenderNode("wanted", lambda clip: clip.derive("wanted"), [src])
+
+    assert materialize(wanted).ops == ["wanted"]
+    assert calls == []
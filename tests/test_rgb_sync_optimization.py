@@ -3,6 +3,7 @@ import unittest
 from unittest.mock import MagicMock
 import numpy as np
 from custom_fx.rgb_sync import RGBSync
+from conftest import FrameClip
 
 class MockClip:
     def __init__(self):
@@ -63,5 +64,37 @@ class TestRGBSyncOptimization(unittest.TestCase):
         # Total 2 calls.
         self.assertEqual(clip.get_frame.call_count, 2, "get_frame should be called 2 times for mixed offsets")
 
+class TestRGBSyncSlicing(unittest.TestCase):
+    def setUp(self):
+        if isinstance(np, MagicMock) or hasattr(np, 'assert_called'):
+            self.skipTest("numpy is mocked")
+        self.frame = np.random.default_rng(0).integers(0, 256, (23, 37, 3), dtype=np.uint8)
+
+    def test_wrap_matches_roll(self):
+        offsets = [(5, -3), (0, 0), (-40, 51)]
+        out = RGBSync(*offsets).apply(FrameClip(self.frame))(0)
+        for i, offset in enumerate(offsets):
+            expected = np.roll(self.frame[:, :, i], shift=offset, axis=(1, 0))
+            np.testing.assert_array_equal(out[:, :, i], expected)
+
+    def test_clamp_repeats_edges(self):
+        offsets = [(4, 0), (0, -2), (-50, 7)]
+        out = RGBSync(*offsets, mode="clamp").apply(FrameClip(self.frame))(0)
+        h, w = self.frame.shape[:2]
+        ys, xs = np.indices((h, w))
+        for i, (dx, dy) in enumerate(offsets):
+            expected = self.frame[np.clip(ys - dy, 0, h - 1), np.clip(xs - dx, 0, w - 1), i]
+            np.testing.assert_array_equal(out[:, :, i], expected)
+
+    def test_output_is_a_fresh_frame(self):
+        apply = RGBSync(r_offset=(1, 1)).apply(FrameClip(self.frame))
+        first = apply(0)
+        self.assertIsNot(first, apply(0))
+        self.assertFalse(np.shares_memory(first, self.frame))
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            RGBSync(mode="mirror")
+
 if __name__ == '__main__':
     unittest.main()
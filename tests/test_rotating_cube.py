@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+from conftest import FrameClip
+
+def is_numpy_mocked():
+    return isinstance(np, MagicMock) or hasattr(np, 'assert_called')
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_black_face_pixels_are_drawn():
+    import cv2
+    from custom_fx import RotatingCube
+    h, w = 40, 60
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    canvas = np.full((h, w, 3), 7, dtype=np.uint8)
+    coverage = np.zeros((h, w), dtype=np.uint8)
+    src_pts = np.array([[0, 0], [w, 0], [w, h], [0, h]], dtype=np.float32)
+    dst_pts = np.array([[10, 5], [30, 5], [30, 25], [10, 25]], dtype=np.float32)
+
+    warp = lambda M, size: cv2.warpPerspective(frame, M, size)
+    RotatingCube._draw_face(canvas, coverage, src_pts, dst_pts, warp)
+
+    # The black face covers its quad, and nothing outside its bounding box is touched
+    assert (canvas[6:25, 11:30] == 0).all()
+    assert (canvas[:4] == 7).all()
+    assert (canvas[:, 32:] == 7).all()
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_face_fills_frame_at_rest():
+    from custom_fx import RotatingCube
+    frame = np.random.default_rng(0).integers(1, 255, (30, 40, 3), dtype=np.uint8)
+    effect = RotatingCube(mirror=False, motion_radius=0)
+    out = effect.apply(FrameClip(frame))(0)
+    assert out.shape == frame.shape
+    assert out.any(axis=-1).all()
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+def test_kaleidoscope_cube_matches_chained_effects_in_nearest_mode():
+    from custom_fx import Kaleidoscope, RotatingCube, KaleidoscopeCube
+    h, w = 48, 64
+    # Piecewise constant image, so nearest and bilinear cube sampling agree away from block edges
+    frame = np.kron(np.arange(12, dtype=np.uint8).reshape(3, 4) * 20, np.ones((16, 16), dtype=np.uint8))
+    frame = np.dstack([frame] * 3)
+    clip = FrameClip(frame)
+    fused = KaleidoscopeCube({"n_slices": 6}, {"motion_radius": 0}).apply(clip)(0.5)
+    chained = RotatingCube(motion_radius=0).apply(Kaleidoscope(6).apply(clip))(0.5)
+
+    assert fused.shape == chained.shape
+    assert (fused == chained).mean() > 0.9
+
+@pytest.mark.skipif(is_numpy_mocked(), reason="numpy is mocked")
+@pytest.mark.parametrize("n_slices, mirror", [(6, True), (5, False)])
+def test_kaleidoscope_cube_samples_bilinearly_like_chained_effects(n_slices, mirror):
+    from custom_fx import Kaleidoscope, RotatingCube, KaleidoscopeCube
+    h, w = 60, 80
+    # Smooth image: nearest sampling of the cube would stair-step against the chained bilinear warp
+    y, x = np.mgrid[0:h, 0:w]
+    frame = np.dstack([x * 3, y * 4, 128 + 60 * np.sin(x / 5) * np.cos(y / 4)]).astype(np.uint8)
+    clip = FrameClip(frame)
+    cube_params = {"mirror": mirror, "motion_radius": 0}
+    for t in (0.5, 1.7):
+        fused = KaleidoscopeCube({"n_slices": n_slices}, cube_params).apply(clip)(t)
+        chained = RotatingCube(**cube_params).apply(Kaleidoscope(n_slices).apply(clip))(t)
+        diff = np.abs(fused.astype(int) - chained.astype(int))
+        assert diff.mean() < 0.5
+        assert np.percentile(diff, 99) <= 2
@@ -0,0 +1,76 @@
+import subprocess
+import pytest
+import smart_cut
+from smart_cut import frame_range, plan_cut
+
+INFOS = {"video_fps": 25.0, "video_codec_name": "h264", "video_n_frames": 250, "audio_found": True, "start": 0.0}
+KEYFRAMES = [0.0, 2.0, 4.0, 6.0, 8.0]
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    """Records the ffmpeg commands and the concatenated pieces instead of running them."""
+    calls = {"commands": [], "concat": None}
+
+    def run(cmd, **kwargs):
+        calls["commands"].append([str(arg) for arg in cmd])
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    def concat(segments, filename, audiofile=None):
+        calls["concat"] = (len(segments), filename, audiofile is not None)
+
+    monkeypatch.setattr(smart_cut.subprocess, "run", run)
+    monkeypatch.setattr(smart_cut, "concat_segments", concat)
+    return calls
+
+def option(cmd, name):
+    return cmd[cmd.index(name) + 1]
+
+def test_frame_range():
+    assert frame_range(0.3, 2.7, 25) == (7, 68)
+    assert frame_range(1.0, 3.0, 25) == (25, 75)
+    # Never empty
+    assert frame_range(1.0, 1.01, 25) == (25, 26)
+
+def test_plan_cut_copies_whole_gops():
+    assert plan_cut([0, 50, 100, 150], 30, 130) == [(30, 50, False), (50, 100, True), (100, 130, False)]
+    # Cuts on keyframes re-encode nothing
+    assert plan_cut([0, 50, 100, 150], 50, 150) == [(50, 150, True)]
+    # A single keyframe in the range leaves nothing to copy
+    assert plan_cut([0, 50, 100], 30, 90) == [(30, 90, False)]
+
+def test_smart_cut_reencodes_only_the_edges(ffmpeg):
+    result = smart_cut.smart_cut("in.mp4", 0.5, 7.3, "out.mp4", INFOS, KEYFRAMES)
+    assert result == {"frames": 171, "copied_frames": 100, "reencoded_frames": 71}
+
+    head, middle, tail, audio = ffmpeg["commands"]
+    assert option(head, "-c:v") == "libx264" and option(head, "-frames:v") == "38"
+    # Frame 12, on screen at 0.5s, starts at 0.48s
+    assert abs(float(option(head, "-ss")) - 0.48) < 0.001
+    assert option(middle, "-c:v") == "copy" and option(middle, "-frames:v") == "100"
+    # Seeks into the keyframe's first frame so the demuxer lands on it
+    assert 2.0 < float(option(middle, "-ss")) < 2.04
+    assert option(tail, "-c:v") == "libx264" and option(tail, "-frames:v") == "33"
+    assert "-vn" in audio
+    assert ffmpeg["concat"] == (3, "out.mp4", True)
+
+def test_end_of_file_closes_the_last_gop(ffmpeg):
+    result = smart_cut.smart_cut("in.mp4", 2.0, 10.0, "out.mp4", dict(INFOS, audio_found=False), KEYFRAMES)
+    assert result["copied_frames"] == 200
+    assert len(ffmpeg["commands"]) == 1
+    assert ffmpeg["concat"] == (1, "out.mp4", False)
+
+def test_other_codecs_are_reencoded_in_one_pass(ffmpeg):
+    result = smart_cut.smart_cut("in.webm", 0.5, 7.3, "out.webm", dict(INFOS, video_codec_name="vp9"), KEYFRAMES)
+    assert result["copied_frames"] == 0
+    (cmd,) = ffmpeg["commands"]
+    # The container's default encoder, audio from a second input
+    assert "-c:v" not in cmd and cmd.count("-i") == 2
+    assert cmd[-1] == "out.webm"
+    assert ffmpeg["concat"] is None
+
+def test_ffmpeg_failure_is_reported(monkeypatch):
+    monkeypatch.setattr(
+        smart_cut.subprocess, "run", lambda cmd, **kwargs: subprocess.CompletedProcess(cmd, 1, "", "Invalid data")
+    )
+    with pytest.raises(RuntimeError, match="Invalid data"):
+        smart_cut.smart_cut("in.mp4", 0.5, 7.3, "out.mp4", INFOS, KEYFRAMES)